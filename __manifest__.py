@@ -36,21 +36,42 @@
         'hr',
         'hr_holidays',  # Standard leave request management
         'mail',
+        'bus',  # Real-time leave status updates
         'hr_timesheet',  # For timesheet functionality
+        'attachment_indexation',  # Text extraction of PDF/DOCX documents
     ],
     'data': [
         'security/security.xml',
         'security/ir.model.access.csv',
+        'data/employee_portal_data.xml',
+        'data/employee_document_mail_templates.xml',
+        'views/portal_assets.xml',
         'views/portal_templates.xml',
+        'views/hr_employee_portal_views.xml',
+        'views/employee_portal_activity_views.xml',
+        'views/employee_document_views.xml',
+        'views/employee_announcement_views.xml',
+        'report/employee_document_compliance_report_views.xml',
+        'wizard/employee_document_publish_views.xml',
         'views/employee_dashboard_views.xml',
         'views/timesheet_payslip_views.xml',
         'views/leave_request_portal_views.xml',
+        'views/team_portal_views.xml',
+        'views/employee_document_portal_views.xml',
+        'views/employee_announcement_portal_views.xml',
     ],
     'assets': {
         'web.assets_frontend': [
             'employee_portal_hub/static/src/js/employee_portal.js',
+        ],
+        # Only loaded by the employee portal pages, see views/portal_assets.xml
+        'employee_portal_hub.assets_portal': [
             'employee_portal_hub/static/src/scss/employee_portal.scss',
         ],
+        # Loaded on demand by the portal widgets that need it
+        'employee_portal_hub.assets_portal_features': [
+            'employee_portal_hub/static/src/js/features/*.js',
+        ],
     },
     'demo': [],
     'installable': True,
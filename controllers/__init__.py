@@ -1,3 +1,8 @@
 # -*- coding: utf-8 -*-
 
 from . import portal
+from . import team_portal
+from . import leave_upload
+from . import documents_portal
+from . import announcements_portal
+from . import offline_portal
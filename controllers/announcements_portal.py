@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+
+from odoo import http
+from odoo.http import request
+from odoo.addons.portal.controllers.portal import CustomerPortal, pager as portal_pager
+
+
+class AnnouncementsPortal(CustomerPortal):
+
+    @http.route(['/my/announcements', '/my/announcements/page/<int:page>'], type='http', auth="user", website=True)
+    def portal_my_announcements(self, page=1, **kw):
+        """Announcements feed of the employee, read from the audience cache"""
+        employee = request.env.user.employee_id
+        if not employee:
+            return request.render("employee_portal_hub.no_employee_error")
+
+        Announcement = request.env['employee.announcement']
+        feed = Announcement._get_portal_feed(employee)
+        last_seen = request.env['employee.announcement.seen']._get_seen_date(request.env.user)
+        pager = portal_pager(
+            url="/my/announcements",
+            total=len(feed),
+            page=page,
+            step=self._items_per_page,
+        )
+        announcements = feed[pager['offset']:pager['offset'] + self._items_per_page]
+        bodies = {
+            row['id']: row['body']
+            for row in Announcement.sudo().browse([a['id'] for a in announcements]).read(['body'])
+        }
+        if feed:
+            request.env['employee.announcement.seen']._mark_seen(request.env.user, feed[0]['publish_date'])
+
+        values = self._prepare_portal_layout_values()
+        values.update({
+            'employee': employee,
+            'announcements': announcements,
+            'bodies': bodies,
+            'last_seen': last_seen,
+            'pager': pager,
+            'page_name': 'employee_announcements',
+            'default_url': '/my/announcements',
+        })
+        return request.render("employee_portal_hub.portal_my_announcements", values)
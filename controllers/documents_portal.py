@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+
+from odoo import http, _
+from odoo.http import request
+from odoo.addons.portal.controllers.portal import CustomerPortal, pager as portal_pager
+from odoo.exceptions import AccessError, MissingError
+
+DOCUMENT_LIST_FIELDS = ['document_name', 'document_type', 'document_category', 'description',
+                        'expiry_date', 'is_mandatory_read', 'read_date', 'acknowledged_date',
+                        'mimetype', 'file_size']
+
+
+class DocumentsPortal(CustomerPortal):
+
+    def _get_document_searchbar_filters(self):
+        return {
+            'all': {'label': _('All'), 'domain': []},
+            'unread': {'label': _('Unread'), 'domain': [('read_date', '=', False)]},
+            'mandatory': {'label': _('Mandatory Read'), 'domain': [('is_mandatory_read', '=', True)]},
+            'to_acknowledge': {'label': _('To Acknowledge'), 'domain': [
+                ('is_mandatory_read', '=', True), ('acknowledged_date', '=', False)]},
+            'company': {'label': _('Company'), 'domain': [('document_category', '=', 'company')]},
+        }
+
+    @http.route(['/my/documents', '/my/documents/page/<int:page>'], type='http', auth="user", website=True)
+    def portal_my_documents(self, page=1, filterby=None, **kw):
+        """List the employee's documents (no file content is read)"""
+        employee = request.env.user.employee_id
+        if not employee:
+            return request.render("employee_portal_hub.no_employee_error")
+
+        Document = request.env['employee.document']
+        searchbar_filters = self._get_document_searchbar_filters()
+        if filterby not in searchbar_filters:
+            filterby = 'all'
+        domain = [('employee_id', '=', employee.id)] + searchbar_filters[filterby]['domain']
+
+        pager = portal_pager(
+            url="/my/documents",
+            url_args={'filterby': filterby},
+            total=Document.search_count(domain),
+            page=page,
+            step=self._items_per_page,
+        )
+        documents = Document.search_read(
+            domain, DOCUMENT_LIST_FIELDS, limit=self._items_per_page, offset=pager['offset'])
+
+        values = self._prepare_portal_layout_values()
+        values.update({
+            'employee': employee,
+            'documents': documents,
+            'pager': pager,
+            'searchbar_filters': searchbar_filters,
+            'filterby': filterby,
+            'page_name': 'employee_documents',
+            'default_url': '/my/documents',
+        })
+        return request.render("employee_portal_hub.portal_my_documents", values)
+
+    @http.route(['/my/documents/search', '/my/documents/search/page/<int:page>'],
+                type='http', auth="user", website=True)
+    def portal_search_documents(self, page=1, search='', **kw):
+        """Full-text search in the employee's documents, ranked by relevance"""
+        employee = request.env.user.employee_id
+        if not employee:
+            return request.render("employee_portal_hub.no_employee_error")
+        search = (search or '').strip()
+        if not search:
+            return request.redirect('/my/documents')
+
+        Document = request.env['employee.document']
+        offset = (max(page, 1) - 1) * self._items_per_page
+        total, documents = Document._search_portal_documents(
+            employee, search, limit=self._items_per_page, offset=offset)
+        pager = portal_pager(
+            url="/my/documents/search",
+            url_args={'search': search},
+            total=total,
+            page=page,
+            step=self._items_per_page,
+        )
+        rows = {row['id']: row for row in documents.read(DOCUMENT_LIST_FIELDS)}
+
+        values = self._prepare_portal_layout_values()
+        values.update({
+            'employee': employee,
+            'documents': [rows[document_id] for document_id in documents.ids],
+            'pager': pager,
+            'searchbar_filters': self._get_document_searchbar_filters(),
+            'filterby': 'all',
+            'search': search,
+            'page_name': 'employee_documents',
+            'default_url': '/my/documents',
+        })
+        return request.render("employee_portal_hub.portal_my_documents", values)
+
+    @http.route(['/my/documents/mark_all_read'], type='http', auth="user", methods=['POST'], website=True)
+    def portal_documents_mark_all_read(self, **kw):
+        """Mark all the employee's documents as read in one statement"""
+        employee = request.env.user.employee_id
+        if employee:
+            request.env['employee.document']._mark_all_read(employee)
+        return request.redirect('/my/documents')
+
+    @http.route(['/my/documents/<int:document_id>/acknowledge'], type='http', auth="user", methods=['POST'],
+                website=True)
+    def portal_document_acknowledge(self, document_id, **kw):
+        """Sign the acknowledgement of a mandatory document"""
+        try:
+            document_sudo = self._document_check_access('employee.document', document_id)
+        except (AccessError, MissingError):
+            return request.redirect('/my/documents')
+        if document_sudo.employee_id.user_id == request.env.user:
+            document_sudo.with_user(request.env.user).action_acknowledge()
+        return request.redirect('/my/documents')
+
+    @http.route(['/my/documents/<int:document_id>/download'], type='http', auth="user", website=True)
+    def portal_document_download(self, document_id, **kw):
+        """Stream the (possibly shared) file of one of the employee's documents"""
+        try:
+            document_sudo = self._document_check_access('employee.document', document_id)
+        except (AccessError, MissingError):
+            return request.redirect('/my/documents')
+        if not document_sudo.attachment_id:
+            return request.redirect('/my/documents')
+
+        if document_sudo.employee_id.user_id == request.env.user:
+            document_sudo.mark_as_read()
+        return request.env['ir.binary']._get_stream_from(document_sudo.attachment_id).get_response(
+            as_attachment=True)
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+
+from odoo import http, _
+from odoo.http import request
+from odoo.addons.portal.controllers.portal import CustomerPortal
+from odoo.exceptions import AccessError, MissingError, UserError
+
+
+UPLOAD_CHUNK_HINT = 1024 * 1024
+
+
+class LeaveUploadPortal(CustomerPortal):
+    """Resumable upload API for leave supporting documents.
+
+    A client calls ``init`` once, then appends chunks at the offset returned
+    by the server until the whole file is received. After a failure it asks
+    for the ``status`` and resumes from the last acknowledged offset. The
+    upload is finally attached to a leave either through ``finalize`` or by
+    posting its token with the leave request form.
+    """
+
+    def _get_portal_upload(self, token):
+        upload = request.env['employee.portal.upload'].sudo().search([
+            ('token', '=', token),
+            ('user_id', '=', request.env.uid),
+        ], limit=1)
+        if not upload:
+            raise MissingError(_('Upload not found.'))
+        return upload
+
+    @http.route(['/my/leave_requests/upload/init'], type='json', auth="user", website=True)
+    def portal_leave_upload_init(self, filename=None, size=0, **kw):
+        """Register a new upload and return its token"""
+        if not request.env.user.employee_id:
+            return {'error': _('No employee record found')}
+        try:
+            size = int(size)
+        except (TypeError, ValueError):
+            return {'error': _('Invalid file size.')}
+        if not isinstance(filename, str) or not filename.strip():
+            filename = 'upload'
+        try:
+            upload = request.env['employee.portal.upload'].sudo()._start_upload(filename[:255], size)
+        except UserError as e:
+            return {'error': str(e)}
+        return {
+            'token': upload.token,
+            'offset': 0,
+            'chunk_size': UPLOAD_CHUNK_HINT,
+        }
+
+    @http.route(['/my/leave_requests/upload/<string:token>/status'], type='json', auth="user", website=True)
+    def portal_leave_upload_status(self, token, **kw):
+        """Return the last acknowledged offset of an upload"""
+        try:
+            upload = self._get_portal_upload(token)
+        except MissingError as e:
+            return {'error': str(e)}
+        return {
+            'offset': upload.received_size,
+            'size': upload.file_size,
+            'state': upload.state,
+        }
+
+    @http.route(['/my/leave_requests/upload/<string:token>/chunk'], type='http', auth="user", methods=['POST'])
+    def portal_leave_upload_chunk(self, token, offset=0, **kw):
+        """Append the raw request body at ``offset``"""
+        try:
+            upload = self._get_portal_upload(token)
+        except MissingError as e:
+            return request.make_json_response({'error': str(e)}, status=404)
+        try:
+            received = upload._append_chunk(int(offset), request.httprequest.stream)
+        except UserError as e:
+            # Tell the client where to resume from
+            return request.make_json_response({
+                'error': str(e),
+                'offset': upload.received_size,
+            }, status=409)
+        return request.make_json_response({'offset': received, 'size': upload.file_size})
+
+    @http.route(['/my/leave_requests/upload/<string:token>/finalize'], type='json', auth="user", website=True)
+    def portal_leave_upload_finalize(self, token, leave_id=None, **kw):
+        """Attach a completed upload to one of the user's leave requests"""
+        try:
+            upload = self._get_portal_upload(token)
+            leave = self._document_check_access('hr.leave', int(leave_id))
+            attachment = upload._finalize('hr.leave', leave.id)
+        except (AccessError, MissingError, ValueError, TypeError):
+            return {'error': _('Access denied or leave request not found.')}
+        except UserError as e:
+            return {'error': str(e)}
+        return {
+            'attachment_id': attachment.id,
+            'name': attachment.name,
+        }
@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+
+from odoo import http
+from odoo.http import request
+from odoo.tools import file_open
+
+
+class OfflinePortal(http.Controller):
+
+    @http.route('/my/service-worker.js', type='http', auth="user", methods=['GET'])
+    def portal_service_worker(self, **kw):
+        """Serve the service worker from /my/ so that its scope is the portal"""
+        if not request.env['ir.http']._get_portal_service_worker_url():
+            return request.not_found()
+        with file_open('employee_portal_hub/static/src/sw/portal_service_worker.js', 'rb') as worker:
+            content = worker.read()
+        return request.make_response(content, headers=[
+            ('Content-Type', 'text/javascript; charset=utf-8'),
+            # Browsers check for worker updates: never let them use a stale copy
+            ('Cache-Control', 'no-cache'),
+        ])
+
+    @http.route('/my/offline', type='http', auth="user", website=True)
+    def portal_offline(self, **kw):
+        """Page precached by the service worker and shown when offline"""
+        return request.render("employee_portal_hub.portal_offline", {
+            'page_name': 'employee_offline',
+        })
@@ -1,10 +1,10 @@
 # -*- coding: utf-8 -*-
 
-from odoo import http, _
+from odoo import fields, http, _
 from odoo.http import request
 from odoo.addons.portal.controllers.portal import CustomerPortal, pager as portal_pager
 from odoo.exceptions import AccessError, MissingError, ValidationError, UserError
-from datetime import datetime
+from datetime import datetime, timedelta
 import logging
 
 _logger = logging.getLogger(__name__)
@@ -64,6 +64,7 @@ class EmployeePortalHub(CustomerPortal):
             return request.render("employee_portal_hub.no_employee_error")
 
         employee = request.env.user.employee_id
+        today = fields.Date.context_today(employee)
 
         # Get recent leave requests (if leave request module is available)
         recent_leaves = []
@@ -156,6 +157,13 @@ class EmployeePortalHub(CustomerPortal):
             'has_timesheet_module': 'account.analytic.line' in request.env,
             'has_payroll_module': 'hr.payslip' in request.env,
             'has_project_access': has_project_access,
+            'leave_calendar_version': self._get_leave_calendar_version(employee),
+            'is_team_manager': bool(request.env['hr.employee']._get_portal_team_ids(employee.id)),
+            'upcoming_holidays': request.env['resource.calendar.leaves']._get_portal_holidays(
+                employee, today, today + timedelta(days=90)),
+            'latest_announcements': request.env['employee.announcement']._get_portal_feed(employee)[:3],
+            'unread_announcements': request.env['employee.announcement']._get_portal_unread_count(
+                employee, request.env.user),
         }
 
         return request.render("employee_portal_hub.employee_dashboard", values)
@@ -304,6 +312,20 @@ class EmployeePortalHub(CustomerPortal):
 
         return request.render("employee_portal_hub.portal_payslip_detail", values)
 
+    def _get_leave_calendar_version(self, employee):
+        """Return a stamp that changes whenever one of the employee's leaves changes.
+
+        The calendar client keys its cached month windows on this value, so a
+        single aggregate query (plus the cached public-holiday stamp) is enough
+        to know whether cached data is stale.
+        """
+        [(count, last_write)] = request.env['hr.leave'].sudo()._read_group(
+            [('employee_id', '=', employee.id)],
+            aggregates=['__count', 'write_date:max'],
+        )
+        holiday_stamp = request.env['resource.calendar.leaves']._get_portal_holiday_stamp(employee.company_id.id)
+        return '%s-%s-%s' % (count, last_write and int(last_write.timestamp()) or 0, holiday_stamp)
+
     @http.route(['/my/employee/leaves/calendar'], type='json', auth="user", website=True)
     def employee_leaves_calendar(self, start_date=None, end_date=None, **kw):
         """Return leave data for calendar display"""
@@ -313,19 +335,17 @@ class EmployeePortalHub(CustomerPortal):
 
         domain = [('employee_id', '=', employee.id)]
 
-        # Filter by date range if provided
+        # Filter by date range if provided: any leave overlapping the window
         if start_date and end_date:
             domain += [
-                '|',
-                '&', ('date_from', '>=', start_date), ('date_from', '<=', end_date),
-                '|',
-                '&', ('date_to', '>=', start_date), ('date_to', '<=', end_date),
-                '&', ('date_from', '<=', start_date), ('date_to', '>=', end_date)
+                ('date_from', '<=', '%s 23:59:59' % end_date),
+                ('date_to', '>=', '%s 00:00:00' % start_date),
             ]
 
         leaves = request.env['hr.leave'].search_read(
             domain=domain,
-            fields=['id', 'name', 'date_from', 'date_to', 'state', 'holiday_status_id'],
+            fields=['id', 'name', 'date_from', 'date_to', 'request_date_from', 'request_date_to',
+                    'state', 'holiday_status_id'],
             order='date_from desc'
         )
 
@@ -337,12 +357,24 @@ class EmployeePortalHub(CustomerPortal):
                 'name': leave['name'],
                 'date_from': leave['date_from'],
                 'date_to': leave['date_to'],
+                'request_date_from': leave['request_date_from'],
+                'request_date_to': leave['request_date_to'],
                 'state': leave['state'],
                 'leave_type_name': leave['holiday_status_id'][1]
             })
 
+        holidays = []
+        if start_date and end_date:
+            try:
+                holidays = request.env['resource.calendar.leaves']._get_portal_holidays(
+                    employee, fields.Date.to_date(start_date), fields.Date.to_date(end_date))
+            except ValueError:
+                holidays = []
+
         return {
-            'leaves': calendar_leaves
+            'leaves': calendar_leaves,
+            'holidays': holidays,
+            'version': self._get_leave_calendar_version(employee),
         }
 
     # Leave Request Management Routes
@@ -436,6 +468,11 @@ class EmployeePortalHub(CustomerPortal):
         }
         return request.render("employee_portal_hub.portal_leave_request_detail", values)
 
+    def _get_portal_leave_types(self, employee, leave=None):
+        """Leave types the employee can request, with their remaining balance"""
+        include_type_ids = leave.holiday_status_id.ids if leave else ()
+        return request.env['hr.leave.type']._get_portal_leave_types(employee, include_type_ids)
+
     @http.route(['/my/leave_requests/new'], type='http', auth="user", website=True, methods=['GET', 'POST'])
     def portal_leave_request_new(self, **kw):
         """Create new leave request"""
@@ -447,17 +484,167 @@ class EmployeePortalHub(CustomerPortal):
         if not employee:
             return request.render("employee_portal_hub.no_employee_error")
 
-        # Get available leave types
-        leave_types = request.env['hr.leave.type'].search([('active', '=', True)])
-
         values = {
             'employee': employee,
-            'leave_types': leave_types,
+            'leave_types': self._get_portal_leave_types(employee),
             'page_name': 'leave_request_new',
             'return_url': '/my/leave_requests',
         }
         return request.render("employee_portal_hub.portal_leave_request_new", values)
 
+    def _prepare_leave_uploads(self):
+        """Stream the uploaded supporting documents to the filestore.
+
+        Returns the attachment values (without ``res_id``) of the files posted
+        with the form, and the completed resumable uploads whose tokens were
+        posted with it; see ``_attach_leave_uploads``.
+        """
+        uploads = [upload for upload in request.httprequest.files.getlist('attachment') if upload.filename]
+        upload_values = request.env['ir.attachment']._portal_store_uploads(uploads) if uploads else []
+
+        resumable_uploads = request.env['employee.portal.upload']
+        tokens = request.httprequest.form.getlist('upload_token')
+        if tokens:
+            resumable_uploads = resumable_uploads.sudo().search([
+                ('token', 'in', tokens),
+                ('user_id', '=', request.env.uid),
+                ('state', '=', 'uploading'),
+            ])
+            incomplete = resumable_uploads.filtered(lambda u: u.received_size != u.file_size)
+            if incomplete:
+                raise UserError(_("The upload of %s is not complete yet.", ', '.join(incomplete.mapped('name'))))
+        return upload_values, resumable_uploads
+
+    def _attach_leave_uploads(self, leaves, uploads):
+        """Create the attachments of the leave requests in a single batch"""
+        upload_values, resumable_uploads = uploads
+        values = list(upload_values) + [upload._prepare_attachment_values() for upload in resumable_uploads]
+        if values:
+            request.env['ir.attachment'].create([
+                dict(vals, res_model='hr.leave', res_id=leave.id) for leave in leaves for vals in values
+            ])
+        resumable_uploads.write({'state': 'done'})
+
+    def _get_posted_leave_ranges(self, **kw):
+        """Date ranges posted with the leave form, one per repeated date pair"""
+        form = request.httprequest.form
+        return [{
+            'date_from': date_from,
+            'date_to': date_to,
+            'holiday_status_id': kw.get('holiday_status_id'),
+            'name': kw.get('name') or '',
+        } for date_from, date_to in zip(form.getlist('request_date_from'), form.getlist('request_date_to'))]
+
+    def _format_leave_range_errors(self, ranges, errors):
+        """Human readable per-range errors, in the order the ranges were posted"""
+        messages = []
+        for index, leave_range in enumerate(ranges):
+            if index in errors:
+                messages.append(_('%(date_from)s - %(date_to)s: %(error)s',
+                                  date_from=leave_range.get('date_from'), date_to=leave_range.get('date_to'),
+                                  error=errors[index]))
+        if 'submit' in errors:
+            messages.append(errors['submit'])
+        return messages
+
+    def _create_leave_requests_batch(self, employee, ranges, **kw):
+        """Handle the submission of several date ranges from the leave form"""
+        uploads = self._prepare_leave_uploads()
+        leaves_by_index, errors = request.env['hr.leave']._portal_create_batch(
+            employee, ranges,
+            submit=bool(kw.get('submit_immediately')),
+            atomic=bool(kw.get('all_or_nothing')),
+        )
+        leaves = request.env['hr.leave'].concat(*leaves_by_index.values())
+        if leaves:
+            self._attach_leave_uploads(leaves, uploads)
+
+        if errors:
+            if leaves:
+                error = _('%s leave requests were saved. The following periods could not be saved:', len(leaves))
+            else:
+                error = _('No leave request was saved:')
+            return request.render("employee_portal_hub.portal_leave_request_new", {
+                'error': error,
+                'range_errors': self._format_leave_range_errors(ranges, errors),
+                'employee': employee,
+                'leave_types': self._get_portal_leave_types(employee),
+                'values': kw,
+                # Only the refused periods are shown again
+                'ranges': [leave_range for index, leave_range in enumerate(ranges) if index not in leaves_by_index],
+            })
+
+        message = _('%s leave requests have been saved!', len(leaves))
+        return request.redirect(f'/my/leave_requests?message={message}')
+
+    @http.route(['/my/leave_requests/duration'], type='json', auth="user", website=True)
+    def portal_leave_request_duration(self, date_from=None, date_to=None, **kw):
+        """Preview the working days/hours a period would consume"""
+        employee = request.env.user.employee_id
+        if not employee:
+            return {'error': _('No employee record found')}
+        try:
+            date_from = fields.Date.to_date(date_from)
+            date_to = fields.Date.to_date(date_to)
+        except ValueError:
+            return {'error': _('Invalid dates.')}
+        if not date_from or not date_to or date_to < date_from:
+            return {'days': 0.0, 'hours': 0.0}
+        if (date_to - date_from).days > 366:
+            return {'error': _('The period cannot exceed one year.')}
+        duration = request.env['hr.leave']._get_portal_range_duration(employee, date_from, date_to)
+        holidays = request.env['resource.calendar.leaves']._get_portal_holidays(employee, date_from, date_to)
+        return dict(duration, holidays=[holiday['name'] for holiday in holidays])
+
+    @http.route(['/my/leave_requests/overlaps'], type='json', auth="user", website=True)
+    def portal_leave_request_overlaps(self, date_from=None, date_to=None, leave_id=None, **kw):
+        """List the department colleagues already off during a period"""
+        employee = request.env.user.employee_id
+        if not employee:
+            return {'error': _('No employee record found')}
+        try:
+            date_from = fields.Date.to_date(date_from)
+            date_to = fields.Date.to_date(date_to)
+            leave_id = int(leave_id or 0)
+        except (ValueError, TypeError):
+            return {'error': _('Invalid dates.')}
+        if not date_from or not date_to or date_to < date_from:
+            return {'overlaps': []}
+        if (date_to - date_from).days > 366:
+            return {'error': _('The period cannot exceed one year.')}
+        overlaps = request.env['hr.leave']._get_portal_team_overlaps(
+            employee, date_from, date_to, exclude_leave_id=leave_id)
+        return {'overlaps': [{
+            'employee_name': overlap['employee_name'],
+            'date_from': overlap['date_from'],
+            'date_to': overlap['date_to'],
+            'approved': overlap['state'] == 'validate',
+        } for overlap in overlaps]}
+
+    @http.route(['/my/leave_requests/batch'], type='json', auth="user", website=True)
+    def portal_leave_request_batch(self, ranges=None, submit=False, atomic=False, **kw):
+        """Create leave requests for several date ranges in one call.
+
+        ``ranges`` is a list of ``{date_from, date_to, holiday_status_id, name}``.
+        Returns one result per range, in the same order.
+        """
+        employee = request.env.user.employee_id
+        if not employee:
+            return {'error': _('No employee record found')}
+
+        ranges = ranges or []
+        if not isinstance(ranges, list):
+            return {'error': _('Invalid leave ranges.')}
+        leaves_by_index, errors = request.env['hr.leave']._portal_create_batch(
+            employee, ranges, submit=bool(submit), atomic=bool(atomic))
+        return {
+            'results': [{
+                'leave_id': leaves_by_index[index].id if index in leaves_by_index else False,
+                'error': errors.get(index, False),
+            } for index in range(len(ranges))],
+            'submit_error': errors.get('submit', False),
+        }
+
     def _create_leave_request(self, **kw):
         """Handle leave request creation from portal"""
         try:
@@ -466,6 +653,10 @@ class EmployeePortalHub(CustomerPortal):
             if not employee:
                 return request.render("employee_portal_hub.no_employee_error")
 
+            ranges = self._get_posted_leave_ranges(**kw)
+            if len(ranges) > 1:
+                return self._create_leave_requests_batch(employee, ranges, **kw)
+
             # Prepare values for hr.leave model
             vals = {
                 'employee_id': employee.id,
@@ -475,21 +666,12 @@ class EmployeePortalHub(CustomerPortal):
                 'name': kw.get('name') or '',
             }
 
+            # Stream uploads to the filestore first so size errors abort before any write
+            uploads = self._prepare_leave_uploads()
+
             # Create leave request
             leave_request = request.env['hr.leave'].create(vals)
-
-            # Handle file uploads
-            if 'attachment' in request.httprequest.files:
-                attachments = request.httprequest.files.getlist('attachment')
-                for attachment in attachments:
-                    if attachment.filename:
-                        attachment_value = {
-                            'name': attachment.filename,
-                            'datas': attachment.read(),
-                            'res_model': 'hr.leave',
-                            'res_id': leave_request.id,
-                        }
-                        request.env['ir.attachment'].create(attachment_value)
+            self._attach_leave_uploads(leave_request, uploads)
 
             # Submit automatically if requested
             if kw.get('submit_immediately'):
@@ -509,7 +691,7 @@ class EmployeePortalHub(CustomerPortal):
             return request.render("employee_portal_hub.portal_leave_request_new", {
                 'error': error_message,
                 'employee': request.env.user.employee_id,
-                'leave_types': request.env['hr.leave.type'].search([('active', '=', True)]),
+                'leave_types': self._get_portal_leave_types(request.env.user.employee_id),
                 'values': kw,
             })
         except Exception as e:
@@ -518,7 +700,7 @@ class EmployeePortalHub(CustomerPortal):
             return request.render("employee_portal_hub.portal_leave_request_new", {
                 'error': error_message,
                 'employee': request.env.user.employee_id,
-                'leave_types': request.env['hr.leave.type'].search([('active', '=', True)]),
+                'leave_types': self._get_portal_leave_types(request.env.user.employee_id),
                 'values': kw,
             })
 
@@ -539,7 +721,7 @@ class EmployeePortalHub(CustomerPortal):
         # GET request - show edit form
         values = {
             'leave': leave,
-            'leave_types': request.env['hr.leave.type'].search([('active', '=', True)]),
+            'leave_types': self._get_portal_leave_types(leave.employee_id, leave),
             'page_name': 'leave_request_edit',
             'return_url': f'/my/leave_requests/{leave_id}',
         }
@@ -556,21 +738,12 @@ class EmployeePortalHub(CustomerPortal):
                 'name': kw.get('name') or '',
             }
 
+            # Stream uploads to the filestore first so size errors abort before any write
+            uploads = self._prepare_leave_uploads()
+
             # Update leave request
             leave.write(vals)
-
-            # Handle file uploads
-            if 'attachment' in request.httprequest.files:
-                attachments = request.httprequest.files.getlist('attachment')
-                for attachment in attachments:
-                    if attachment.filename:
-                        attachment_value = {
-                            'name': attachment.filename,
-                            'datas': attachment.read(),
-                            'res_model': 'hr.leave',
-                            'res_id': leave.id,
-                        }
-                        request.env['ir.attachment'].create(attachment_value)
+            self._attach_leave_uploads(leave, uploads)
 
             # Submit automatically if requested
             if kw.get('submit_immediately'):
@@ -590,7 +763,7 @@ class EmployeePortalHub(CustomerPortal):
             return request.render("employee_portal_hub.portal_leave_request_edit", {
                 'error': error_message,
                 'leave': leave,
-                'leave_types': request.env['hr.leave.type'].search([('active', '=', True)]),
+                'leave_types': self._get_portal_leave_types(leave.employee_id, leave),
                 'values': kw,
             })
         except Exception as e:
@@ -599,7 +772,7 @@ class EmployeePortalHub(CustomerPortal):
             return request.render("employee_portal_hub.portal_leave_request_edit", {
                 'error': error_message,
                 'leave': leave,
-                'leave_types': request.env['hr.leave.type'].search([('active', '=', True)]),
+                'leave_types': self._get_portal_leave_types(leave.employee_id, leave),
                 'values': kw,
             })
 
@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+
+from odoo import fields, http, _
+from odoo.http import request
+from odoo.addons.portal.controllers.portal import CustomerPortal
+from datetime import timedelta
+
+
+TEAM_LEAVE_STATES = ['confirm', 'validate1', 'validate']
+
+
+class TeamPortal(CustomerPortal):
+
+    def _get_team_ids(self, employee, include_indirect=False):
+        """Cached ids of the employees reporting to ``employee``"""
+        return request.env['hr.employee']._get_portal_team_ids(employee.id, bool(include_indirect))
+
+    def _parse_team_window(self, date_from=None, date_to=None):
+        """Return the (date_from, date_to) window, defaulting to the next 30 days"""
+        try:
+            start = fields.Date.to_date(date_from) if date_from else fields.Date.context_today(request.env.user)
+            end = fields.Date.to_date(date_to) if date_to else start + timedelta(days=30)
+        except ValueError:
+            start = fields.Date.context_today(request.env.user)
+            end = start + timedelta(days=30)
+        if end < start:
+            start, end = end, start
+        return start, end
+
+    def _get_team_leaves(self, team_ids, date_from, date_to):
+        """Fetch the leaves of the whole team overlapping the window in one query.
+
+        Portal record rules only expose the user's own leaves, so the query runs
+        as superuser restricted to the manager's (cached) team ids.
+        """
+        if not team_ids:
+            return []
+        return request.env['hr.leave'].sudo().search_read(
+            [
+                ('employee_id', 'in', team_ids),
+                ('state', 'in', TEAM_LEAVE_STATES),
+                ('request_date_from', '<=', date_to),
+                ('request_date_to', '>=', date_from),
+            ],
+            fields=['employee_id', 'holiday_status_id', 'request_date_from', 'request_date_to',
+                    'number_of_days', 'state'],
+            order='request_date_from, employee_id',
+        )
+
+    def _group_team_leaves(self, leaves):
+        """Group leave rows by employee, keeping the query order"""
+        grouped = {}
+        for leave in leaves:
+            employee_id, employee_name = leave['employee_id']
+            entry = grouped.setdefault(employee_id, {
+                'employee_id': employee_id,
+                'employee_name': employee_name,
+                'leaves': [],
+            })
+            entry['leaves'].append({
+                'id': leave['id'],
+                'leave_type_name': leave['holiday_status_id'][1],
+                'date_from': leave['request_date_from'],
+                'date_to': leave['request_date_to'],
+                'number_of_days': leave['number_of_days'],
+                'state': leave['state'],
+            })
+        return sorted(grouped.values(), key=lambda entry: entry['employee_name'])
+
+    @http.route(['/my/team/leaves'], type='http', auth="user", website=True)
+    def portal_my_team_leaves(self, date_from=None, date_to=None, include_indirect=None, **kw):
+        """Who in my team is off during the selected window"""
+        employee = request.env.user.employee_id
+        if not employee:
+            return request.render("employee_portal_hub.no_employee_error")
+
+        date_from, date_to = self._parse_team_window(date_from, date_to)
+        team_ids = self._get_team_ids(employee, include_indirect)
+        team_leaves = self._group_team_leaves(self._get_team_leaves(team_ids, date_from, date_to))
+
+        values = self._prepare_portal_layout_values()
+        values.update({
+            'employee': employee,
+            'team_size': len(team_ids),
+            'team_leaves': team_leaves,
+            'date_from': date_from,
+            'date_to': date_to,
+            'include_indirect': bool(include_indirect),
+            'page_name': 'team_leaves',
+            'return_url': '/my/dashboard',
+        })
+        return request.render("employee_portal_hub.portal_my_team_leaves", values)
+
+    @http.route(['/my/team/leaves/data'], type='json', auth="user", website=True)
+    def portal_my_team_leaves_data(self, date_from=None, date_to=None, include_indirect=False, **kw):
+        """JSON variant of the team leave calendar"""
+        employee = request.env.user.employee_id
+        if not employee:
+            return {'error': _('No employee record found')}
+
+        date_from, date_to = self._parse_team_window(date_from, date_to)
+        team_ids = self._get_team_ids(employee, include_indirect)
+        return {
+            'date_from': fields.Date.to_string(date_from),
+            'date_to': fields.Date.to_string(date_to),
+            'team_size': len(team_ids),
+            'team': self._group_team_leaves(self._get_team_leaves(team_ids, date_from, date_to)),
+        }
+
+    @http.route(['/my/team/approvals'], type='http', auth="user", website=True)
+    def portal_my_team_approvals(self, message=None, error=None, **kw):
+        """Pending leave requests of my reports, for batch review"""
+        employee = request.env.user.employee_id
+        if not employee:
+            return request.render("employee_portal_hub.no_employee_error")
+
+        HrLeave = request.env['hr.leave']
+        pending_leaves = HrLeave.sudo().search_read(
+            HrLeave._get_portal_reviewable_domain(employee),
+            fields=['employee_id', 'holiday_status_id', 'request_date_from', 'request_date_to',
+                    'number_of_days', 'name'],
+            order='request_date_from, employee_id',
+        )
+
+        values = self._prepare_portal_layout_values()
+        values.update({
+            'employee': employee,
+            'pending_leaves': pending_leaves,
+            'message': message,
+            'error': error,
+            'page_name': 'team_approvals',
+            'return_url': '/my/team/leaves',
+        })
+        return request.render("employee_portal_hub.portal_my_team_approvals", values)
+
+    @http.route(['/my/team/approvals/review'], type='http', auth="user", website=True, methods=['POST'])
+    def portal_my_team_approvals_review(self, review_action=None, reason=None, **kw):
+        """Approve or refuse the selected leave requests in one batch"""
+        employee = request.env.user.employee_id
+        if not employee:
+            return request.render("employee_portal_hub.no_employee_error")
+
+        if review_action not in ('approve', 'refuse'):
+            return request.redirect('/my/team/approvals?error=%s' % _('Unknown review action.'))
+        try:
+            leave_ids = [int(leave_id) for leave_id in request.httprequest.form.getlist('leave_ids')]
+        except ValueError:
+            leave_ids = []
+        if not leave_ids:
+            return request.redirect('/my/team/approvals?error=%s' % _('Select at least one leave request.'))
+
+        reviewed, errors = request.env['hr.leave']._portal_batch_review(
+            employee, leave_ids, review_action, reason=reason or '')
+        if review_action == 'approve':
+            message = _('%s leave requests approved.', len(reviewed))
+        else:
+            message = _('%s leave requests refused.', len(reviewed))
+        url = '/my/team/approvals?message=%s' % message
+        if errors:
+            url += '&error=%s' % _('%s leave requests could not be reviewed.', len(errors))
+        return request.redirect(url)
+
+    @http.route(['/my/team/approvals/review/json'], type='json', auth="user", website=True)
+    def portal_my_team_approvals_review_json(self, leave_ids=None, review_action=None, reason=None, **kw):
+        """JSON variant of the batch review, returning the outcome per leave"""
+        employee = request.env.user.employee_id
+        if not employee:
+            return {'error': _('No employee record found')}
+        if review_action not in ('approve', 'refuse'):
+            return {'error': _('Unknown review action.')}
+        try:
+            leave_ids = [int(leave_id) for leave_id in leave_ids or []]
+        except (TypeError, ValueError):
+            return {'error': _('Invalid leave request.')}
+        reviewed, errors = request.env['hr.leave']._portal_batch_review(
+            employee, leave_ids, review_action, reason=reason or '')
+        return {'reviewed': reviewed.ids, 'errors': errors}
@@ -1,4 +1,20 @@
 # -*- coding: utf-8 -*-
 
 from . import account_analytic_line
+from . import employee_portal_cache
 from . import hr_employee
+from . import hr_department
+from . import hr_leave_type
+from . import ir_attachment
+from . import employee_portal_upload
+from . import employee_portal_mail
+from . import employee_portal_notification
+from . import employee_portal_login
+from . import employee_portal_activity
+from . import employee_document
+from . import employee_announcement
+from . import hr_leave
+from . import ir_http
+from . import res_users
+from . import resource_calendar
+from . import resource_calendar_leaves
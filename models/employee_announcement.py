@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+
+from datetime import timedelta
+
+from odoo import api, fields, models, tools
+from odoo.tools import frozendict
+
+ANNOUNCEMENT_FEED_SIZE = 100
+
+
+class EmployeeAnnouncement(models.Model):
+    """Company announcement shown in the portal feed.
+
+    An announcement is one row whatever the size of its audience: the feed
+    of an employee is read from a cached list shared by every employee of
+    the same company, department and job.
+    """
+    _name = 'employee.announcement'
+    _inherit = ['employee.portal.cache.mixin']
+    _description = 'Employee Announcement'
+    _order = 'publish_date desc, id desc'
+
+    name = fields.Char(string='Title', required=True)
+    body = fields.Html(string='Content', sanitize=True)
+    company_id = fields.Many2one(
+        'res.company',
+        string='Company',
+        required=True,
+        index=True,
+        default=lambda self: self.env.company,
+    )
+    department_ids = fields.Many2many(
+        'hr.department',
+        string='Departments',
+        help="Leave empty to address every department of the company.",
+    )
+    job_ids = fields.Many2many(
+        'hr.job',
+        string='Job Positions',
+        help="Leave empty to address every job position.",
+    )
+    priority = fields.Selection([
+        ('normal', 'Normal'),
+        ('important', 'Important'),
+    ], string='Priority', required=True, default='normal')
+    publish_date = fields.Datetime(string='Published On', required=True, index=True, default=fields.Datetime.now)
+    expiry_date = fields.Date(string='Expiry Date')
+    active = fields.Boolean(default=True)
+
+    @api.model
+    @tools.ormcache('company_id', 'department_id', 'job_id', 'today',
+                    'self.env["employee.portal.cache"]._get_versions("employee.announcement", "hr.department")')
+    def _get_audience_feed(self, company_id, department_id, job_id, today):
+        """Return the latest announcements addressed to one audience.
+
+        The audience is a ``(company, department, job)`` triple, so the list
+        is computed once and shared by all the employees it contains; an
+        announcement addressed to a department reaches its sub-departments.
+        The list holds what is not expired on ``today`` and published before
+        the end of the day, so the limit only applies to live announcements.
+        Returns a tuple of frozendicts ``{id, name, priority, publish_date,
+        expiry_date}``, most recent first.
+        """
+        domain = [
+            ('company_id', '=', company_id),
+            # Past the end of ``today`` in any timezone, the exact cutoff is applied by the caller
+            ('publish_date', '<', fields.Datetime.to_datetime(today) + timedelta(days=2)),
+            '|', ('expiry_date', '=', False), ('expiry_date', '>=', today),
+        ]
+        domain += ['|', ('department_ids', '=', False), ('department_ids', 'parent_of', department_id)] \
+            if department_id else [('department_ids', '=', False)]
+        domain += ['|', ('job_ids', '=', False), ('job_ids', 'in', job_id)] \
+            if job_id else [('job_ids', '=', False)]
+        announcements = self.sudo().search_read(
+            domain, ['name', 'priority', 'publish_date', 'expiry_date'], limit=ANNOUNCEMENT_FEED_SIZE)
+        return tuple(frozendict(announcement) for announcement in announcements)
+
+    @api.model
+    def _get_portal_feed(self, employee):
+        """Return the announcements currently visible to ``employee``.
+
+        The cached audience list is kept for the day; announcements scheduled
+        later in the day are filtered here.
+        """
+        now = fields.Datetime.now()
+        return [
+            announcement
+            for announcement in self._get_audience_feed(
+                employee.company_id.id, employee.department_id.id or None, employee.job_id.id or None,
+                fields.Date.context_today(self))
+            if announcement['publish_date'] <= now
+        ]
+
+    @api.model
+    def _get_portal_unread_count(self, employee, user):
+        """Count the announcements of the feed published after the user's mark"""
+        last_seen = self.env['employee.announcement.seen']._get_seen_date(user)
+        return sum(
+            1 for announcement in self._get_portal_feed(employee)
+            if not last_seen or announcement['publish_date'] > last_seen
+        )
+
+
+class EmployeeAnnouncementSeen(models.Model):
+    """High-water mark of the announcements a user has seen.
+
+    One row per user holds the publication date of the latest announcement
+    they have seen; everything published after it is unread.
+    """
+    _name = 'employee.announcement.seen'
+    _description = 'Employee Announcement Read Mark'
+    _log_access = False
+
+    user_id = fields.Many2one('res.users', string='User', required=True, ondelete='cascade')
+    seen_date = fields.Datetime(string='Seen Up To', required=True)
+
+    _sql_constraints = [
+        ('user_uniq', 'unique(user_id)', 'A user can only have one announcement read mark.'),
+    ]
+
+    @api.model
+    def _get_seen_date(self, user):
+        mark = self.sudo().search_read([('user_id', '=', user.id)], ['seen_date'], limit=1)
+        return mark[0]['seen_date'] if mark else False
+
+    @api.model
+    def _mark_seen(self, user, seen_date):
+        """Move the user's mark forward to ``seen_date`` with a single upsert"""
+        self.env.cr.execute("""
+            INSERT INTO employee_announcement_seen (user_id, seen_date)
+                 VALUES (%s, %s)
+            ON CONFLICT (user_id)
+              DO UPDATE SET seen_date = GREATEST(employee_announcement_seen.seen_date, EXCLUDED.seen_date)
+        """, [user.id, seen_date])
+        self.invalidate_model(['seen_date'])
@@ -0,0 +1,458 @@
+# -*- coding: utf-8 -*-
+
+import logging
+import threading
+from collections import defaultdict
+from datetime import timedelta
+
+from odoo import api, fields, models, _
+from odoo.exceptions import AccessError, UserError, ValidationError
+from odoo.tools import sql
+
+_logger = logging.getLogger(__name__)
+
+DOCUMENT_PUBLISH_BATCH_SIZE = 1000
+DOCUMENT_EXPIRY_BATCH_SIZE = 500
+DEFAULT_DOCUMENT_EXPIRY_HORIZONS = '30,7,0'
+DOCUMENT_INDEX_BATCH_SIZE = 200
+# Text search configuration used both to index and to query documents
+DOCUMENT_SEARCH_CONFIG = 'english'
+# tsvector values are limited to 1MB, keep the extracted text well below
+DOCUMENT_SEARCH_MAX_CHARS = 500000
+
+
+class EmployeeDocument(models.Model):
+    """HR document of one employee.
+
+    Documents only reference an ``ir.attachment``: a company-wide document
+    published to many employees is stored once (one attachment, found by
+    content checksum) and shared by all their records. The model itself has
+    no binary field, so lists never load file contents.
+    """
+    _name = 'employee.document'
+    _description = 'Employee Document'
+    _inherit = ['mail.thread']
+    _order = 'create_date desc, id desc'
+    _rec_name = 'document_name'
+
+    document_name = fields.Char(string='Document Name', required=True, tracking=True)
+    employee_id = fields.Many2one(
+        'hr.employee',
+        string='Employee',
+        required=True,
+        index=True,
+        ondelete='cascade',
+        tracking=True,
+    )
+    company_id = fields.Many2one(related='employee_id.company_id', store=True, index=True)
+    department_id = fields.Many2one(related='employee_id.department_id', string='Department')
+    document_type = fields.Selection([
+        ('contract', 'Contract'),
+        ('policy', 'Policy'),
+        ('handbook', 'Handbook'),
+        ('certificate', 'Certificate'),
+        ('identity', 'Identity Document'),
+        ('permit', 'Work Permit'),
+        ('other', 'Other'),
+    ], string='Document Type', required=True, default='other', tracking=True)
+    document_category = fields.Selection([
+        ('personal', 'Personal'),
+        ('company', 'Company'),
+        ('hr', 'HR'),
+        ('training', 'Training'),
+    ], string='Category', default='hr')
+    attachment_id = fields.Many2one('ir.attachment', string='File', ondelete='set null')
+    checksum = fields.Char(string='Content Hash', index=True, readonly=True)
+    mimetype = fields.Char(related='attachment_id.mimetype', string='File Type')
+    file_size = fields.Integer(related='attachment_id.file_size', string='File Size')
+    description = fields.Text(string='Description')
+    is_confidential = fields.Boolean(string='Confidential', default=False)
+    is_mandatory_read = fields.Boolean(string='Mandatory Read', default=False)
+    read_date = fields.Datetime(string='Read On', readonly=True, copy=False)
+    acknowledged_date = fields.Datetime(string='Acknowledged On', readonly=True, copy=False, tracking=True)
+    acknowledged_by_id = fields.Many2one('res.users', string='Acknowledged By', readonly=True, copy=False)
+    expiry_date = fields.Date(string='Expiry Date', index=True, tracking=True)
+    active = fields.Boolean(default=True)
+    expiry_reminder_level = fields.Integer(
+        string='Expiry Reminders Sent', default=0, readonly=True, copy=False,
+        help="Number of expiry horizons already notified for the current expiry date.")
+    expiry_notice_pending = fields.Boolean(string='Employee Expiry Notice Pending', readonly=True, copy=False)
+    expiry_hr_notice_pending = fields.Boolean(string='HR Expiry Notice Pending', readonly=True, copy=False)
+    content_indexed = fields.Boolean(string='Search Indexed', default=False, readonly=True, copy=False)
+
+    def init(self):
+        # Full-text search column, filled by the indexing cron and not
+        # declared as a field so it is never read by the ORM.
+        if not sql.column_exists(self.env.cr, self._table, 'search_vector'):
+            sql.create_column(self.env.cr, self._table, 'search_vector', 'tsvector')
+        sql.create_index(self.env.cr, 'employee_document_search_vector_idx', self._table,
+                         ['search_vector'], method='gin')
+        sql.create_index(self.env.cr, 'employee_document_content_indexed_idx', self._table,
+                         ['id'], where='content_indexed IS NOT TRUE')
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        attachment_ids = {vals['attachment_id'] for vals in vals_list if vals.get('attachment_id')}
+        checksums = {
+            attachment.id: attachment.checksum
+            for attachment in self.env['ir.attachment'].sudo().browse(attachment_ids)
+        }
+        for vals in vals_list:
+            if vals.get('attachment_id') and 'checksum' not in vals:
+                vals['checksum'] = checksums.get(vals['attachment_id'])
+        documents = super().create(vals_list)
+        self.env.ref('employee_portal_hub.ir_cron_index_documents')._trigger()
+        return documents
+
+    def write(self, vals):
+        if 'attachment_id' in vals and 'checksum' not in vals:
+            vals['checksum'] = self.env['ir.attachment'].sudo().browse(vals['attachment_id']).checksum or False
+        if 'expiry_date' in vals:
+            vals.update(expiry_reminder_level=0, expiry_notice_pending=False, expiry_hr_notice_pending=False)
+        if {'document_name', 'description', 'attachment_id'} & vals.keys():
+            vals['content_indexed'] = False
+            self.env.ref('employee_portal_hub.ir_cron_index_documents')._trigger()
+        return super().write(vals)
+
+    def _notify_thread_by_email(self, message, recipients_data, msg_vals=False, **kwargs):
+        recipients_data = self.env['employee.portal.notification']._queue_digest_recipients(
+            message, recipients_data)
+        return super()._notify_thread_by_email(message, recipients_data, msg_vals=msg_vals, **kwargs)
+
+    @api.model
+    def _get_shared_attachment(self, name, raw, mimetype=None, company=None):
+        """Return the attachment holding ``raw``, creating it only if no
+        attachment of a document published in ``company`` (the current
+        company by default) has the same content hash.
+        """
+        company = company or self.env.company
+        Attachment = self.env['ir.attachment'].sudo()
+        checksum = Attachment._compute_checksum(raw)
+        attachment = Attachment.search([
+            ('checksum', '=', checksum),
+            ('res_model', '=', self._name),
+            ('res_id', '=', 0),
+            ('res_field', '=', False),
+            ('company_id', '=', company.id),
+        ], limit=1)
+        if not attachment:
+            attachment = Attachment.create({
+                'name': name,
+                'raw': raw,
+                'mimetype': mimetype,
+                'res_model': self._name,
+                'res_id': 0,
+                'company_id': company.id,
+            })
+        return attachment
+
+    @api.model
+    def _publish(self, employees, vals, raw=None, attachment=None):
+        """Give every employee of ``employees`` a document record for one file.
+
+        The file is stored once per company (``raw`` is deduplicated by
+        content hash) and the records are created in batches without tracking
+        or followers, so publishing to a whole company only writes small rows.
+        """
+        if raw is None and attachment is None:
+            raise UserError(_("A file is required to publish a document."))
+        Document = self.with_context(tracking_disable=True, mail_create_nolog=True, mail_create_nosubscribe=True)
+        documents = self.browse()
+        for company in employees.company_id:
+            company_attachment = attachment or self._get_shared_attachment(
+                vals.get('document_name') or _('Document'), raw, company=company)
+            base_vals = dict(vals, attachment_id=company_attachment.id, checksum=company_attachment.checksum)
+            company_employees = employees.filtered(lambda employee: employee.company_id == company)
+            for start in range(0, len(company_employees), DOCUMENT_PUBLISH_BATCH_SIZE):
+                batch = company_employees[start:start + DOCUMENT_PUBLISH_BATCH_SIZE]
+                documents |= Document.create([dict(base_vals, employee_id=employee.id) for employee in batch])
+        return documents
+
+    @api.model
+    def _get_attachment_search_text(self, attachment):
+        """Return the text extracted from ``attachment`` when it was indexed.
+
+        ``ir.attachment`` stores the extracted text in ``index_content`` (PDF
+        and DOCX files need ``attachment_indexation``); binaries without text
+        only store their mimetype family there.
+        """
+        content = attachment.index_content or ''
+        if not attachment.mimetype or content == attachment.mimetype.split('/')[0]:
+            return ''
+        return content[:DOCUMENT_SEARCH_MAX_CHARS]
+
+    @api.model
+    def _cron_index_documents(self, batch_size=DOCUMENT_INDEX_BATCH_SIZE):
+        """Build the search vector of the documents waiting to be indexed.
+
+        The text of a shared file is extracted once and written to all its
+        documents with one statement. Names weigh more than descriptions,
+        which weigh more than the file content.
+        """
+        self.flush_model(['document_name', 'description', 'attachment_id', 'content_indexed'])
+        self.env.cr.execute("""
+            SELECT DISTINCT attachment_id
+              FROM employee_document
+             WHERE content_indexed IS NOT TRUE
+             LIMIT %s
+        """, [batch_size])
+        attachment_ids = [row[0] for row in self.env.cr.fetchall()]
+        texts = {None: ''}
+        for attachment in self.env['ir.attachment'].sudo().browse([attachment_id for attachment_id in attachment_ids if attachment_id]):
+            texts[attachment.id] = self._get_attachment_search_text(attachment)
+
+        for attachment_id in attachment_ids:
+            self.env.cr.execute("""
+                UPDATE employee_document
+                   SET search_vector =
+                           setweight(to_tsvector(%(config)s::regconfig, coalesce(document_name, '')), 'A')
+                        || setweight(to_tsvector(%(config)s::regconfig, coalesce(description, '')), 'B')
+                        || setweight(to_tsvector(%(config)s::regconfig, %(text)s), 'C'),
+                       content_indexed = TRUE
+                 WHERE content_indexed IS NOT TRUE
+                   AND attachment_id IS NOT DISTINCT FROM %(attachment_id)s
+            """, {
+                'config': DOCUMENT_SEARCH_CONFIG,
+                'text': texts.get(attachment_id, ''),
+                'attachment_id': attachment_id,
+            })
+        self.invalidate_model(['content_indexed'])
+
+        remaining = self.with_context(active_test=False).search_count([('content_indexed', '=', False)])
+        self.env['ir.cron']._notify_progress(done=len(attachment_ids), remaining=remaining)
+
+    @api.model
+    def _search_portal_documents(self, employee, query, limit=None, offset=0):
+        """Full-text search among the active documents of ``employee``.
+
+        ``query`` accepts the web search syntax (quotes, ``or``, ``-word``).
+        Returns ``(total, documents)`` with the documents of the requested
+        page ordered by relevance, using the GIN index on the search vector.
+        """
+        self.flush_model(['employee_id', 'active'])
+        self.env.cr.execute("""
+            SELECT doc.id, count(*) OVER ()
+              FROM employee_document doc,
+                   websearch_to_tsquery(%(config)s::regconfig, %(query)s) query
+             WHERE doc.employee_id = %(employee_id)s
+               AND doc.active
+               AND doc.search_vector @@ query
+          ORDER BY ts_rank_cd(doc.search_vector, query) DESC, doc.id DESC
+             LIMIT %(limit)s
+            OFFSET %(offset)s
+        """, {
+            'config': DOCUMENT_SEARCH_CONFIG,
+            'query': query,
+            'employee_id': employee.id,
+            'limit': limit,
+            'offset': offset,
+        })
+        rows = self.env.cr.fetchall()
+        total = rows[0][1] if rows else 0
+        return total, self.browse([row[0] for row in rows])
+
+    @api.model
+    def _get_expiry_horizons(self):
+        """Return the configured expiry horizons in days, farthest first"""
+        param = self.env['ir.config_parameter'].sudo().get_param(
+            'employee_portal_hub.document_expiry_horizons', DEFAULT_DOCUMENT_EXPIRY_HORIZONS)
+        try:
+            horizons = {int(days) for days in param.split(',') if days.strip()}
+        except ValueError:
+            _logger.warning("Invalid document expiry horizons %r, using the defaults", param)
+            horizons = {int(days) for days in DEFAULT_DOCUMENT_EXPIRY_HORIZONS.split(',')}
+        return sorted(horizons, reverse=True)
+
+    @api.model
+    def _cron_scan_expiring_documents(self, batch_size=DOCUMENT_EXPIRY_BATCH_SIZE):
+        """Flag the documents reaching an expiry horizon, then send the digests.
+
+        Documents are scanned by id in fixed-size batches over the indexed
+        expiry date range, and each batch is committed with the reminder
+        level it reached. The notices are sent from the pending flags, so an
+        interrupted run resumes where it stopped without sending twice.
+        """
+        horizons = self._get_expiry_horizons()
+        if not horizons:
+            return
+        auto_commit = not getattr(threading.current_thread(), 'testing', False)
+        today = fields.Date.context_today(self)
+        Document = self.sudo().with_context(tracking_disable=True)
+        domain = [
+            ('expiry_date', '!=', False),
+            ('expiry_date', '<=', today + timedelta(days=horizons[0])),
+            ('expiry_reminder_level', '<', len(horizons)),
+        ]
+        last_id = 0
+        while True:
+            documents = Document.search(domain + [('id', '>', last_id)], order='id', limit=batch_size)
+            if not documents:
+                break
+            last_id = documents[-1].id
+            by_level = defaultdict(list)
+            for document in documents:
+                days_left = (document.expiry_date - today).days
+                level = sum(1 for horizon in horizons if days_left <= horizon)
+                if level > document.expiry_reminder_level:
+                    by_level[level].append(document.id)
+            for level, document_ids in by_level.items():
+                Document.browse(document_ids).write({
+                    'expiry_reminder_level': level,
+                    'expiry_notice_pending': True,
+                    'expiry_hr_notice_pending': True,
+                })
+            if auto_commit:
+                self.env.cr.commit()
+
+        self._send_expiry_hr_digests()
+        if auto_commit:
+            self.env.cr.commit()
+        self._send_expiry_employee_digests(batch_size=batch_size, auto_commit=auto_commit)
+
+    @api.model
+    def _get_expiry_digest_rows(self):
+        """Return the digest rows of these documents, sorted by expiry date.
+
+        The copies of a document published to several employees (same
+        company, name, file and expiry date) are listed once, with the number
+        of employees instead of their name.
+        """
+        copies = defaultdict(list)
+        for document in self:
+            key = (document.company_id.id, document.document_name,
+                   document.checksum or document.id, document.expiry_date)
+            copies[key].append(document)
+        rows = []
+        for (dummy, name, dummy, expiry_date), documents in copies.items():
+            rows.append({
+                'name': name,
+                'employee': documents[0].employee_id.name if len(documents) == 1
+                else _('%s employees', len(documents)),
+                'expiry_date': expiry_date,
+            })
+        return sorted(rows, key=lambda row: (row['expiry_date'], row['name']))
+
+    def _get_expiry_digest_mail_values(self, recipient, rows, subject, url):
+        body = self.env['ir.qweb']._render('employee_portal_hub.document_expiry_digest', {
+            'recipient': recipient,
+            'rows': rows,
+            'today': fields.Date.context_today(self),
+            'url': url,
+        })
+        return {
+            'subject': subject,
+            'body_html': body,
+            'email_from': self.env.company.email_formatted or self.env.user.email_formatted,
+            'recipient_ids': [(4, recipient.id)],
+            'auto_delete': True,
+        }
+
+    @api.model
+    def _send_expiry_hr_digests(self):
+        """Send one digest per HR officer with the expiring documents of their companies.
+
+        The rows are built once per company, each officer's digest only
+        concatenates the rows of their companies.
+        """
+        documents = self.sudo().search([('expiry_hr_notice_pending', '=', True)])
+        if not documents:
+            return
+        documents_by_company = defaultdict(lambda: self.browse())
+        for document in documents:
+            documents_by_company[document.company_id] |= document
+        rows_by_company = {
+            company: company_documents._get_expiry_digest_rows()
+            for company, company_documents in documents_by_company.items()
+        }
+        url = '%s/odoo/action-employee_portal_hub.employee_document_action' % self.get_base_url()
+        officers = self.env.ref('hr.group_hr_user').sudo().users.filtered(
+            lambda user: user.active and not user.share and user.partner_id.email)
+        mail_values = []
+        for officer in officers:
+            rows = [row for company in officer.company_ids for row in rows_by_company.get(company, [])]
+            if rows:
+                rows.sort(key=lambda row: (row['expiry_date'], row['name']))
+                mail_values.append(self._get_expiry_digest_mail_values(
+                    officer.partner_id, rows,
+                    _('%s employee documents are about to expire', len(rows)), url))
+        self.env['mail.mail'].sudo().create(mail_values)
+        documents.write({'expiry_hr_notice_pending': False})
+
+    @api.model
+    def _send_expiry_employee_digests(self, batch_size=DOCUMENT_EXPIRY_BATCH_SIZE, auto_commit=False):
+        """Send one digest per employee, employees being processed in committed batches"""
+        domain = [('expiry_notice_pending', '=', True)]
+        Document = self.sudo()
+        while True:
+            groups = Document._read_group(domain, ['employee_id'], ['id:array_agg'], limit=batch_size)
+            if not groups:
+                break
+            documents = Document.browse([document_id for dummy, ids in groups for document_id in ids])
+            url = '%s/my/documents' % self.get_base_url()
+            mail_values = []
+            for employee, document_ids in groups:
+                partner = employee.user_id.partner_id or employee.work_contact_id
+                if partner.email:
+                    mail_values.append(self._get_expiry_digest_mail_values(
+                        partner, Document.browse(document_ids)._get_expiry_digest_rows(),
+                        _('Some of your documents are about to expire'), url))
+            self.env['mail.mail'].sudo().create(mail_values)
+            documents.write({'expiry_notice_pending': False})
+            if auto_commit:
+                self.env.cr.commit()
+
+    def mark_as_read(self):
+        """Record the first reading of the documents"""
+        self.check_access('read')
+        self.filtered(lambda document: not document.read_date).sudo().write({'read_date': fields.Datetime.now()})
+        return True
+
+    @api.model
+    def _mark_all_read(self, employee):
+        """Mark every unread document of ``employee`` as read.
+
+        The receipts are written with a single ``UPDATE`` whatever the number
+        of documents. Returns the ids of the documents marked as read.
+        """
+        self.flush_model(['employee_id', 'read_date', 'active'])
+        self.env.cr.execute("""
+               UPDATE employee_document
+                  SET read_date = %(now)s, write_date = %(now)s, write_uid = %(uid)s
+                WHERE employee_id = %(employee_id)s
+                  AND read_date IS NULL
+                  AND active
+            RETURNING id
+        """, {'now': fields.Datetime.now(), 'uid': self.env.uid, 'employee_id': employee.id})
+        document_ids = [row[0] for row in self.env.cr.fetchall()]
+        self.invalidate_model(['read_date', 'write_date', 'write_uid'])
+        return document_ids
+
+    def action_acknowledge(self):
+        """Record the acknowledgement of mandatory documents by their employee.
+
+        Only the employee a document is addressed to can acknowledge it, not
+        an HR officer on their behalf.
+        """
+        self.check_access('read')
+        if any(document.employee_id.user_id != self.env.user for document in self):
+            raise AccessError(_("You can only acknowledge your own documents."))
+        now = fields.Datetime.now()
+        to_acknowledge = self.filtered(lambda document: document.is_mandatory_read and not document.acknowledged_date)
+        to_acknowledge.sudo().write({'acknowledged_date': now, 'acknowledged_by_id': self.env.uid})
+        to_acknowledge.filtered(lambda document: not document.read_date).sudo().write({'read_date': now})
+        return True
+
+    def download_document(self):
+        """Download the document's file.
+
+        Shared attachments are not linked to a record, so they are streamed
+        by the document route, which checks the access to the document.
+        """
+        self.ensure_one()
+        if not self.attachment_id:
+            raise ValidationError(_("No file is attached to this document."))
+        return {
+            'type': 'ir.actions.act_url',
+            'url': '/my/documents/%s/download' % self.id,
+            'target': 'self',
+        }
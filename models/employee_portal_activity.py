@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+
+import atexit
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from odoo import api, fields, models, tools
+from odoo.modules.registry import Registry
+
+_logger = logging.getLogger(__name__)
+
+ACTIVITY_FLUSH_SIZE = 200
+ACTIVITY_FLUSH_INTERVAL = 30
+DEFAULT_ACTIVITY_RETENTION_MONTHS = 13
+ACTIVITY_PRUNE_BATCH = 50000
+
+ACTIVITY_COLUMNS = ('user_id', 'employee_id', 'department_id', 'activity_type', 'path', 'activity_date')
+
+# Activity rows waiting to be inserted, per database
+_buffers = defaultdict(list)
+_last_flush = defaultdict(float)
+# Databases with a flush timer pending
+_timers = {}
+_buffer_lock = threading.Lock()
+
+
+def _flush_buffer(dbname, cr=None):
+    """Insert the buffered rows of ``dbname`` with one statement.
+
+    A dedicated cursor is used by default so the rows are kept even when
+    the request that triggered the flush is rolled back.
+    """
+    with _buffer_lock:
+        rows = _buffers.pop(dbname, [])
+        _last_flush[dbname] = time.monotonic()
+    if not rows:
+        return
+    query = 'INSERT INTO employee_portal_activity (%s) VALUES %s' % (
+        ', '.join(ACTIVITY_COLUMNS), ', '.join(['%s'] * len(rows)))
+    try:
+        if cr is not None:
+            cr.execute(query, rows)
+        else:
+            with Registry(dbname).cursor() as new_cr:
+                new_cr.execute(query, rows)
+    except Exception:
+        _logger.warning("Could not flush %s portal activity rows", len(rows), exc_info=True)
+
+
+def _flush_on_timer(dbname):
+    with _buffer_lock:
+        _timers.pop(dbname, None)
+    _flush_buffer(dbname)
+
+
+def _start_flush_timer(dbname):
+    """Flush the rows of ``dbname`` after the flush interval, even when no
+    other request comes to this worker in the meantime. Called with the
+    buffer lock held."""
+    if dbname in _timers or getattr(threading.current_thread(), 'testing', False):
+        return
+    timer = _timers[dbname] = threading.Timer(ACTIVITY_FLUSH_INTERVAL, _flush_on_timer, [dbname])
+    timer.daemon = True
+    timer.start()
+
+
+@atexit.register
+def _flush_all_buffers():
+    """Keep the buffered rows of a worker that is being recycled"""
+    for dbname in list(_buffers):
+        _flush_buffer(dbname)
+
+
+class EmployeePortalActivity(models.Model):
+    """Append-only log of portal page hits (logins are kept in
+    ``employee.portal.login``).
+
+    Rows are collected in a per-worker buffer and inserted in batches with a
+    single statement on a separate cursor, so a portal request only pays for
+    appending a tuple to a list. The buffer is flushed when it is full, by a
+    timer once the flush interval has passed and when the worker exits.
+    """
+    _name = 'employee.portal.activity'
+    _description = 'Employee Portal Activity'
+    _order = 'activity_date desc, id desc'
+    _log_access = False
+
+    user_id = fields.Many2one(
+        'res.users', string='User', required=True, ondelete='cascade', aggregator='count_distinct')
+    employee_id = fields.Many2one('hr.employee', string='Employee', index=True, ondelete='cascade')
+    department_id = fields.Many2one('hr.department', string='Department', ondelete='set null')
+    activity_type = fields.Selection([
+        ('page', 'Page View'),
+    ], string='Type', required=True)
+    path = fields.Char(string='Path')
+    activity_date = fields.Datetime(string='Date', required=True, index=True)
+
+    @api.model
+    @tools.ormcache('user_id', 'self.env["employee.portal.cache"]._get_versions("hr.employee")')
+    def _get_activity_identity(self, user_id):
+        """Return the cached ``(employee_id, department_id)`` of a portal user"""
+        employee = self.env['hr.employee'].sudo().search([('user_id', '=', user_id)], limit=1)
+        return employee.id or None, employee.department_id.id or None
+
+    @api.model
+    def _log_activity(self, user, activity_type, path=None):
+        """Buffer one activity row, flushing the buffer when it is full or old"""
+        employee_id, department_id = self._get_activity_identity(user.id)
+        if not employee_id:
+            return
+        dbname = self.env.cr.dbname
+        row = (user.id, employee_id, department_id, activity_type, path and path[:255], fields.Datetime.now())
+        with _buffer_lock:
+            _buffers[dbname].append(row)
+            _start_flush_timer(dbname)
+            flush = (
+                len(_buffers[dbname]) >= ACTIVITY_FLUSH_SIZE
+                or time.monotonic() - _last_flush[dbname] > ACTIVITY_FLUSH_INTERVAL
+            )
+        if flush:
+            self._flush_activity_buffer()
+
+    @api.model
+    def _flush_activity_buffer(self, cr=None):
+        """Insert the buffered rows of this database, on ``cr`` if given"""
+        _flush_buffer(self.env.cr.dbname, cr)
+
+    @api.autovacuum
+    def _gc_activity(self):
+        """Drop the months of activity older than the retention period.
+
+        Rows are deleted in committed batches until none is left, so a large
+        backlog never holds one long transaction nor survives the run.
+        """
+        months = int(self.env['ir.config_parameter'].sudo().get_param(
+            'employee_portal_hub.activity_retention_months', DEFAULT_ACTIVITY_RETENTION_MONTHS))
+        auto_commit = not getattr(threading.current_thread(), 'testing', False)
+        while True:
+            self.env.cr.execute("""
+                DELETE FROM employee_portal_activity
+                 WHERE id IN (
+                    SELECT id FROM employee_portal_activity
+                     WHERE activity_date < date_trunc('month', now() at time zone 'UTC') - make_interval(months => %s)
+                     LIMIT %s
+                 )
+            """, [months, ACTIVITY_PRUNE_BATCH])
+            if self.env.cr.rowcount < ACTIVITY_PRUNE_BATCH:
+                break
+            if auto_commit:
+                self.env.cr.commit()
+
+    @api.model
+    def _get_active_user_stats(self, date_from, date_to, granularity='day'):
+        """Return the distinct active users per period and department.
+
+        ``granularity`` is ``day`` or ``week``. Returns a list of
+        ``{period, department_id, active_users}`` computed by one grouped query.
+        """
+        groups = self.sudo()._read_group(
+            [('activity_date', '>=', date_from), ('activity_date', '<', date_to)],
+            groupby=['activity_date:%s' % granularity, 'department_id'],
+            aggregates=['user_id:count_distinct'],
+        )
+        return [{
+            'period': period,
+            'department_id': department.id,
+            'active_users': active_users,
+        } for period, department, active_users in groups]
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+
+from odoo import api, fields, models
+
+CACHE_VERSIONS_KEY = 'employee_portal_cache_versions'
+
+
+class EmployeePortalCache(models.Model):
+    """Version stamps of the data behind the portal ormcaches.
+
+    The portal helpers cached with ``tools.ormcache`` put the versions of the
+    models they read in their cache key. Changing one of those models bumps
+    its version here instead of clearing the registry cache, which would
+    flush the ORM cache of every model in every worker: other workers see the
+    new version with the transaction that commits it, and the outdated
+    entries are never looked up again and age out of the LRU.
+    """
+    _name = 'employee.portal.cache'
+    _description = 'Employee Portal Cache Version'
+    _log_access = False
+
+    name = fields.Char(string='Model', required=True)
+    version = fields.Integer(string='Version', required=True)
+
+    _sql_constraints = [
+        ('name_uniq', 'unique(name)', 'A model can only have one portal cache version.'),
+    ]
+
+    def init(self):
+        self.env.cr.execute("CREATE SEQUENCE IF NOT EXISTS employee_portal_cache_version_seq")
+
+    @api.model
+    def _get_versions(self, *names):
+        """Return the current versions of ``names``, read once per transaction"""
+        cr = self.env.cr
+        versions = cr.cache.get(CACHE_VERSIONS_KEY)
+        if versions is None:
+            versions = cr.cache[CACHE_VERSIONS_KEY] = {}
+            cr.postcommit.add(lambda: cr.cache.pop(CACHE_VERSIONS_KEY, None))
+            cr.postrollback.add(lambda: cr.cache.pop(CACHE_VERSIONS_KEY, None))
+        missing = [name for name in names if name not in versions]
+        if missing:
+            cr.execute("SELECT name, version FROM employee_portal_cache WHERE name IN %s", [tuple(missing)])
+            versions.update(dict.fromkeys(missing, 0))
+            versions.update(cr.fetchall())
+        return tuple(versions[name] for name in names)
+
+    @api.model
+    def _bump(self, *names):
+        """Give ``names`` a new version, never reused even if the transaction rolls back"""
+        self.env.cr.execute("""
+            INSERT INTO employee_portal_cache (name, version)
+                 SELECT name, nextval('employee_portal_cache_version_seq')
+                   FROM unnest(%s::varchar[]) AS name
+            ON CONFLICT (name) DO UPDATE SET version = EXCLUDED.version
+        """, [list(names)])
+        versions = self.env.cr.cache.get(CACHE_VERSIONS_KEY)
+        if versions:
+            for name in names:
+                versions.pop(name, None)
+
+
+class EmployeePortalCacheMixin(models.AbstractModel):
+    """Bump the portal cache version of a model when its records change.
+
+    ``_portal_cache_name`` is the version to bump (the model name by default),
+    ``_portal_cache_fields`` the fields whose writes matter (all of them when
+    empty) and :meth:`_get_portal_cached_records` the records the portal
+    caches actually depend on.
+    """
+    _name = 'employee.portal.cache.mixin'
+    _description = 'Employee Portal Cache Mixin'
+
+    _portal_cache_name = None
+    _portal_cache_fields = ()
+
+    def _get_portal_cached_records(self):
+        return self
+
+    def _bump_portal_cache(self):
+        self.env['employee.portal.cache']._bump(self._portal_cache_name or self._name)
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        if records._get_portal_cached_records():
+            records._bump_portal_cache()
+        return records
+
+    def write(self, vals):
+        if self._portal_cache_fields and not set(self._portal_cache_fields).intersection(vals):
+            return super().write(vals)
+        cached = self._get_portal_cached_records()
+        res = super().write(vals)
+        if cached or self._get_portal_cached_records():
+            self._bump_portal_cache()
+        return res
+
+    def unlink(self):
+        cached = self._get_portal_cached_records()
+        res = super().unlink()
+        if cached:
+            self._bump_portal_cache()
+        return res
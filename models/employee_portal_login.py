@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+
+from odoo import api, fields, models
+
+LOGIN_HISTORY_RETENTION_DAYS = 90
+
+
+class EmployeePortalLogin(models.Model):
+    """Append-only log of portal logins.
+
+    Logins only insert a row here, so they never lock or rewrite the
+    ``hr.employee`` row; the employee's last login is derived from it.
+    """
+    _name = 'employee.portal.login'
+    _description = 'Employee Portal Login'
+    _order = 'id desc'
+    _log_access = False
+
+    user_id = fields.Many2one('res.users', string='User', required=True, index=True, ondelete='cascade')
+    login_date = fields.Datetime(string='Login Date', required=True, default=fields.Datetime.now)
+
+    @api.model
+    def _log_login(self, user):
+        self.sudo().create({'user_id': user.id})
+
+    @api.model
+    def _get_last_logins(self, user_ids):
+        """Return ``{user_id: last login}`` for ``user_ids`` with one grouped query"""
+        groups = self.sudo()._read_group(
+            [('user_id', 'in', list(user_ids))],
+            groupby=['user_id'],
+            aggregates=['login_date:max'],
+        )
+        return {user.id: last_login for user, last_login in groups}
+
+    @api.autovacuum
+    def _gc_login_history(self):
+        """Drop old logins, keeping at least the most recent one of each user"""
+        self.env.cr.execute("""
+            DELETE FROM employee_portal_login login
+             WHERE login.login_date < (now() at time zone 'UTC') - make_interval(days => %s)
+               AND EXISTS (
+                    SELECT 1 FROM employee_portal_login newer
+                     WHERE newer.user_id = login.user_id
+                       AND newer.id > login.id
+               )
+        """, [LOGIN_HISTORY_RETENTION_DAYS])
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+
+import logging
+from datetime import timedelta
+
+from odoo import api, fields, models
+
+_logger = logging.getLogger(__name__)
+
+DEFAULT_MAIL_RATE_PER_MINUTE = 60
+DEFAULT_INVITATION_DEDUP_HOURS = 24
+MAIL_QUEUE_RETENTION_DAYS = 30
+MAIL_TEMPLATES = {
+    'welcome': 'employee_portal_hub.employee_portal_welcome_template',
+    'invitation': 'employee_portal_hub.employee_portal_invitation_template',
+}
+
+
+class EmployeePortalMail(models.Model):
+    _name = 'employee.portal.mail'
+    _description = 'Employee Portal Mail Queue'
+    _order = 'id'
+
+    employee_id = fields.Many2one(
+        'hr.employee',
+        string='Employee',
+        required=True,
+        index=True,
+        ondelete='cascade',
+    )
+    mail_type = fields.Selection([
+        ('welcome', 'Welcome'),
+        ('invitation', 'Invitation'),
+    ], string='Type', required=True, default='welcome')
+    state = fields.Selection([
+        ('queued', 'Queued'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ], string='Status', required=True, default='queued', index=True)
+    mail_id = fields.Many2one('mail.mail', string='Email', ondelete='set null')
+    sent_date = fields.Datetime(string='Sent On', readonly=True, index=True)
+
+    @api.model
+    def _get_portal_mail_settings(self):
+        """Return ``(rate_per_minute, dedup_hours)`` from the system parameters"""
+        ICP = self.env['ir.config_parameter'].sudo()
+        rate = int(ICP.get_param('employee_portal_hub.mail_rate_per_minute', DEFAULT_MAIL_RATE_PER_MINUTE))
+        dedup_hours = int(ICP.get_param('employee_portal_hub.invitation_dedup_hours', DEFAULT_INVITATION_DEDUP_HOURS))
+        return rate, dedup_hours
+
+    @api.model
+    def _enqueue(self, employees, mail_type):
+        """Queue one portal email per employee, skipping recent recipients.
+
+        Employees with a queued email, or one sent during the deduplication
+        window, are skipped with a single lookup. Returns the employees that
+        were queued.
+        """
+        dummy, dedup_hours = self._get_portal_mail_settings()
+        recent = self.sudo().search_read([
+            ('employee_id', 'in', employees.ids),
+            '|',
+            ('state', '=', 'queued'),
+            ('sent_date', '>=', fields.Datetime.now() - timedelta(hours=dedup_hours)),
+        ], ['employee_id'])
+        skipped_ids = {row['employee_id'][0] for row in recent}
+        to_queue = employees.filtered(lambda employee: employee.id not in skipped_ids)
+        if to_queue:
+            self.sudo().create([{'employee_id': employee.id, 'mail_type': mail_type} for employee in to_queue])
+            self.env.ref('employee_portal_hub.ir_cron_send_portal_mails')._trigger()
+        return to_queue
+
+    @api.model
+    def _cron_send_queued_mails(self):
+        """Send queued portal emails within the per-minute rate limit.
+
+        The emails of one run are rendered together into ``mail.mail``, one
+        batch per mail type with its own template, and sent by this cron, so
+        the HR actions only insert queue rows. Rows whose template is missing
+        are marked as failed.
+        """
+        rate, dummy = self._get_portal_mail_settings()
+        now = fields.Datetime.now()
+        sent_last_minute = self.search_count([('sent_date', '>', now - timedelta(minutes=1))])
+        capacity = max(rate - sent_last_minute, 0)
+        queued = self.search([('state', '=', 'queued')], limit=capacity) if capacity else self.browse()
+
+        mails = self.env['mail.mail']
+        for mail_type in set(queued.mapped('mail_type')):
+            entries = queued.filtered(lambda entry: entry.mail_type == mail_type)
+            template = self.env.ref(MAIL_TEMPLATES[mail_type], raise_if_not_found=False)
+            if not template:
+                # Failed rows do not block a new request once the template is restored
+                _logger.warning("Portal %s template not found, %s emails not sent", mail_type, len(entries))
+                entries.write({'state': 'failed'})
+                continue
+            type_mails = template.send_mail_batch(entries.employee_id.ids, force_send=False)
+            mail_by_employee = {mail.res_id: mail.id for mail in type_mails}
+            self._set_queue_mails([(entry.id, mail_by_employee.get(entry.employee_id.id)) for entry in entries])
+            entries.write({'state': 'sent', 'sent_date': now})
+            mails |= type_mails
+        if mails:
+            mails.send(auto_commit=False)
+
+        remaining = self.search_count([('state', '=', 'queued')])
+        if remaining:
+            # Resume once the current minute's budget is spent
+            self.env.ref('employee_portal_hub.ir_cron_send_portal_mails')._trigger(now + timedelta(minutes=1))
+        self.search([
+            ('state', '!=', 'queued'),
+            ('create_date', '<', now - timedelta(days=MAIL_QUEUE_RETENTION_DAYS)),
+        ]).unlink()
+
+    @api.model
+    def _set_queue_mails(self, pairs):
+        """Link queue rows to their emails, ``pairs`` being ``(row id, mail id)``, with one statement"""
+        self.flush_model(['mail_id'])
+        self.env.cr.execute("""
+            UPDATE employee_portal_mail queue
+               SET mail_id = data.mail_id
+              FROM (VALUES %s) AS data(id, mail_id)
+             WHERE queue.id = data.id
+        """ % ', '.join(['(%s, %s::integer)'] * len(pairs)), [value for pair in pairs for value in pair])
+        self.browse([pair[0] for pair in pairs]).invalidate_recordset(['mail_id'])
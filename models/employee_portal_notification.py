@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+
+import threading
+
+from odoo import api, fields, models, _
+
+NOTIFICATION_DIGEST_BATCH_SIZE = 500
+
+
+class EmployeePortalNotification(models.Model):
+    """Portal notification held back for an employee's digest.
+
+    A row only references the already posted ``mail.message``; the digest
+    cron renders all the pending messages of an employee into one email.
+    """
+    _name = 'employee.portal.notification'
+    _description = 'Employee Portal Notification Queue'
+    _order = 'id'
+    _log_access = False
+
+    employee_id = fields.Many2one('hr.employee', string='Employee', required=True, index=True, ondelete='cascade')
+    message_id = fields.Many2one('mail.message', string='Message', required=True, ondelete='cascade')
+
+    @api.model
+    def _queue_digest_recipients(self, message, recipients_data):
+        """Hold back the email notifications of portal employees in digest mode.
+
+        The preference only applies to portal users: internal users (managers,
+        HR officers) are always notified right away. Portal employees who
+        disabled portal notifications get no email at all, the ones with an
+        hourly or daily digest get a queue row instead. Returns the recipients
+        still to be notified by email right away.
+        """
+        email_partner_ids = [
+            recipient['id'] for recipient in recipients_data
+            if recipient['notif'] == 'email' and recipient.get('ushare')
+        ]
+        if not email_partner_ids:
+            return recipients_data
+        employees = self.env['hr.employee'].sudo().search([
+            ('user_id.partner_id', 'in', email_partner_ids),
+            ('user_id.share', '=', True),
+            ('portal_access_enabled', '=', True),
+            '|',
+            ('portal_notification_email', '=', False),
+            ('portal_notification_frequency', '!=', 'instant'),
+        ])
+        if not employees:
+            return recipients_data
+        employee_by_partner = {}
+        for employee in employees:
+            employee_by_partner.setdefault(employee.user_id.partner_id.id, employee)
+        self.sudo().create([
+            {'employee_id': employee.id, 'message_id': message.id}
+            for employee in employee_by_partner.values()
+            if employee.portal_notification_email
+        ])
+        return [
+            recipient for recipient in recipients_data
+            if recipient['notif'] != 'email' or recipient['id'] not in employee_by_partner
+        ]
+
+    @api.model
+    def _cron_send_digests(self, frequency='daily', batch_size=NOTIFICATION_DIGEST_BATCH_SIZE):
+        """Render the queued notifications into one email per employee.
+
+        The hourly run also flushes employees who switched back to instant
+        notifications. Employees are processed in committed batches and each
+        batch creates its emails with a single ``create``.
+        """
+        auto_commit = not getattr(threading.current_thread(), 'testing', False)
+        if frequency == 'daily':
+            domain = [('employee_id.portal_notification_frequency', '=', 'daily')]
+        else:
+            domain = [('employee_id.portal_notification_frequency', '!=', 'daily')]
+        while True:
+            groups = self._read_group(domain, ['employee_id'], ['id:array_agg'], limit=batch_size)
+            if not groups:
+                break
+            entries = self.browse([entry_id for dummy, ids in groups for entry_id in ids])
+            mail_values = []
+            for employee, entry_ids in groups:
+                partner = employee.user_id.partner_id
+                if not partner.email:
+                    continue
+                messages = self.browse(entry_ids).message_id.sorted(lambda message: (message.date, message.id))
+                mail_values.append({
+                    'subject': _('Your portal notifications (%s)', len(messages)),
+                    'body_html': self.env['ir.qweb']._render('employee_portal_hub.portal_notification_digest', {
+                        'employee': employee,
+                        'messages': messages,
+                        'base_url': employee.get_base_url(),
+                    }),
+                    'email_from': employee.company_id.email_formatted or self.env.user.email_formatted,
+                    'recipient_ids': [(4, partner.id)],
+                    'auto_delete': True,
+                })
+            self.env['mail.mail'].sudo().create(mail_values)
+            entries.unlink()
+            if auto_commit:
+                self.env.cr.commit()
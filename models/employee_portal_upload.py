@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+
+import hashlib
+import logging
+import os
+import time
+import uuid
+from datetime import timedelta
+
+from odoo import api, fields, models, _
+from odoo.exceptions import UserError
+
+from .ir_attachment import UPLOAD_CHUNK_SIZE
+
+_logger = logging.getLogger(__name__)
+
+DEFAULT_UPLOAD_RETENTION_HOURS = 24
+
+
+def _remove_part_file(path):
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+class EmployeePortalUpload(models.Model):
+    _name = 'employee.portal.upload'
+    _description = 'Employee Portal Resumable Upload'
+    _order = 'id desc'
+
+    name = fields.Char(string='File Name', required=True)
+    token = fields.Char(
+        string='Token',
+        required=True,
+        index=True,
+        copy=False,
+        default=lambda self: uuid.uuid4().hex,
+    )
+    user_id = fields.Many2one(
+        'res.users',
+        string='User',
+        required=True,
+        ondelete='cascade',
+        default=lambda self: self.env.user,
+    )
+    file_size = fields.Integer(string='File Size', required=True)
+    received_size = fields.Integer(string='Received Size', default=0)
+    state = fields.Selection([
+        ('uploading', 'Uploading'),
+        ('done', 'Done'),
+    ], string='Status', default='uploading', required=True)
+    attachment_id = fields.Many2one('ir.attachment', string='Attachment', ondelete='set null')
+
+    _sql_constraints = [
+        ('token_unique', 'unique(token)', 'The upload token must be unique.'),
+    ]
+
+    def _get_part_path(self):
+        """Location of the partial content in the filestore upload area"""
+        self.ensure_one()
+        return os.path.join(self.env['ir.attachment']._get_portal_upload_dir(), '%s.part' % self.token)
+
+    @api.model
+    def _start_upload(self, filename, file_size):
+        """Register a new resumable upload after checking the size caps.
+
+        Besides the per file cap, the uploads a user has in progress may not
+        exceed the per request cap together. The partial file is only created
+        by the first chunk, so a rolled back registration leaves nothing
+        behind.
+        """
+        max_file_size, max_request_size = self.env['ir.attachment']._get_portal_upload_limits()
+        if file_size <= 0:
+            raise UserError(_("The file %s is empty.", filename))
+        if file_size > max_file_size:
+            raise UserError(_("The file %(name)s exceeds the maximum upload size of %(size)s MB.",
+                              name=filename, size=round(max_file_size / (1024 * 1024), 1)))
+        [(in_progress,)] = self._read_group(
+            [('user_id', '=', self.env.uid), ('state', '=', 'uploading')],
+            aggregates=['file_size:sum'],
+        )
+        if (in_progress or 0) + file_size > max_request_size:
+            raise UserError(_("Your uploads in progress exceed the maximum total size of %s MB.",
+                              round(max_request_size / (1024 * 1024), 1)))
+        return self.create({'name': filename, 'file_size': file_size})
+
+    def _append_chunk(self, offset, stream):
+        """Append the content of ``stream`` at ``offset``.
+
+        The offset must match the last acknowledged one; anything written past
+        it by an interrupted request is discarded first, so a client can always
+        resume from the offset returned by the server.
+        """
+        self.ensure_one()
+        # Serialize concurrent appends of the same upload
+        self.env.cr.execute("SELECT id FROM employee_portal_upload WHERE id = %s FOR UPDATE", [self.id])
+        self.invalidate_recordset(['received_size', 'state'])
+        if self.state != 'uploading':
+            raise UserError(_("This upload is already finalized."))
+        if offset != self.received_size:
+            raise UserError(_("Unexpected offset %(offset)s, expected %(expected)s.",
+                              offset=offset, expected=self.received_size))
+
+        received = self.received_size
+        with os.fdopen(os.open(self._get_part_path(), os.O_RDWR | os.O_CREAT, 0o600), 'r+b') as part_file:
+            part_file.seek(received)
+            part_file.truncate()
+            while True:
+                chunk = stream.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                received += len(chunk)
+                if received > self.file_size:
+                    raise UserError(_("The uploaded content exceeds the announced file size."))
+                part_file.write(chunk)
+        self.received_size = received
+        return received
+
+    def _prepare_attachment_values(self):
+        """Move the completed upload into the filestore.
+
+        Returns the ``ir.attachment`` values referencing the stored file; the
+        caller creates the attachment(s) and marks the upload as done.
+        """
+        self.ensure_one()
+        if self.state == 'done':
+            raise UserError(_("The upload of %s is already finalized.", self.name))
+        if self.received_size != self.file_size:
+            raise UserError(_("The upload of %s is not complete yet.", self.name))
+
+        Attachment = self.env['ir.attachment']
+        part_path = self._get_part_path()
+        sha = hashlib.sha1()
+        head = b''
+        with open(part_path, 'rb') as part_file:
+            while True:
+                chunk = part_file.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                if not head:
+                    head = chunk
+                sha.update(chunk)
+        values = Attachment._portal_adopt_upload(
+            part_path, self.name, sha.hexdigest(), self.file_size, Attachment._sniff_portal_mimetype(head, self.name),
+            keep_source=True)
+        # The partial file stays in place until the attachment is committed,
+        # so a rolled back finalization can be retried
+        self.env.cr.postcommit.add(lambda: _remove_part_file(part_path))
+        return values
+
+    def _finalize(self, res_model, res_id):
+        """Move the completed upload into the filestore and attach it to a record"""
+        self.ensure_one()
+        if self.state == 'done':
+            return self.attachment_id
+        attachment = self.env['ir.attachment'].create(
+            dict(self._prepare_attachment_values(), res_model=res_model, res_id=res_id))
+        self.write({'state': 'done', 'attachment_id': attachment.id})
+        return attachment
+
+    @api.model
+    def _cron_cleanup_abandoned_uploads(self):
+        """Remove uploads not touched within the retention period and their partial files"""
+        retention = int(self.env['ir.config_parameter'].sudo().get_param(
+            'employee_portal_hub.upload_retention_hours', DEFAULT_UPLOAD_RETENTION_HOURS))
+        limit_date = fields.Datetime.now() - timedelta(hours=retention)
+        uploads = self.search([('write_date', '<', limit_date)])
+        for upload in uploads.filtered(lambda u: u.state == 'uploading'):
+            try:
+                os.unlink(upload._get_part_path())
+            except FileNotFoundError:
+                pass
+        uploads.unlink()
+
+        # Leftovers of interrupted streamed uploads and of rolled back upload records
+        upload_dir = self.env['ir.attachment']._get_portal_upload_dir()
+        limit_time = time.time() - retention * 3600
+        stale_entries = [
+            entry for entry in os.scandir(upload_dir)
+            if entry.name.startswith('stream-') or entry.name.endswith('.part')
+            if entry.stat().st_mtime < limit_time
+        ]
+        live_tokens = set(self.search([
+            ('token', 'in', [entry.name[:-len('.part')] for entry in stale_entries if entry.name.endswith('.part')]),
+        ]).mapped('token'))
+        for entry in stale_entries:
+            if entry.name.endswith('.part') and entry.name[:-len('.part')] in live_tokens:
+                continue
+            try:
+                os.unlink(entry.path)
+            except OSError as e:
+                _logger.warning("Could not remove stale upload %s: %s", entry.path, e)
+        _logger.info("Cleaned up %s abandoned portal uploads", len(uploads))
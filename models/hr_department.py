@@ -0,0 +1,9 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models
+
+
+class HrDepartment(models.Model):
+    _inherit = ['hr.department', 'employee.portal.cache.mixin']
+    # Announcements addressed to a department reach its sub-departments
+    _portal_cache_fields = ('parent_id', 'active')
@@ -1,11 +1,20 @@
 # -*- coding: utf-8 -*-
 
-from odoo import api, fields, models, _
+import logging
+
+from odoo import api, fields, models, tools, _
 from odoo.exceptions import UserError
+from odoo.tools import str2bool
+
+_logger = logging.getLogger(__name__)
+
+PORTAL_ONBOARDING_BATCH_SIZE = 500
 
 
 class HrEmployee(models.Model):
-    _inherit = 'hr.employee'
+    _inherit = ['hr.employee', 'employee.portal.cache.mixin']
+
+    _portal_cache_fields = ('parent_id', 'active', 'user_id', 'department_id')
 
     # Portal Access Fields
     portal_access_enabled = fields.Boolean(
@@ -20,91 +29,240 @@ class HrEmployee(models.Model):
         help="Receive email notifications for portal activities"
     )
 
+    portal_notification_frequency = fields.Selection([
+        ('instant', 'Immediately'),
+        ('hourly', 'Hourly Digest'),
+        ('daily', 'Daily Digest'),
+    ], string='Notification Frequency', default='instant', required=True,
+        help="Send each portal notification by email, or group them into one digest email per hour or per day"
+    )
+
+    portal_onboarding_queued = fields.Boolean(
+        string='Portal Onboarding Queued',
+        default=False,
+        copy=False,
+        index=True,
+        help="Portal access will be enabled by the onboarding cron"
+    )
+
+    portal_access_end_date = fields.Date(
+        string='Portal Access End Date',
+        index=True,
+        copy=False,
+        help="Portal access is revoked automatically from this date (e.g. for a scheduled termination)"
+    )
+
+    employee_document_ids = fields.One2many('employee.document', 'employee_id', string='Documents')
+
     last_portal_login = fields.Datetime(
         string='Last Portal Login',
-        readonly=True,
+        compute='_compute_last_portal_login',
         help="Last time the employee logged into the portal"
     )
 
+    def _get_portal_cached_records(self):
+        # Only reports and users are part of the cached hierarchy and identities
+        return self.filtered(lambda employee: employee.parent_id or employee.user_id)
+
+    @api.model
+    @tools.ormcache('manager_id', 'include_indirect', 'self.env["employee.portal.cache"]._get_versions("hr.employee")')
+    def _get_portal_team_ids(self, manager_id, include_indirect=False):
+        """Return the ids of the employees reporting to ``manager_id``.
+
+        Direct reports are resolved through ``parent_id``; with
+        ``include_indirect`` the whole subtree is resolved with a single
+        ``child_of`` search. The result is cached until the hierarchy changes.
+        """
+        employees = self.sudo().with_context(active_test=True)
+        if include_indirect:
+            domain = [('id', 'child_of', manager_id), ('id', '!=', manager_id)]
+        else:
+            domain = [('parent_id', '=', manager_id)]
+        return tuple(employees.search(domain).ids)
+
+    @api.depends('user_id')
+    def _compute_last_portal_login(self):
+        last_logins = self.env['employee.portal.login']._get_last_logins(self.user_id.ids)
+        for employee in self:
+            employee.last_portal_login = last_logins.get(employee.user_id.id, False)
+
     @api.model
     def update_last_login(self):
-        """Update last portal login timestamp"""
+        """Record a portal login of the current user in the append-only login log"""
         if self.env.user.employee_id:
-            self.env.user.employee_id.write({
-                'last_portal_login': fields.Datetime.now()
-            })
+            self.env['employee.portal.login']._log_login(self.env.user)
             return True
         return False
 
     def action_enable_portal_access(self):
-        """Enable portal access for employee"""
-        for employee in self:
-            if not employee.work_email:
-                raise UserError(_("Employee must have a work email to enable portal access."))
-
-            if not employee.user_id:
-                # Create a new portal user for the employee
-                user_vals = {
-                    'name': employee.name,
-                    'login': employee.work_email,
-                    'email': employee.work_email,
-                    'employee_ids': [(4, employee.id)],
-                    'groups_id': [(6, 0, [
-                        self.env.ref('base.group_portal').id,
-                        self.env.ref('employee_portal_hub.group_employee_portal_user').id
-                    ])]
+        """Enable portal access for employee(s).
+
+        Small selections are onboarded immediately; larger ones are queued and
+        processed in batches by the onboarding cron, which reports progress.
+        """
+        if len(self) == 1 and not self.work_email:
+            raise UserError(_("Employee must have a work email to enable portal access."))
+
+        if len(self) > PORTAL_ONBOARDING_BATCH_SIZE:
+            self.write({'portal_onboarding_queued': True})
+            self.env.ref('employee_portal_hub.ir_cron_portal_onboarding')._trigger()
+            return {
+                'type': 'ir.actions.client',
+                'tag': 'display_notification',
+                'params': {
+                    'title': _('Portal Onboarding Queued'),
+                    'message': _('%s employees will be onboarded in the background.', len(self)),
+                    'type': 'info',
+                }
+            }
+
+        errors = self._portal_onboard()
+        if len(self) == 1 and errors:
+            raise UserError(errors[self.id])
+        if len(self) > 1:
+            return {
+                'type': 'ir.actions.client',
+                'tag': 'display_notification',
+                'params': {
+                    'title': _('Portal Access Enabled'),
+                    'message': _('%(done)s employees onboarded, %(skipped)s skipped.',
+                                 done=len(self) - len(errors), skipped=len(errors)),
+                    'type': 'warning' if errors else 'success',
                 }
-                user = self.env['res.users'].create(user_vals)
-                employee.user_id = user
+            }
+
+    def _check_portal_onboarding_emails(self):
+        """Validate the work emails of the selection in one pass.
+
+        Emails are normalized in memory, then checked against existing logins
+        with a single query. Returns ``(emails_by_employee, errors_by_employee)``.
+        """
+        emails = {}
+        errors = {}
+        for employee in self:
+            email = tools.email_normalize(employee.work_email or '')
+            if not email:
+                errors[employee.id] = _('%s has no valid work email.', employee.name)
+            elif not employee.user_id and email in emails.values():
+                errors[employee.id] = _('%(name)s shares the work email %(email)s with another employee.',
+                                        name=employee.name, email=email)
             else:
-                # Add portal groups to existing user
-                portal_group = self.env.ref('base.group_portal')
-                employee_portal_group = self.env.ref('employee_portal_hub.group_employee_portal_user')
-
-                groups_to_add = []
-                if portal_group not in employee.user_id.groups_id:
-                    groups_to_add.append(portal_group.id)
-                if employee_portal_group not in employee.user_id.groups_id:
-                    groups_to_add.append(employee_portal_group.id)
-
-                if groups_to_add:
-                    employee.user_id.write({
-                        'groups_id': [(4, group_id) for group_id in groups_to_add]
-                    })
-
-            employee.write({
-                'portal_access_enabled': True
-            })
-
-            # Send welcome email
-            template = self.env.ref('employee_portal_hub.employee_portal_welcome_template', raise_if_not_found=False)
-            if template:
-                template.send_mail(employee.id, force_send=True)
+                emails[employee.id] = email
+
+        new_logins = [email for employee_id, email in emails.items() if not self.browse(employee_id).user_id]
+        if new_logins:
+            taken = {
+                user['login'] for user in self.env['res.users'].sudo().with_context(active_test=False).search_read(
+                    [('login', 'in', new_logins)], ['login'])
+            }
+            for employee in self.filtered(lambda employee: not employee.user_id and emails.get(employee.id) in taken):
+                errors[employee.id] = _('A user with the login %s already exists.', emails.pop(employee.id))
+        return emails, errors
+
+    def _portal_onboard(self):
+        """Give portal access to the selection with set-based operations.
+
+        Missing users are created with one batched ``create``, both portal
+        groups are added to all existing users with one ``write``, and the
+        welcome emails go through the throttled portal mail queue.
+        Returns ``{employee_id: error}`` for the employees that were skipped.
+        """
+        emails, errors = self._check_portal_onboarding_emails()
+        employees = self.filtered(lambda employee: employee.id in emails)
+        if not employees:
+            return errors
+
+        portal_group = self.env.ref('base.group_portal')
+        employee_portal_group = self.env.ref('employee_portal_hub.group_employee_portal_user')
+
+        new_employees = employees.filtered(lambda employee: not employee.user_id)
+        if new_employees:
+            users = self.env['res.users'].sudo().with_context(no_reset_password=True).create([{
+                'name': employee.name,
+                'login': emails[employee.id],
+                'email': emails[employee.id],
+                'company_id': employee.company_id.id,
+                'company_ids': [(6, 0, employee.company_id.ids)],
+                'groups_id': [(6, 0, [portal_group.id, employee_portal_group.id])],
+                'employee_ids': [(4, employee.id)],
+            } for employee in new_employees])
+            # Signup invitations are queued instead of sent while the action runs
+            users.partner_id.signup_prepare(signup_type='signup')
+            invitation = self.env.ref('auth_signup.set_password_email', raise_if_not_found=False)
+            if invitation:
+                invitation.send_mail_batch(users.ids, force_send=False)
+
+        existing_users = (employees - new_employees).user_id
+        if existing_users:
+            # Internal users cannot also be portal users: they only get the hub group
+            existing_users.filtered('share').write({'groups_id': [(4, portal_group.id)]})
+            existing_users.write({'groups_id': [(4, employee_portal_group.id)]})
+
+        employees.write({'portal_access_enabled': True, 'portal_onboarding_queued': False})
+
+        self.env['employee.portal.mail']._enqueue(employees, 'welcome')
+        return errors
+
+    @api.model
+    def _cron_portal_onboarding(self, batch_size=PORTAL_ONBOARDING_BATCH_SIZE):
+        """Onboard one batch of queued employees and report the progress"""
+        domain = [('portal_onboarding_queued', '=', True)]
+        employees = self.search(domain, limit=batch_size)
+        errors = employees._portal_onboard()
+        # Skipped employees leave the queue too, the reason is logged
+        employees.filtered(lambda employee: employee.id in errors).write({'portal_onboarding_queued': False})
+        for error in errors.values():
+            _logger.warning("Portal onboarding skipped: %s", error)
+        self.env['ir.cron']._notify_progress(done=len(employees), remaining=self.search_count(domain))
 
     def action_disable_portal_access(self):
-        """Disable portal access for employee"""
-        for employee in self:
-            if not employee.user_id:
-                continue
+        """Disable portal access for employee(s)"""
+        self._portal_revoke()
 
-            # Remove portal groups from user
-            portal_group = self.env.ref('base.group_portal')
-            employee_portal_group = self.env.ref('employee_portal_hub.group_employee_portal_user')
+    def _portal_revoke(self, archive_users=False):
+        """Revoke portal access of the selection with set-based operations.
 
-            groups_to_remove = []
-            if portal_group in employee.user_id.groups_id:
-                groups_to_remove.append(portal_group.id)
-            if employee_portal_group in employee.user_id.groups_id:
-                groups_to_remove.append(employee_portal_group.id)
+        Both portal groups are removed from all affected users with one
+        ``write``; with ``archive_users`` the portal (share) users are archived
+        as well, internal users are never archived from here. Pending uploads
+        and queued portal emails of the selection are dropped and the portal
+        caches are invalidated once.
+        """
+        employees = self.filtered(lambda employee: employee.portal_access_enabled or employee.user_id)
+        if not employees:
+            return
+        portal_group = self.env.ref('base.group_portal')
+        employee_portal_group = self.env.ref('employee_portal_hub.group_employee_portal_user')
 
-            if groups_to_remove:
-                employee.user_id.write({
-                    'groups_id': [(3, group_id) for group_id in groups_to_remove]
-                })
+        users = employees.user_id
+        if users:
+            users.sudo().write({'groups_id': [(3, portal_group.id), (3, employee_portal_group.id)]})
+            if archive_users:
+                users.sudo().filtered('share').write({'active': False})
+            self.env['employee.portal.upload'].sudo().search([
+                ('user_id', 'in', users.ids),
+                ('state', '=', 'uploading'),
+            ]).unlink()
 
-            employee.write({
-                'portal_access_enabled': False
-            })
+        self.env['employee.portal.mail'].sudo().search([
+            ('employee_id', 'in', employees.ids),
+            ('state', '=', 'queued'),
+        ]).unlink()
+        employees.write({'portal_access_enabled': False, 'portal_onboarding_queued': False})
+        employees._bump_portal_cache()
+
+    @api.model
+    def _cron_revoke_expired_portal_access(self, batch_size=PORTAL_ONBOARDING_BATCH_SIZE):
+        """Revoke the portal access of employees whose access end date has passed"""
+        archive_users = str2bool(self.env['ir.config_parameter'].sudo().get_param(
+            'employee_portal_hub.revoke_archive_users', 'False'))
+        domain = [
+            ('portal_access_enabled', '=', True),
+            ('portal_access_end_date', '<=', fields.Date.context_today(self)),
+        ]
+        employees = self.search(domain, limit=batch_size)
+        employees._portal_revoke(archive_users=archive_users)
+        self.env['ir.cron']._notify_progress(done=len(employees), remaining=self.search_count(domain))
 
     def action_open_portal_dashboard(self):
         """Open employee portal dashboard"""
@@ -119,22 +277,29 @@ class HrEmployee(models.Model):
         }
 
     def action_send_portal_invitation(self):
-        """Send portal invitation email"""
-        self.ensure_one()
-        if not self.portal_access_enabled or not self.user_id:
-            raise UserError(_("Portal access is not enabled for this employee."))
+        """Queue the portal invitation email of the selected employees"""
+        without_access = self.filtered(lambda employee: not employee.portal_access_enabled or not employee.user_id)
+        if without_access:
+            raise UserError(_("Portal access is not enabled for %s.", ', '.join(without_access.mapped('name'))))
+        if not self.env.ref('employee_portal_hub.employee_portal_invitation_template', raise_if_not_found=False):
+            raise UserError(_("Portal invitation email template not found."))
 
-        template = self.env.ref('employee_portal_hub.employee_portal_welcome_template', raise_if_not_found=False)
-        if template:
-            template.send_mail(self.id, force_send=True)
-            return {
-                'type': 'ir.actions.client',
-                'tag': 'display_notification',
-                'params': {
-                    'title': _('Portal Invitation Sent'),
-                    'message': _('Portal invitation has been sent to %s') % self.work_email,
-                    'type': 'success',
-                }
-            }
+        queued = self.env['employee.portal.mail']._enqueue(self, 'invitation')
+        skipped = self - queued
+        if len(self) == 1:
+            if skipped:
+                message = _('An invitation was already sent to %s recently.', self.work_email)
+            else:
+                message = _('Portal invitation has been queued for %s', self.work_email)
         else:
-            raise UserError(_("Portal invitation email template not found."))
+            message = _('%(queued)s invitations queued, %(skipped)s already sent recently.',
+                        queued=len(queued), skipped=len(skipped))
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _('Portal Invitation Sent'),
+                'message': message,
+                'type': 'warning' if skipped else 'success',
+            }
+        }
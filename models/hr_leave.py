@@ -0,0 +1,371 @@
+# -*- coding: utf-8 -*-
+
+from datetime import date
+from functools import partial
+
+from markupsafe import Markup
+
+from odoo import api, fields, models, _
+from odoo.exceptions import UserError, ValidationError
+
+from . import leave_interval_index
+
+PORTAL_OVERLAP_STATES = ['confirm', 'validate1', 'validate']
+PORTAL_OVERLAP_UPDATE_KEY = 'employee_portal_hub.overlap_update'
+
+
+class HrLeave(models.Model):
+    _inherit = ['hr.leave', 'employee.portal.cache.mixin']
+    _portal_cache_fields = ('department_id', 'employee_id', 'state', 'request_date_from', 'request_date_to')
+
+    def write(self, vals):
+        res = super().write(vals)
+        if 'state' in vals:
+            self._send_portal_state_update()
+        return res
+
+    def _send_portal_state_update(self):
+        """Push the new state of the leaves to the portal pages of their employees.
+
+        One bus notification is sent per employee user, after commit, so open
+        leave pages update their status badges without reloading.
+        """
+        for user in self.employee_id.user_id:
+            leaves = self.filtered(lambda leave: leave.employee_id.user_id == user)
+            user.partner_id._bus_send('employee_portal_hub/leave_state', {
+                'leaves': [{
+                    'id': leave.id,
+                    'state': leave.state,
+                    'label': leave.state.title(),
+                } for leave in leaves],
+            })
+
+    def _get_portal_cached_records(self):
+        return self.filtered(lambda leave: leave.department_id and leave.state in PORTAL_OVERLAP_STATES)
+
+    def _bump_portal_cache(self):
+        """Record the changed leaves so that the worker's overlap indexes are
+        updated in place after commit, not rebuilt from the database."""
+        cr = self.env.cr
+        pending = cr.precommit.data.get(PORTAL_OVERLAP_UPDATE_KEY)
+        if pending is None:
+            pending = cr.precommit.data[PORTAL_OVERLAP_UPDATE_KEY] = {
+                'version': self.env['employee.portal.cache']._get_versions('hr.leave')[0],
+                'leave_ids': set(),
+            }
+            cr.precommit.add(self._portal_overlap_precommit)
+        pending['leave_ids'].update(self.ids)
+        super()._bump_portal_cache()
+
+    @api.model
+    def _portal_overlap_precommit(self):
+        """Read the final state of the changed leaves and queue the update of
+        the worker's overlap indexes for when the transaction commits."""
+        cr = self.env.cr
+        pending = cr.precommit.data.pop(PORTAL_OVERLAP_UPDATE_KEY, None)
+        if not pending:
+            return
+        version = self.env['employee.portal.cache']._get_versions('hr.leave')[0]
+        leaves = self.sudo().search_read([
+            ('id', 'in', list(pending['leave_ids'])),
+            ('department_id', '!=', False),
+            ('state', 'in', PORTAL_OVERLAP_STATES),
+        ], ['department_id', 'employee_id', 'request_date_from', 'request_date_to', 'state'])
+        entries = [self._get_portal_overlap_entry(leave) for leave in leaves if leave['employee_id']]
+        cr.postcommit.add(partial(
+            leave_interval_index.apply_update,
+            cr.dbname, pending['version'], version, pending['leave_ids'], entries,
+        ))
+
+    @api.model
+    def _get_portal_overlap_entry(self, leave):
+        """Return the index entry of a ``search_read`` leave row"""
+        return {
+            'start': leave['request_date_from'].toordinal(),
+            'end': leave['request_date_to'].toordinal(),
+            'leave_id': leave['id'],
+            'department_id': leave['department_id'][0],
+            'employee_id': leave['employee_id'][0],
+            'employee_name': leave['employee_id'][1],
+            'date_from': fields.Date.to_string(leave['request_date_from']),
+            'date_to': fields.Date.to_string(leave['request_date_to']),
+            'state': leave['state'],
+        }
+
+    @api.model
+    def _get_portal_overlap_index(self, department_id, year):
+        """Return the worker's interval index of the department's leaves for ``year``.
+
+        The index is kept under the ``hr.leave`` portal cache version, so it
+        is rebuilt with one query once another worker changed leaves.
+        """
+        def build():
+            leaves = self.sudo().search_read([
+                ('department_id', '=', department_id),
+                ('state', 'in', PORTAL_OVERLAP_STATES),
+                ('request_date_from', '<=', date(year, 12, 31)),
+                ('request_date_to', '>=', date(year, 1, 1)),
+            ], ['department_id', 'employee_id', 'request_date_from', 'request_date_to', 'state'])
+            return [self._get_portal_overlap_entry(leave) for leave in leaves if leave['employee_id']]
+        version = self.env['employee.portal.cache']._get_versions('hr.leave')[0]
+        return leave_interval_index.get_index(self.env.cr.dbname, department_id, year, build, version)
+
+    @api.model
+    def _get_portal_team_overlaps(self, employee, date_from, date_to, exclude_leave_id=None):
+        """Return the pending and approved leaves of the employee's department
+        colleagues overlapping ``date_from`` - ``date_to``, sorted by start date.
+        """
+        if not employee.department_id or date_to < date_from:
+            return []
+        start, end = date_from.toordinal(), date_to.toordinal()
+        overlaps = {}
+        for year in range(date_from.year, date_to.year + 1):
+            index = self._get_portal_overlap_index(employee.department_id.id, year)
+            for entry in index.overlapping(start, end):
+                if entry['employee_id'] != employee.id and entry['leave_id'] != exclude_leave_id:
+                    overlaps[entry['leave_id']] = entry
+        return sorted(overlaps.values(), key=lambda entry: (entry['start'], entry['employee_name']))
+
+    @api.model
+    def _get_portal_range_duration(self, employee, date_from, date_to):
+        """Return ``{'days', 'hours'}`` of working time between two dates (inclusive).
+
+        Served from the per calendar and year working-time cache, so repeated
+        previews of the same period do not recompute any interval.
+        """
+        calendar = employee.resource_calendar_id or employee.company_id.resource_calendar_id
+        if not calendar:
+            return {'days': 0.0, 'hours': 0.0}
+        return calendar._get_portal_duration(date_from, date_to, employee.tz or calendar.tz or 'UTC')
+
+    @api.model
+    def _portal_validate_ranges(self, employee, ranges):
+        """Validate a list of requested date ranges together.
+
+        ``ranges`` are dicts with ``date_from``, ``date_to``, ``holiday_status_id``
+        and an optional ``name``. Ranges are checked against each other, against
+        the employee's existing leaves (one query) and cumulatively against the
+        remaining balance per leave type.
+
+        Returns ``(vals_by_index, errors_by_index)``.
+        """
+        LeaveType = self.env['hr.leave.type']
+        usable_types = {leave_type['id']: leave_type for leave_type in LeaveType._get_portal_leave_types(employee)}
+        balances = LeaveType._get_portal_remaining_balances(employee)
+
+        parsed = {}
+        errors = {}
+        for index, leave_range in enumerate(ranges):
+            if not isinstance(leave_range, dict):
+                errors[index] = _('Invalid dates or leave type.')
+                continue
+            try:
+                date_from = fields.Date.to_date(leave_range.get('date_from'))
+                date_to = fields.Date.to_date(leave_range.get('date_to'))
+                leave_type_id = int(leave_range.get('holiday_status_id') or 0)
+            except (ValueError, TypeError):
+                errors[index] = _('Invalid dates or leave type.')
+                continue
+            if not date_from or not date_to:
+                errors[index] = _('Both dates are required.')
+            elif date_to < date_from:
+                errors[index] = _('The end date must be after the start date.')
+            elif leave_type_id not in usable_types:
+                errors[index] = _('This leave type is not available.')
+            else:
+                parsed[index] = (date_from, date_to, leave_type_id, leave_range.get('name') or '')
+
+        if not parsed:
+            return {}, errors
+
+        existing = self.sudo().search_read([
+            ('employee_id', '=', employee.id),
+            ('state', 'not in', ['refuse', 'cancel']),
+            ('request_date_from', '<=', max(values[1] for values in parsed.values())),
+            ('request_date_to', '>=', min(values[0] for values in parsed.values())),
+        ], ['request_date_from', 'request_date_to'])
+        taken_periods = [(leave['request_date_from'], leave['request_date_to']) for leave in existing]
+
+        vals_by_index = {}
+        for index, (date_from, date_to, leave_type_id, name) in sorted(parsed.items(), key=lambda item: item[1][0]):
+            if any(start <= date_to and end >= date_from for start, end in taken_periods):
+                errors[index] = _('This period overlaps another leave.')
+                continue
+            duration = self._get_portal_range_duration(employee, date_from, date_to)
+            if not duration['days']:
+                errors[index] = _('This period contains no working day.')
+                continue
+            if usable_types[leave_type_id]['requires_allocation']:
+                # Balances are in the unit of the leave type
+                in_hours = usable_types[leave_type_id]['request_unit'] == 'hour'
+                requested = duration['hours'] if in_hours else duration['days']
+                remaining = balances.get(leave_type_id, 0.0)
+                if requested > remaining:
+                    if in_hours:
+                        errors[index] = _('Not enough remaining balance (%(remaining)s hours left).', remaining=remaining)
+                    else:
+                        errors[index] = _('Not enough remaining balance (%(remaining)s days left).', remaining=remaining)
+                    continue
+                balances[leave_type_id] = remaining - requested
+            taken_periods.append((date_from, date_to))
+            vals_by_index[index] = {
+                'employee_id': employee.id,
+                'holiday_status_id': leave_type_id,
+                'request_date_from': date_from,
+                'request_date_to': date_to,
+                'name': name,
+            }
+        return vals_by_index, errors
+
+    @api.model
+    def _portal_create_batch(self, employee, ranges, submit=False, atomic=False):
+        """Create the leaves of several date ranges at once.
+
+        Valid ranges are created with a single batched ``create`` (and
+        confirmed together when ``submit`` is set). Invalid ranges are reported
+        without affecting the valid ones, unless ``atomic`` is set, in which
+        case creation and confirmation share one savepoint and nothing is
+        kept as soon as one range is refused.
+
+        Returns ``(leaves_by_index, errors_by_index)``.
+        """
+        vals_by_index, errors = self._portal_validate_ranges(employee, ranges)
+        leaves_by_index = {}
+        if not vals_by_index or (atomic and errors):
+            return leaves_by_index, errors
+
+        indexes = sorted(vals_by_index)
+        if atomic:
+            try:
+                with self.env.cr.savepoint():
+                    leaves = self.create([vals_by_index[index] for index in indexes])
+                    if submit:
+                        leaves.action_confirm()
+            except (ValidationError, UserError) as e:
+                errors.update({index: str(e) for index in indexes})
+                return leaves_by_index, errors
+            return dict(zip(indexes, leaves)), errors
+
+        try:
+            with self.env.cr.savepoint():
+                leaves = self.create([vals_by_index[index] for index in indexes])
+            leaves_by_index = dict(zip(indexes, leaves))
+        except (ValidationError, UserError):
+            # Fall back to one savepoint per range to find the refused ones
+            for index in indexes:
+                try:
+                    with self.env.cr.savepoint():
+                        leaves_by_index[index] = self.create(vals_by_index[index])
+                except (ValidationError, UserError) as range_error:
+                    errors[index] = str(range_error)
+
+        if submit and leaves_by_index:
+            try:
+                with self.env.cr.savepoint():
+                    self.concat(*leaves_by_index.values()).action_confirm()
+            except (ValidationError, UserError) as e:
+                errors['submit'] = str(e)
+        return leaves_by_index, errors
+
+    def _notify_thread_by_email(self, message, recipients_data, msg_vals=False, **kwargs):
+        recipients_data = self.env['employee.portal.notification']._queue_digest_recipients(
+            message, recipients_data)
+        return super()._notify_thread_by_email(message, recipients_data, msg_vals=msg_vals, **kwargs)
+
+    def _notify_thread(self, message, msg_vals=False, **kwargs):
+        # Batch reviews from the portal log their chatter messages without
+        # notifying; one summary per employee is sent afterwards.
+        if self.env.context.get('portal_batch_review'):
+            return []
+        return super()._notify_thread(message, msg_vals=msg_vals, **kwargs)
+
+    @api.model
+    def _get_portal_reviewable_domain(self, manager):
+        """Domain of the pending leaves ``manager`` may review from the portal.
+
+        The leaves are reviewed as superuser, so the domain applies the rules
+        of hr_holidays' ``_check_approval_update``: time off officers review
+        the whole team, other managers only the leaves they are the time off
+        approver of, and never the types validated by HR alone.
+        """
+        domain = [
+            ('state', '=', 'confirm'),
+            ('employee_id', '!=', manager.id),
+            '|',
+            ('employee_id', 'in', list(self.env['hr.employee']._get_portal_team_ids(manager.id))),
+            ('employee_id.leave_manager_id', '=', manager.user_id.id or False),
+        ]
+        user = manager.user_id
+        if not user or not user.has_group('hr_holidays.group_hr_holidays_user'):
+            domain += [
+                '|',
+                ('holiday_status_id.leave_validation_type', '=', 'no_validation'),
+                '&',
+                ('holiday_status_id.leave_validation_type', 'in', ('manager', 'both')),
+                ('employee_id.leave_manager_id', '=', user.id or False),
+            ]
+        return domain
+
+    @api.model
+    def _portal_batch_review(self, manager, leave_ids, action, reason=''):
+        """Approve or refuse several pending leaves of ``manager``'s team at once.
+
+        The selection is restricted to :meth:`_get_portal_reviewable_domain`
+        and reviewed with a single ``action_approve`` or ``action_refuse``
+        call (falling back to one savepoint per leave when the batch is
+        refused). State changes are still tracked, but per-record
+        notifications are disabled: each employee then receives one message
+        listing all of their reviewed leaves.
+
+        Returns ``(reviewed_leaves, errors_by_leave_id)``.
+        """
+        if action not in ('approve', 'refuse'):
+            raise UserError(_('Unknown review action.'))
+        leaves = self.sudo().search(
+            [('id', 'in', list(leave_ids))] + self._get_portal_reviewable_domain(manager))
+        errors = {leave_id: _('This leave request cannot be reviewed.')
+                  for leave_id in set(leave_ids) - set(leaves.ids)}
+        if not leaves:
+            return leaves, errors
+
+        batch = leaves.with_context(portal_batch_review=True)
+        method = 'action_approve' if action == 'approve' else 'action_refuse'
+        reviewed = leaves
+        try:
+            with self.env.cr.savepoint():
+                getattr(batch, method)()
+        except (ValidationError, UserError):
+            reviewed = self.sudo()
+            for leave in batch:
+                try:
+                    with self.env.cr.savepoint():
+                        getattr(leave, method)()
+                    reviewed |= leave
+                except (ValidationError, UserError) as e:
+                    errors[leave.id] = str(e)
+
+        reviewed._portal_notify_review(action, reason)
+        return reviewed, errors
+
+    def _portal_notify_review(self, action, reason=''):
+        """Send one message per employee summarizing the reviewed leaves"""
+        subject = _('Leave requests approved') if action == 'approve' else _('Leave requests refused')
+        for employee in self.employee_id:
+            partner = employee.user_id.partner_id
+            if not partner:
+                continue
+            leaves = self.filtered(lambda leave: leave.employee_id == employee)
+            lines = Markup('').join(
+                Markup('<li>%s: %s - %s</li>') % (
+                    leave.holiday_status_id.name, leave.request_date_from, leave.request_date_to)
+                for leave in leaves
+            )
+            body = Markup('<p>%s</p><ul>%s</ul>') % (subject, lines)
+            if reason:
+                body += Markup('<p>%s</p>') % _('Reason: %s', reason)
+            leaves[0].message_notify(
+                partner_ids=partner.ids,
+                subject=subject,
+                body=body,
+                email_layout_xmlid='mail.mail_notification_light',
+            )
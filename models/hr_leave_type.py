@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+
+from collections import defaultdict
+from datetime import date
+
+from odoo import api, fields, models, tools
+from odoo.tools import float_round, frozendict
+
+
+class HrLeaveType(models.Model):
+    _inherit = ['hr.leave.type', 'employee.portal.cache.mixin']
+
+    @api.model
+    @tools.ormcache('company_id', 'self.env.lang', 'self.env["employee.portal.cache"]._get_versions("hr.leave.type")')
+    def _get_portal_leave_type_catalogue(self, company_id):
+        """Return the active leave types available to a company's employees.
+
+        The catalogue only holds type metadata, so it is shared by every
+        employee of the company and cached until a leave type is modified.
+        """
+        leave_types = self.sudo().search([
+            ('active', '=', True),
+            ('company_id', 'in', [False, company_id]),
+        ])
+        return tuple(
+            frozendict({
+                'id': leave_type.id,
+                'name': leave_type.name,
+                'requires_allocation': leave_type.requires_allocation == 'yes',
+                'request_unit': leave_type.request_unit,
+            })
+            for leave_type in leave_types
+        )
+
+    @api.model
+    def _get_portal_remaining_balances(self, employee):
+        """Return ``{leave_type_id: remaining}`` for the employee.
+
+        The remaining balance is expressed in the unit of the type (hours for
+        hour-based types, days otherwise). Only the allocations valid today
+        count, and a leave only consumes them when it starts within the
+        validity period of one of them, so leaves of previous periods are
+        not taken off the current balance. Allocations and leaves are each
+        read with a single query.
+        """
+        today = fields.Date.context_today(self)
+        allocations = self.env['hr.leave.allocation'].sudo().search_read(
+            [
+                ('employee_id', '=', employee.id),
+                ('state', '=', 'validate'),
+                ('date_from', '<=', today),
+                '|', ('date_to', '=', False), ('date_to', '>=', today),
+            ],
+            ['holiday_status_id', 'date_from', 'date_to', 'number_of_days', 'number_of_hours_display'],
+        )
+        if not allocations:
+            return {}
+        type_ids = {allocation['holiday_status_id'][0] for allocation in allocations}
+        hour_type_ids = set(self.sudo().browse(type_ids).filtered(lambda t: t.request_unit == 'hour').ids)
+
+        remaining = defaultdict(float)
+        periods = defaultdict(list)
+        for allocation in allocations:
+            type_id = allocation['holiday_status_id'][0]
+            remaining[type_id] += allocation['number_of_hours_display' if type_id in hour_type_ids else 'number_of_days']
+            periods[type_id].append((allocation['date_from'], allocation['date_to'] or date.max))
+
+        leaves = self.env['hr.leave'].sudo().search_read(
+            [
+                ('employee_id', '=', employee.id),
+                ('state', 'in', ['confirm', 'validate1', 'validate']),
+                ('holiday_status_id', 'in', list(type_ids)),
+                ('request_date_from', '>=', min(allocation['date_from'] for allocation in allocations)),
+            ],
+            ['holiday_status_id', 'request_date_from', 'number_of_days', 'number_of_hours'],
+        )
+        for leave in leaves:
+            type_id = leave['holiday_status_id'][0]
+            if any(start <= leave['request_date_from'] <= end for start, end in periods[type_id]):
+                remaining[type_id] -= leave['number_of_hours' if type_id in hour_type_ids else 'number_of_days']
+        return {
+            type_id: float_round(balance, precision_digits=2)
+            for type_id, balance in remaining.items()
+        }
+
+    @api.model
+    def _get_portal_leave_types(self, employee, include_type_ids=()):
+        """Return the leave types the employee can actually request.
+
+        Types requiring an allocation are only listed while the employee has
+        a positive remaining balance; ``include_type_ids`` keeps a type listed
+        regardless (e.g. the type of the leave being edited).
+        """
+        balances = self._get_portal_remaining_balances(employee)
+        leave_types = []
+        for leave_type in self._get_portal_leave_type_catalogue(employee.company_id.id):
+            remaining = balances.get(leave_type['id'])
+            if leave_type['requires_allocation'] and (remaining or 0.0) <= 0 \
+                    and leave_type['id'] not in include_type_ids:
+                continue
+            leave_types.append(dict(leave_type, remaining=remaining))
+        return leave_types
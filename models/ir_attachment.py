@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+
+import hashlib
+import mimetypes
+import os
+import shutil
+import tempfile
+
+from odoo import api, models, _
+from odoo.exceptions import UserError
+from odoo.tools.mimetypes import guess_mimetype
+
+UPLOAD_CHUNK_SIZE = 64 * 1024
+UPLOAD_TMP_DIR = 'employee_portal_uploads'
+DEFAULT_MAX_FILE_SIZE_MB = 25
+DEFAULT_MAX_REQUEST_SIZE_MB = 50
+GENERIC_MIMETYPES = ('application/octet-stream', 'application/zip')
+# Active content is never accepted as a supporting document
+REJECTED_MIMETYPES = (
+    'text/html', 'application/xhtml+xml', 'image/svg+xml', 'text/javascript', 'application/javascript',
+    'application/x-dosexec', 'application/x-msdownload', 'application/x-executable', 'application/x-sh',
+)
+
+
+class IrAttachment(models.Model):
+    _inherit = 'ir.attachment'
+
+    @api.model
+    def _get_portal_upload_limits(self):
+        """Return the (per file, per request) portal upload caps in bytes"""
+        ICP = self.env['ir.config_parameter'].sudo()
+        max_file_size = int(ICP.get_param('employee_portal_hub.upload_max_file_size', DEFAULT_MAX_FILE_SIZE_MB))
+        max_request_size = int(ICP.get_param('employee_portal_hub.upload_max_request_size', DEFAULT_MAX_REQUEST_SIZE_MB))
+        return max_file_size * 1024 * 1024, max_request_size * 1024 * 1024
+
+    @api.model
+    def _get_portal_upload_dir(self):
+        """Temporary area inside the filestore, so finished uploads can be moved in place"""
+        path = os.path.join(self._filestore(), UPLOAD_TMP_DIR)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    @api.model
+    def _sniff_portal_mimetype(self, head, filename):
+        """Guess the mimetype from the first block, falling back on the file name
+        for container formats (docx, xlsx...) that cannot be told apart from a prefix.
+        Markup and executables are refused."""
+        mimetype = guess_mimetype(head, default='application/octet-stream')
+        if mimetype in GENERIC_MIMETYPES:
+            mimetype = mimetypes.guess_type(filename or '')[0] or mimetype
+        if mimetype in REJECTED_MIMETYPES:
+            raise UserError(_("The file %s is not an accepted document type.", filename))
+        return mimetype
+
+    @api.model
+    def _portal_adopt_upload(self, tmp_path, filename, checksum, file_size, mimetype, keep_source=False):
+        """Move a fully written temporary file into the filestore.
+
+        With ``keep_source`` the file is linked (or copied) instead, and the
+        caller removes the source once the transaction is committed.
+        Returns the ``ir.attachment`` values referencing the stored file, so the
+        content never has to be loaded in memory or base64 encoded.
+        """
+        fname, full_path = self._get_path(b'', checksum)
+        if os.path.exists(full_path):
+            # Same content already stored: the filestore deduplicates by checksum
+            if not keep_source:
+                os.unlink(tmp_path)
+        elif keep_source:
+            try:
+                os.link(tmp_path, full_path)
+            except OSError:
+                shutil.copyfile(tmp_path, full_path)
+        else:
+            os.replace(tmp_path, full_path)
+        # Let the filestore GC collect the file if the transaction is rolled back
+        self._mark_for_gc(fname)
+        return {
+            'name': filename,
+            'store_fname': fname,
+            'checksum': checksum,
+            'file_size': file_size,
+            'mimetype': mimetype,
+        }
+
+    @api.model
+    def _portal_stream_upload(self, stream, filename, max_size):
+        """Copy ``stream`` to the filestore in fixed-size chunks.
+
+        The content is hashed while being written, the mimetype is sniffed on
+        the first block and the copy is aborted as soon as ``max_size`` bytes
+        are exceeded.
+        """
+        if self._storage() != 'file':
+            # Database storage has no filestore to stream into
+            data = stream.read(max_size + 1)
+            if len(data) > max_size:
+                raise UserError(_("The file %(name)s exceeds the maximum upload size of %(size)s MB.",
+                                  name=filename, size=round(max_size / (1024 * 1024), 1)))
+            return {'name': filename, 'raw': data, 'mimetype': self._sniff_portal_mimetype(data[:UPLOAD_CHUNK_SIZE], filename)}
+
+        sha = hashlib.sha1()
+        file_size = 0
+        mimetype = None
+        fd, tmp_path = tempfile.mkstemp(dir=self._get_portal_upload_dir(), prefix='stream-')
+        try:
+            with os.fdopen(fd, 'wb') as tmp_file:
+                while True:
+                    chunk = stream.read(UPLOAD_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    if mimetype is None:
+                        mimetype = self._sniff_portal_mimetype(chunk, filename)
+                    file_size += len(chunk)
+                    if file_size > max_size:
+                        raise UserError(_("The file %(name)s exceeds the maximum upload size of %(size)s MB.",
+                                        name=filename, size=round(max_size / (1024 * 1024), 1)))
+                    sha.update(chunk)
+                    tmp_file.write(chunk)
+            return self._portal_adopt_upload(
+                tmp_path, filename, sha.hexdigest(), file_size, mimetype or 'application/octet-stream')
+        finally:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+
+    @api.model
+    def _portal_store_uploads(self, uploads):
+        """Stream uploaded files to the filestore, enforcing the size caps.
+
+        ``uploads`` are werkzeug ``FileStorage`` objects. Returns a list of
+        attachment values to be completed with ``res_model``/``res_id`` and
+        created in one batch once the target record exists.
+        """
+        max_file_size, max_request_size = self._get_portal_upload_limits()
+        budget = max_request_size
+        values = []
+        for upload in uploads:
+            if budget <= 0:
+                raise UserError(_("The uploaded files exceed the maximum total size of %s MB.",
+                                  max_request_size // (1024 * 1024)))
+            vals = self._portal_stream_upload(upload.stream, upload.filename, min(max_file_size, budget))
+            budget -= vals.get('file_size') or len(vals.get('raw') or b'')
+            values.append(vals)
+        return values
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+
+from odoo import api, models
+from odoo.http import request
+from odoo.tools import str2bool
+
+SERVICE_WORKER_PATH = '/my/service-worker.js'
+
+
+class IrHttp(models.AbstractModel):
+    _inherit = 'ir.http'
+
+    @classmethod
+    def _pre_dispatch(cls, rule, args):
+        super()._pre_dispatch(rule, args)
+        # Page views of portal users; only buffered, see employee.portal.activity
+        if (
+            request.httprequest.method == 'GET'
+            and request.httprequest.path.startswith('/my')
+            and request.httprequest.path != SERVICE_WORKER_PATH
+            and rule.endpoint.routing.get('type') == 'http'
+            and request.session.uid
+            and request.env.user.share
+        ):
+            request.env['employee.portal.activity']._log_activity(
+                request.env.user, 'page', request.httprequest.path)
+
+    @api.model
+    def _get_portal_service_worker_url(self):
+        """URL of the portal service worker, empty when offline mode is off.
+
+        The user id is part of the URL: the worker namespaces its caches with
+        it and a different user on the same browser installs a new worker.
+        """
+        offline_mode = str2bool(self.env['ir.config_parameter'].sudo().get_param(
+            'employee_portal_hub.offline_mode', 'False'))
+        if not offline_mode or not self.env.uid:
+            return ''
+        return '%s?uid=%s' % (SERVICE_WORKER_PATH, self.env.uid)
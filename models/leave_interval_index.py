@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""In-memory interval index of the leaves of a department for one year.
+
+The index is built from a single query the first time a department/year is
+looked up and kept in the worker under the ``hr.leave`` portal cache version
+it was built for. Writing leaves bumps that version, so the indexes of the
+other workers are rebuilt on their next lookup, while the worker that made
+the change updates its own indexes in place once the transaction commits
+(see :func:`apply_update`).
+
+Shared indexes are replaced by an updated copy rather than modified, so
+concurrent readers need no lock; at most ``MAX_INDEXES`` indexes are kept,
+least recently used first out.
+"""
+
+import bisect
+import threading
+from collections import OrderedDict
+from datetime import date
+
+MAX_INDEXES = 256
+
+_indexes = OrderedDict()
+_lock = threading.RLock()
+
+
+class LeaveIntervalIndex:
+    """Intervals sorted by start, with the length of the longest one.
+
+    An overlap query for [start, end] only has to scan the intervals starting
+    in [start - max_length, end], found by bisection, which keeps lookups
+    logarithmic in the department size plus the number of matches.
+    """
+
+    __slots__ = ('_starts', '_entries', '_by_id', '_max_length', 'version')
+
+    def __init__(self, entries=(), version=None):
+        self._starts = []
+        self._entries = []
+        self._by_id = {}
+        self._max_length = 0
+        self.version = version
+        for entry in sorted(entries, key=lambda entry: entry['start']):
+            self._insert(entry)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, leave_id):
+        return leave_id in self._by_id
+
+    def copy(self, version):
+        index = LeaveIntervalIndex(version=version)
+        index._starts = list(self._starts)
+        index._entries = list(self._entries)
+        index._by_id = dict(self._by_id)
+        index._max_length = self._max_length
+        return index
+
+    def _insert(self, entry):
+        position = bisect.bisect_right(self._starts, entry['start'])
+        self._starts.insert(position, entry['start'])
+        self._entries.insert(position, entry)
+        self._by_id[entry['leave_id']] = entry
+        self._max_length = max(self._max_length, entry['end'] - entry['start'])
+
+    def add(self, entry):
+        """Insert ``entry`` (dict with ``start``/``end`` date ordinals and ``leave_id``)"""
+        self.remove(entry['leave_id'])
+        self._insert(entry)
+
+    def remove(self, leave_id):
+        entry = self._by_id.pop(leave_id, None)
+        if entry is None:
+            return
+        position = bisect.bisect_left(self._starts, entry['start'])
+        while self._entries[position] is not entry:
+            position += 1
+        del self._starts[position]
+        del self._entries[position]
+
+    def overlapping(self, start, end):
+        """Return the entries overlapping the [start, end] ordinal range"""
+        first = bisect.bisect_left(self._starts, start - self._max_length)
+        last = bisect.bisect_right(self._starts, end)
+        return [entry for entry in self._entries[first:last] if entry['end'] >= start]
+
+
+def get_index(dbname, department_id, year, build, version):
+    """Return the index of a department and year.
+
+    The cached index is only used when it was built for ``version``,
+    otherwise it is rebuilt with ``build()``.
+    """
+    key = (dbname, department_id, year)
+    with _lock:
+        index = _indexes.get(key)
+        if index is not None and index.version == version:
+            _indexes.move_to_end(key)
+            return index
+    index = LeaveIntervalIndex(build(), version)
+    with _lock:
+        _indexes[key] = index
+        _indexes.move_to_end(key)
+        while len(_indexes) > MAX_INDEXES:
+            _indexes.popitem(last=False)
+    return index
+
+
+def apply_update(dbname, old_version, new_version, leave_ids, entries):
+    """Carry the indexes of ``old_version`` over to ``new_version``.
+
+    ``leave_ids`` are the leaves changed between the two versions and
+    ``entries`` their current entries, with their ``department_id``. Indexes
+    holding none of them are only relabelled, the others are replaced by a
+    copy with the leaves removed and the new entries added. Indexes of any
+    other version are outdated and left to be rebuilt.
+    """
+    with _lock:
+        for key, index in list(_indexes.items()):
+            if key[0] != dbname or index.version != old_version:
+                continue
+            year_start = date(key[2], 1, 1).toordinal()
+            year_end = date(key[2], 12, 31).toordinal()
+            added = [
+                entry for entry in entries
+                if entry['department_id'] == key[1] and entry['start'] <= year_end and entry['end'] >= year_start
+            ]
+            removed = [leave_id for leave_id in leave_ids if leave_id in index]
+            if not added and not removed:
+                index.version = new_version
+                continue
+            updated = index.copy(new_version)
+            for leave_id in removed:
+                updated.remove(leave_id)
+            for entry in added:
+                updated.add(entry)
+            _indexes[key] = updated
+
+
+def clear(dbname=None):
+    with _lock:
+        for key in list(_indexes):
+            if dbname is None or key[0] == dbname:
+                del _indexes[key]
@@ -0,0 +1,14 @@
+# -*- coding: utf-8 -*-
+
+from odoo import models
+
+
+class ResUsers(models.Model):
+    _inherit = 'res.users'
+
+    def _update_last_login(self):
+        super()._update_last_login()
+        # Portal employees also get a row in the append-only portal login log,
+        # the only record of their logins (the activity log holds page views)
+        if self.share and self.sudo().employee_ids:
+            self.env['employee.portal.login']._log_login(self)
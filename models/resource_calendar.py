@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from pytz import timezone
+
+from odoo import api, models, tools
+from odoo.tools import float_round, frozendict
+
+
+class ResourceCalendar(models.Model):
+    _inherit = ['resource.calendar', 'employee.portal.cache.mixin']
+
+    @api.model
+    @tools.ormcache('calendar_id', 'year', 'tz_name',
+                    'self.env["employee.portal.cache"]._get_versions("resource.calendar", "resource.calendar.leaves")')
+    def _get_portal_day_hours(self, calendar_id, year, tz_name):
+        """Return ``{date: working_hours}`` for every working day of ``year``.
+
+        Work intervals are computed once per calendar, year and timezone with
+        public holidays (global calendar leaves) already removed, then cached
+        until a calendar, an attendance or a global leave changes.
+        """
+        calendar = self.browse(calendar_id).sudo()
+        tz = timezone(tz_name)
+        intervals = calendar._work_intervals_batch(
+            tz.localize(datetime(year, 1, 1)),
+            tz.localize(datetime(year + 1, 1, 1)),
+            tz=tz,
+        )[False]
+        day_hours = defaultdict(float)
+        for start, stop, dummy in intervals:
+            day_hours[start.date()] += (stop - start).total_seconds() / 3600
+        return frozendict({
+            day: float_round(hours, precision_digits=2)
+            for day, hours in day_hours.items() if hours
+        })
+
+    def _get_portal_duration(self, date_from, date_to, tz_name):
+        """Return ``{'days', 'hours'}`` of working time between two dates (inclusive)"""
+        self.ensure_one()
+        days = hours = 0.0
+        day = date_from
+        day_hours = None
+        while day <= date_to:
+            if day_hours is None or day.month == 1 and day.day == 1:
+                day_hours = self._get_portal_day_hours(self.id, day.year, tz_name)
+            if day in day_hours:
+                days += 1
+                hours += day_hours[day]
+            day += timedelta(days=1)
+        return {'days': days, 'hours': float_round(hours, precision_digits=2)}
+
+
+class ResourceCalendarAttendance(models.Model):
+    _inherit = ['resource.calendar.attendance', 'employee.portal.cache.mixin']
+
+    # Attendances are part of their calendar's cached working time
+    _portal_cache_name = 'resource.calendar'
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+
+from datetime import datetime, timedelta
+
+from pytz import timezone, utc
+
+from odoo import api, fields, models, tools
+from odoo.tools import frozendict
+
+
+class ResourceCalendarLeaves(models.Model):
+    _inherit = ['resource.calendar.leaves', 'employee.portal.cache.mixin']
+
+    def _get_portal_cached_records(self):
+        # Public holidays (leaves without resource) are part of the cached
+        # working-time intervals and holiday overlay. Resource leaves, created
+        # for every validated hr.leave, are not cached.
+        return self.filtered(lambda leave: not leave.resource_id)
+
+    @api.model
+    @tools.ormcache('company_id', 'calendar_id', 'year',
+                    'self.env["employee.portal.cache"]._get_versions("resource.calendar", "resource.calendar.leaves")')
+    def _get_portal_holiday_overlay(self, company_id, calendar_id, year):
+        """Return the public holidays and company closures touching ``year``.
+
+        Holidays are converted to local dates in the calendar's timezone and
+        returned as a tuple of ``{name, date_from, date_to}`` frozendicts (ISO
+        dates) sorted by start, cached until a global calendar leave changes.
+        """
+        calendar = self.env['resource.calendar'].browse(calendar_id).sudo()
+        tz = timezone(calendar.tz or 'UTC')
+        holidays = self.sudo().search_read([
+            ('resource_id', '=', False),
+            ('company_id', 'in', [company_id, False]),
+            ('calendar_id', 'in', [calendar_id, False]),
+            ('date_from', '<', datetime(year + 1, 1, 1) + timedelta(days=1)),
+            ('date_to', '>', datetime(year, 1, 1) - timedelta(days=1)),
+        ], ['name', 'date_from', 'date_to'], order='date_from')
+
+        overlay = []
+        for holiday in holidays:
+            date_from = utc.localize(holiday['date_from']).astimezone(tz).date()
+            date_to = utc.localize(holiday['date_to']).astimezone(tz).date()
+            if date_from.year <= year <= date_to.year:
+                overlay.append(frozendict({
+                    'name': holiday['name'] or '',
+                    'date_from': fields.Date.to_string(date_from),
+                    'date_to': fields.Date.to_string(date_to),
+                }))
+        return tuple(overlay)
+
+    @api.model
+    @tools.ormcache('company_id', 'self.env["employee.portal.cache"]._get_versions("resource.calendar.leaves")')
+    def _get_portal_holiday_stamp(self, company_id):
+        """Return a stamp of the company's global leaves, for client cache keys"""
+        [(count, last_write)] = self.sudo()._read_group(
+            [('resource_id', '=', False), ('company_id', 'in', [company_id, False])],
+            aggregates=['__count', 'write_date:max'],
+        )
+        return '%s-%s' % (count, last_write and int(last_write.timestamp()) or 0)
+
+    @api.model
+    def _get_portal_holidays(self, employee, date_from, date_to):
+        """Return the holidays of the employee's calendar between two dates (inclusive)"""
+        calendar = employee.resource_calendar_id or employee.company_id.resource_calendar_id
+        start, end = fields.Date.to_string(date_from), fields.Date.to_string(date_to)
+        holidays = []
+        for year in range(date_from.year, date_to.year + 1):
+            for holiday in self._get_portal_holiday_overlay(employee.company_id.id, calendar.id, year):
+                if holiday['date_from'] <= end and holiday['date_to'] >= start and holiday not in holidays:
+                    holidays.append(holiday)
+        return [dict(holiday) for holiday in holidays]
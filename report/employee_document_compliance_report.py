@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+
+from odoo import fields, models, tools
+from odoo.tools import SQL
+
+
+class EmployeeDocumentComplianceReport(models.Model):
+    """Acknowledgement of mandatory documents, one row per receipt.
+
+    The rates are averages of 0/100 flags, so grouping the view by document
+    and department computes the percentages in the grouped query itself.
+    Copies of one publication (same company, name and file) share their
+    ``source_document_id``, so documents that only share a name are never
+    merged.
+    """
+    _name = 'employee.document.compliance.report'
+    _description = 'Document Acknowledgement Report'
+    _auto = False
+    _rec_name = 'document_name'
+    _order = 'document_name'
+
+    source_document_id = fields.Many2one('employee.document', string='Document', readonly=True)
+    document_name = fields.Char(string='Document Name', readonly=True)
+    document_type = fields.Selection(
+        selection=lambda self: self.env['employee.document']._fields['document_type'].selection,
+        string='Document Type', readonly=True)
+    employee_id = fields.Many2one('hr.employee', string='Employee', readonly=True)
+    department_id = fields.Many2one('hr.department', string='Department', readonly=True)
+    company_id = fields.Many2one('res.company', string='Company', readonly=True)
+    acknowledged_date = fields.Datetime(string='Acknowledged On', readonly=True)
+    acknowledged_count = fields.Integer(string='Acknowledged', readonly=True)
+    acknowledgement_rate = fields.Float(string='Acknowledged (%)', readonly=True, aggregator='avg')
+    read_rate = fields.Float(string='Read (%)', readonly=True, aggregator='avg')
+
+    def init(self):
+        tools.drop_view_if_exists(self.env.cr, self._table)
+        self.env.cr.execute(SQL("""
+            CREATE OR REPLACE VIEW %s AS (
+                SELECT document.id,
+                       MIN(document.id) OVER (
+                           PARTITION BY document.company_id, document.document_name,
+                                        COALESCE(document.checksum, document.id::text)
+                       ) AS source_document_id,
+                       document.document_name,
+                       document.document_type,
+                       document.employee_id,
+                       employee.department_id,
+                       document.company_id,
+                       document.acknowledged_date,
+                       (document.acknowledged_date IS NOT NULL)::int AS acknowledged_count,
+                       CASE WHEN document.acknowledged_date IS NOT NULL THEN 100.0 ELSE 0.0 END AS acknowledgement_rate,
+                       CASE WHEN document.read_date IS NOT NULL THEN 100.0 ELSE 0.0 END AS read_rate
+                  FROM employee_document document
+                  JOIN hr_employee employee ON employee.id = document.employee_id
+                 WHERE document.is_mandatory_read
+                   AND document.active
+            )
+        """, SQL.identifier(self._table)))
@@ -1,52 +1,186 @@
 /** @odoo-module **/
 
-import { Component, useState } from "@odoo/owl";
+import { whenReady } from "@odoo/owl";
+import { loadBundle } from "@web/core/assets";
 import { registry } from "@web/core/registry";
+import publicWidget from "@web/legacy/js/public/public_widget";
 
 // Employee Portal Hub JavaScript
-console.log('Employee Portal Hub JS loaded');
-
-// Dashboard functionality
-document.addEventListener('DOMContentLoaded', function() {
-    // Initialize dashboard features
-    initializeDashboard();
-    initializeQuickActions();
-    initializeLeaveCalendar();
+//
+// Only thin public widgets live in the frontend bundle: each one binds to
+// its own portal page through its selector and delegates its events from
+// the widget root. The calendar and leave form code is in a lazy bundle
+// fetched by the widgets that need it.
+const FEATURES_BUNDLE = "employee_portal_hub.assets_portal_features";
+
+async function loadFeature(name) {
+    await loadBundle(FEATURES_BUNDLE);
+    return odoo.loader.modules.get(`@employee_portal_hub/js/features/${name}`);
+}
+
+publicWidget.registry.EmployeePortalQuickActions = publicWidget.Widget.extend({
+    selector: ".eph_quick_actions",
+    events: {
+        "click .eph_action_btn": "_onActionClick",
+    },
+
+    _onActionClick(ev) {
+        // Loading state until the target page is rendered
+        ev.currentTarget.classList.add("eph_loading");
+    },
+});
+
+publicWidget.registry.EmployeePortalLeaveCalendar = publicWidget.Widget.extend({
+    selector: ".eph_calendar_container",
+
+    async willStart() {
+        this.feature = await loadFeature("leave_calendar");
+    },
+
+    start() {
+        new this.feature.LeaveCalendar(this.el).start();
+        return this._super(...arguments);
+    },
+});
+
+publicWidget.registry.EmployeePortalLeaveForm = publicWidget.Widget.extend({
+    selector: "form.leave_request_form",
+    events: {
+        "click .eph_add_leave_range": "_onAddRange",
+        "change input[type='date']": "_onDateChange",
+        "submit": "_onSubmit",
+    },
+
+    async willStart() {
+        const { LeaveRequestForm } = await loadFeature("leave_form");
+        this.leaveForm = new LeaveRequestForm(this.el);
+    },
+
+    start() {
+        this.leaveForm.start();
+        return this._super(...arguments);
+    },
+
+    _onAddRange() {
+        this.leaveForm.addRange();
+    },
+
+    _onDateChange() {
+        this.leaveForm.onDateChange();
+    },
+
+    _onSubmit(ev) {
+        this.leaveForm.submit(ev);
+    },
 });
 
-function initializeDashboard() {
-    // Dashboard initialization logic
-    console.log('Dashboard initialized');
+publicWidget.registry.EmployeePortalTeamApprovals = publicWidget.Widget.extend({
+    selector: "form.eph_team_approvals_form",
+    events: {
+        "change .eph_select_all": "_onSelectAll",
+    },
 
-    // Add hover effects to cards
-    const cards = document.querySelectorAll('.eph_dashboard_card, .eph_stats_card');
-    cards.forEach(card => {
-        card.addEventListener('mouseenter', function() {
-            this.style.transform = 'translateY(-2px)';
+    _onSelectAll(ev) {
+        this.el.querySelectorAll("input[name='leave_ids']").forEach((checkbox) => {
+            checkbox.checked = ev.currentTarget.checked;
         });
+    },
+});
+
+// Live leave status: state changes are pushed on the bus to the employee's
+// partner channel, so open leave pages update their badges without reloading.
+const LEAVE_STATE_BADGES = {
+    validate: "bg-success",
+    confirm: "bg-warning",
+    refuse: "bg-danger",
+};
 
-        card.addEventListener('mouseleave', function() {
-            this.style.transform = 'translateY(0)';
+function updateLeaveStates({ leaves }) {
+    for (const leave of leaves) {
+        document.querySelectorAll(`.eph_leave_state[data-leave-id="${leave.id}"]`).forEach((badge) => {
+            badge.classList.remove("bg-success", "bg-warning", "bg-danger", "bg-secondary");
+            badge.classList.add(LEAVE_STATE_BADGES[leave.state] || "bg-secondary");
+            badge.textContent = leave.label;
         });
-    });
+    }
 }
 
-function initializeQuickActions() {
-    // Quick action functionality
-    const actionBtns = document.querySelectorAll('.eph_action_btn');
-    actionBtns.forEach(btn => {
-        btn.addEventListener('click', function(e) {
-            // Add loading state
-            this.classList.add('eph_loading');
+const leaveStatusService = {
+    dependencies: ["bus_service"],
+    start(env, { bus_service }) {
+        whenReady(() => {
+            // Only pages showing leave badges open the bus connection
+            if (!document.querySelector(".eph_leave_state")) {
+                return;
+            }
+            bus_service.subscribe("employee_portal_hub/leave_state", updateLeaveStates);
+            bus_service.start();
         });
-    });
+    },
+};
+
+registry.category("services").add("employee_portal_hub.leave_status", leaveStatusService);
+
+// Same markup as the alerts rendered by the portal templates
+function showPortalAlert(message) {
+    const alert = document.createElement("div");
+    alert.className = "alert alert-warning alert-dismissible";
+    alert.setAttribute("role", "alert");
+    const icon = document.createElement("i");
+    icon.className = "fa fa-exclamation-circle";
+    const close = document.createElement("button");
+    close.type = "button";
+    close.className = "btn-close";
+    close.dataset.bsDismiss = "alert";
+    close.setAttribute("aria-label", "Close");
+    alert.append(icon, ` ${message}`, close);
+    const container = document.querySelector(".o_portal_wrap .container, .o_portal_wrap, main") || document.body;
+    container.prepend(alert);
 }
 
-function initializeLeaveCalendar() {
-    // Leave calendar initialization
-    const calendarContainer = document.querySelector('.eph_calendar_container');
-    if (calendarContainer) {
-        // Basic calendar placeholder
-        calendarContainer.innerHTML = '<p class="text-center text-muted">Calendar will be loaded here</p>';
+// Offline mode: portal pages advertise the service worker in a meta tag,
+// an empty URL means the mode was turned off and the worker is removed.
+function setupServiceWorker() {
+    const meta = document.querySelector("meta[name='eph-service-worker']");
+    if (!meta || !("serviceWorker" in navigator)) {
+        return;
+    }
+    if (!meta.content) {
+        navigator.serviceWorker.getRegistrations().then((registrations) => {
+            registrations
+                .filter((registration) => new URL(registration.scope).pathname === "/my/")
+                .forEach((registration) => registration.unregister());
+        });
+        window.caches?.keys().then((names) => {
+            names.filter((name) => name.startsWith("eph-")).forEach((name) => window.caches.delete(name));
+        });
+        return;
+    }
+    navigator.serviceWorker.register(meta.content, { scope: "/my/" });
+    // Logging out first removes the user's cached pages and offline drafts
+    document.addEventListener("click", (ev) => {
+        const link = ev.target.closest("a[href*='/web/session/logout']");
+        const worker = navigator.serviceWorker.controller;
+        if (!link || !worker) {
+            return;
+        }
+        ev.preventDefault();
+        const logout = () => window.location.assign(link.href);
+        const channel = new MessageChannel();
+        channel.port1.onmessage = logout;
+        worker.postMessage({ type: "eph-logout" }, [channel.port2]);
+        setTimeout(logout, 2000);
+    });
+    const replayDrafts = () => navigator.serviceWorker.controller?.postMessage({ type: "eph-replay-drafts" });
+    window.addEventListener("online", replayDrafts);
+    navigator.serviceWorker.addEventListener("message", ({ data }) => {
+        if (data?.type === "eph-drafts-replayed" && data.failed) {
+            showPortalAlert(`${data.failed} leave request(s) prepared offline could not be saved, please submit them again.`);
+        }
+    });
+    if (navigator.onLine) {
+        replayDrafts();
     }
 }
+
+whenReady(setupServiceWorker);
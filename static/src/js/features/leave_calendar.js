@@ -0,0 +1,224 @@
+/** @odoo-module **/
+
+import { rpc } from "@web/core/network/rpc";
+
+// Leave calendar: fetches one month window at a time, prefetches the
+// neighbouring months when the browser is idle and caches every window
+// under the server version stamp so navigating back and forth is free.
+const CALENDAR_CACHE_PREFIX = 'eph_leave_calendar';
+const STATE_CLASSES = {
+    validate: 'eph_calendar_leave_validate',
+    validate1: 'eph_calendar_leave_confirm',
+    confirm: 'eph_calendar_leave_confirm',
+    draft: 'eph_calendar_leave_draft',
+    refuse: 'eph_calendar_leave_refuse',
+};
+
+function pad(value) {
+    return String(value).padStart(2, '0');
+}
+
+function monthKey(year, month) {
+    return `${year}-${pad(month + 1)}`;
+}
+
+function formatDate(date) {
+    return `${date.getFullYear()}-${pad(date.getMonth() + 1)}-${pad(date.getDate())}`;
+}
+
+const whenIdle = window.requestIdleCallback || ((callback) => setTimeout(callback, 200));
+
+export class LeaveCalendar {
+    constructor(container) {
+        this.container = container;
+        this.version = container.dataset.version || '';
+        this.windows = new Map();
+        this.pending = new Map();
+        const today = new Date();
+        this.year = today.getFullYear();
+        this.month = today.getMonth();
+    }
+
+    start() {
+        this.purgeStorage();
+        this.container.addEventListener('click', (ev) => {
+            const nav = ev.target.closest('[data-calendar-nav]');
+            if (nav) {
+                this.shift(parseInt(nav.dataset.calendarNav, 10));
+            }
+        });
+        return this.show();
+    }
+
+    shift(delta) {
+        const target = new Date(this.year, this.month + delta, 1);
+        this.year = target.getFullYear();
+        this.month = target.getMonth();
+        return this.show();
+    }
+
+    async show() {
+        const { year, month } = this;
+        const data = await this.load(year, month);
+        // Ignore stale responses when the user navigated in the meantime
+        if (year !== this.year || month !== this.month) {
+            return;
+        }
+        this.render(data);
+        whenIdle(() => {
+            this.load(year, month - 1);
+            this.load(year, month + 1);
+        });
+    }
+
+    cacheKey(key) {
+        return `${CALENDAR_CACHE_PREFIX}:${this.version}:${key}`;
+    }
+
+    readCache(key) {
+        if (this.windows.has(key)) {
+            return this.windows.get(key);
+        }
+        try {
+            const stored = window.sessionStorage.getItem(this.cacheKey(key));
+            if (stored) {
+                const data = JSON.parse(stored);
+                this.windows.set(key, data);
+                return data;
+            }
+        } catch {
+            // sessionStorage unavailable (private mode, quota): memory cache only
+        }
+        return null;
+    }
+
+    writeCache(key, data) {
+        this.windows.set(key, data);
+        try {
+            window.sessionStorage.setItem(this.cacheKey(key), JSON.stringify(data));
+        } catch {
+            // sessionStorage unavailable (private mode, quota): memory cache only
+        }
+    }
+
+    // Windows stored under another version, e.g. before a reload, are never read again
+    purgeStorage() {
+        const current = this.cacheKey('');
+        try {
+            for (let i = window.sessionStorage.length - 1; i >= 0; i--) {
+                const key = window.sessionStorage.key(i);
+                if (key && key.startsWith(`${CALENDAR_CACHE_PREFIX}:`) && !key.startsWith(current)) {
+                    window.sessionStorage.removeItem(key);
+                }
+            }
+        } catch {
+            // sessionStorage unavailable (private mode, quota): memory cache only
+        }
+    }
+
+    resetCache(version) {
+        this.windows.clear();
+        this.version = version;
+        this.purgeStorage();
+    }
+
+    load(year, month) {
+        const first = new Date(year, month, 1);
+        const key = monthKey(first.getFullYear(), first.getMonth());
+        const cached = this.readCache(key);
+        if (cached) {
+            return Promise.resolve(cached);
+        }
+        if (!this.pending.has(key)) {
+            const last = new Date(first.getFullYear(), first.getMonth() + 1, 0);
+            const promise = rpc('/my/employee/leaves/calendar', {
+                start_date: formatDate(first),
+                end_date: formatDate(last),
+            }).then((result) => {
+                if (result.version && result.version !== this.version) {
+                    this.resetCache(result.version);
+                }
+                this.writeCache(key, result);
+                return result;
+            }).finally(() => this.pending.delete(key));
+            this.pending.set(key, promise);
+        }
+        return this.pending.get(key);
+    }
+
+    render(data) {
+        const first = new Date(this.year, this.month, 1);
+        const daysInMonth = new Date(this.year, this.month + 1, 0).getDate();
+        // Monday-first grid
+        const offset = (first.getDay() + 6) % 7;
+        const byDay = new Map();
+        for (const leave of data.leaves || []) {
+            const from = leave.request_date_from || leave.date_from.slice(0, 10);
+            const to = leave.request_date_to || leave.date_to.slice(0, 10);
+            for (let day = 1; day <= daysInMonth; day++) {
+                const iso = formatDate(new Date(this.year, this.month, day));
+                if (iso >= from && iso <= to) {
+                    if (!byDay.has(day)) {
+                        byDay.set(day, []);
+                    }
+                    byDay.get(day).push(leave);
+                }
+            }
+        }
+
+        const holidaysByDay = new Map();
+        for (const holiday of data.holidays || []) {
+            for (let day = 1; day <= daysInMonth; day++) {
+                const iso = formatDate(new Date(this.year, this.month, day));
+                if (iso >= holiday.date_from && iso <= holiday.date_to) {
+                    holidaysByDay.set(day, holiday.name);
+                }
+            }
+        }
+
+        const title = first.toLocaleDateString(undefined, { month: 'long', year: 'numeric' });
+        const cells = [];
+        for (let i = 0; i < offset; i++) {
+            cells.push('<div class="eph_calendar_day eph_calendar_day_empty"></div>');
+        }
+        for (let day = 1; day <= daysInMonth; day++) {
+            const leaves = byDay.get(day) || [];
+            const badges = leaves.map((leave) => {
+                const stateClass = STATE_CLASSES[leave.state] || STATE_CLASSES.draft;
+                const label = escapeHtml(leave.leave_type_name || leave.name || '');
+                return `<div class="eph_calendar_leave ${stateClass}" title="${label}">${label}</div>`;
+            }).join('');
+            const holiday = holidaysByDay.get(day);
+            const holidayBadge = holiday !== undefined
+                ? `<div class="eph_calendar_holiday" title="${escapeHtml(holiday)}">${escapeHtml(holiday)}</div>`
+                : '';
+            const dayClass = holiday !== undefined ? 'eph_calendar_day eph_calendar_day_holiday' : 'eph_calendar_day';
+            cells.push(`<div class="${dayClass}"><span class="eph_calendar_day_number">${day}</span>${holidayBadge}${badges}</div>`);
+        }
+
+        this.container.innerHTML = `
+            <div class="eph_calendar_header d-flex justify-content-between align-items-center">
+                <button type="button" class="eph_btn eph_btn_sm eph_btn_outline_primary" data-calendar-nav="-1">
+                    <i class="fa fa-chevron-left"></i>
+                </button>
+                <h6 class="mb-0">${escapeHtml(title)}</h6>
+                <button type="button" class="eph_btn eph_btn_sm eph_btn_outline_primary" data-calendar-nav="1">
+                    <i class="fa fa-chevron-right"></i>
+                </button>
+            </div>
+            <div class="eph_calendar_grid">${cells.join('')}</div>`;
+    }
+}
+
+const HTML_ESCAPES = {
+    '&': '&amp;',
+    '<': '&lt;',
+    '>': '&gt;',
+    '"': '&quot;',
+    "'": '&#39;',
+};
+
+// Safe in text and in quoted attribute values
+function escapeHtml(value) {
+    return String(value).replace(/[&<>"']/g, (char) => HTML_ESCAPES[char]);
+}
@@ -0,0 +1,251 @@
+/** @odoo-module **/
+
+import { rpc } from "@web/core/network/rpc";
+
+// Resumable uploads: supporting documents are sent in chunks before the
+// leave form is posted, so a dropped connection resumes from the last
+// acknowledged offset instead of restarting the whole request.
+const UPLOAD_TOKENS_KEY = 'eph_leave_upload_tokens';
+const UPLOAD_MAX_RETRIES = 5;
+
+function fileFingerprint(file) {
+    return `${file.name}:${file.size}:${file.lastModified}`;
+}
+
+function readUploadTokens() {
+    try {
+        return JSON.parse(window.localStorage.getItem(UPLOAD_TOKENS_KEY)) || {};
+    } catch {
+        return {};
+    }
+}
+
+function storeUploadToken(file, token) {
+    const tokens = readUploadTokens();
+    if (token) {
+        tokens[fileFingerprint(file)] = token;
+    } else {
+        delete tokens[fileFingerprint(file)];
+    }
+    try {
+        window.localStorage.setItem(UPLOAD_TOKENS_KEY, JSON.stringify(tokens));
+    } catch {
+        // localStorage unavailable: uploads still work, they just cannot resume after a reload
+    }
+}
+
+async function startOrResumeUpload(file) {
+    const token = readUploadTokens()[fileFingerprint(file)];
+    if (token) {
+        const status = await rpc(`/my/leave_requests/upload/${token}/status`, {});
+        if (!status.error && status.state === 'uploading') {
+            return { token, offset: status.offset, chunkSize: 1024 * 1024 };
+        }
+    }
+    const result = await rpc('/my/leave_requests/upload/init', { filename: file.name, size: file.size });
+    if (result.error) {
+        throw new Error(result.error);
+    }
+    storeUploadToken(file, result.token);
+    return { token: result.token, offset: result.offset, chunkSize: result.chunk_size };
+}
+
+async function uploadResumable(file) {
+    let { token, offset, chunkSize } = await startOrResumeUpload(file);
+    let retries = 0;
+    while (offset < file.size) {
+        const params = new URLSearchParams({ offset, csrf_token: odoo.csrf_token });
+        try {
+            const response = await fetch(`/my/leave_requests/upload/${token}/chunk?${params}`, {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/octet-stream' },
+                body: file.slice(offset, offset + chunkSize),
+            });
+            const result = await response.json();
+            if (response.status === 404 || (response.status === 409 && result.offset === offset)) {
+                throw new Error(result.error);
+            }
+            // On 409 the server tells where to resume from
+            offset = result.offset;
+            retries = 0;
+        } catch (error) {
+            if (error instanceof TypeError && retries < UPLOAD_MAX_RETRIES) {
+                // Network failure: back off, then resume from the acknowledged offset
+                retries++;
+                await new Promise((resolve) => setTimeout(resolve, 1000 * 2 ** retries));
+                const status = await rpc(`/my/leave_requests/upload/${token}/status`, {});
+                offset = status.offset || 0;
+                continue;
+            }
+            throw error;
+        }
+    }
+    storeUploadToken(file, null);
+    return token;
+}
+
+// Live duration preview: the server caches working time per calendar and
+// year, and each period is memoized here so re-picking dates is instant.
+const durationCache = new Map();
+
+function fetchDuration(dateFrom, dateTo) {
+    const key = `${dateFrom}:${dateTo}`;
+    if (!durationCache.has(key)) {
+        const promise = rpc('/my/leave_requests/duration', { date_from: dateFrom, date_to: dateTo });
+        promise.catch(() => durationCache.delete(key));
+        durationCache.set(key, promise);
+    }
+    return durationCache.get(key);
+}
+
+/**
+ * Behaviour of a leave request form: extra date ranges, resumable upload
+ * of the supporting documents, duration preview and department overlap
+ * warning. The form widget delegates its events here.
+ */
+export class LeaveRequestForm {
+    constructor(form) {
+        this.form = form;
+        this.preview = form.querySelector('.eph_leave_duration_preview');
+        this.warning = form.querySelector('.eph_leave_overlap_warning');
+        this.previewRequestId = 0;
+        this.overlapRequestId = 0;
+    }
+
+    start() {
+        this.updatePreview();
+        this.updateOverlapWarning();
+    }
+
+    periods() {
+        const toInputs = this.form.querySelectorAll('input[name="request_date_to"]');
+        const periods = [];
+        this.form.querySelectorAll('input[name="request_date_from"]').forEach((fromInput, index) => {
+            const toInput = toInputs[index];
+            if (fromInput.value && toInput && toInput.value) {
+                periods.push([fromInput.value, toInput.value]);
+            }
+        });
+        return periods;
+    }
+
+    onDateChange() {
+        this.updatePreview();
+        this.updateOverlapWarning();
+    }
+
+    // Multi-range leave form: each extra row posts another date pair
+    addRange() {
+        const container = this.form.querySelector('.eph_leave_ranges');
+        const rows = container.querySelectorAll('.eph_leave_range');
+        const row = rows[rows.length - 1].cloneNode(true);
+        const index = rows.length;
+        row.querySelectorAll('input').forEach((input) => {
+            input.value = '';
+            input.id = `${input.name}_${index}`;
+        });
+        row.querySelectorAll('label').forEach((label) => {
+            label.htmlFor = label.htmlFor.replace(/_\d+$/, `_${index}`);
+        });
+        container.appendChild(row);
+    }
+
+    async submit(ev) {
+        const input = this.form.querySelector('input[type="file"][name="attachment"]');
+        // Offline, the form is posted as is and queued by the service worker
+        if (!input || !window.fetch || !input.files.length || this.form.dataset.uploaded || !navigator.onLine) {
+            return;
+        }
+        ev.preventDefault();
+        const submitBtn = this.form.querySelector('button[type="submit"]');
+        submitBtn?.classList.add('eph_loading');
+        try {
+            for (const file of input.files) {
+                const token = await uploadResumable(file);
+                const hidden = document.createElement('input');
+                hidden.type = 'hidden';
+                hidden.name = 'upload_token';
+                hidden.value = token;
+                this.form.appendChild(hidden);
+            }
+            // Files are already on the server: do not post them twice
+            input.value = '';
+            this.form.dataset.uploaded = '1';
+            this.form.submit();
+        } catch (error) {
+            submitBtn?.classList.remove('eph_loading');
+            window.alert(error.message);
+        }
+    }
+
+    async updatePreview() {
+        if (!this.preview) {
+            return;
+        }
+        const currentId = ++this.previewRequestId;
+        const periods = this.periods();
+        if (!periods.length) {
+            this.preview.textContent = '';
+            return;
+        }
+        const results = await Promise.all(periods.map(([dateFrom, dateTo]) => fetchDuration(dateFrom, dateTo)));
+        if (currentId !== this.previewRequestId) {
+            return;
+        }
+        const error = results.find((result) => result.error);
+        if (error) {
+            this.preview.textContent = error.error;
+            return;
+        }
+        const days = results.reduce((total, result) => total + result.days, 0);
+        const hours = results.reduce((total, result) => total + result.hours, 0);
+        const holidays = [...new Set(results.flatMap((result) => result.holidays || []))];
+        this.preview.textContent = `This request will use ${days} working day(s) (${Math.round(hours * 100) / 100} hours).` +
+            (holidays.length ? ` Public holidays not counted: ${holidays.join(', ')}.` : '');
+    }
+
+    // Department overlap warning: served from the server's in-memory
+    // interval index, so it is refreshed on every date change.
+    async updateOverlapWarning() {
+        const warning = this.warning;
+        if (!warning) {
+            return;
+        }
+        const currentId = ++this.overlapRequestId;
+        const results = await Promise.all(this.periods().map(([dateFrom, dateTo]) => rpc('/my/leave_requests/overlaps', {
+            date_from: dateFrom,
+            date_to: dateTo,
+            leave_id: warning.dataset.leaveId || false,
+        })));
+        if (currentId !== this.overlapRequestId) {
+            return;
+        }
+        const seen = new Set();
+        const lines = [];
+        results.forEach((result) => {
+            (result.overlaps || []).forEach((overlap) => {
+                const line = `${overlap.employee_name}: ${overlap.date_from} to ${overlap.date_to}` +
+                    (overlap.approved ? '' : ' (pending)');
+                if (!seen.has(line)) {
+                    seen.add(line);
+                    lines.push(line);
+                }
+            });
+        });
+        warning.replaceChildren();
+        warning.classList.toggle('d-none', !lines.length);
+        if (!lines.length) {
+            return;
+        }
+        const title = document.createElement('strong');
+        title.textContent = `${lines.length} colleague(s) from your department are off during this period:`;
+        const list = document.createElement('ul');
+        list.className = 'mb-0';
+        lines.forEach((line) => {
+            const item = document.createElement('li');
+            item.textContent = line;
+            list.appendChild(item);
+        });
+        warning.append(title, list);
+    }
+}
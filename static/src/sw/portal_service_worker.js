@@ -0,0 +1,310 @@
+/* Employee Portal Hub service worker, served from /my/service-worker.js
+ * so that it controls the /my/ pages only.
+ *
+ * - bundles are served cache-first (their URLs are versioned), other
+ *   static files stale-while-revalidate,
+ * - leave lists, payslips and downloaded documents are served
+ *   stale-while-revalidate,
+ * - other portal pages are network-first with the last copy or the
+ *   offline page as fallback,
+ * - leave requests posted offline are stored in IndexedDB and replayed
+ *   through /my/leave_requests/new when the connection returns.
+ *
+ * Caches are namespaced by user, so another user logging in on the same
+ * device never sees them, and the user's caches and drafts are deleted on
+ * logout or as soon as a portal request is redirected to the login page.
+ */
+const USER = new URL(self.location).searchParams.get('uid') || 'anonymous';
+const VERSION = 'v2';
+const SHELL_CACHE = `eph-shell-${VERSION}-${USER}`;
+const PAGES_CACHE = `eph-pages-${VERSION}-${USER}`;
+const ASSETS_CACHE = `eph-assets-${VERSION}`;
+const CACHES = [SHELL_CACHE, PAGES_CACHE, ASSETS_CACHE];
+const MAX_CACHED_PAGES = 50;
+const MAX_CACHED_ASSETS = 100;
+
+const OFFLINE_URL = '/my/offline';
+const SHELL_URLS = ['/my/dashboard', '/my/leave_requests'];
+const LEAVE_FORM_URL = '/my/leave_requests/new';
+const STALE_WHILE_REVALIDATE = [
+    /^\/my\/leave_requests(\/page\/\d+)?$/,
+    /^\/my\/payslips(\/page\/\d+)?$/,
+    /^\/my\/payslips\/\d+$/,
+    /^\/my\/documents\/\d+\/download$/,
+];
+
+const DRAFTS_DB = `eph-leave-drafts-${USER}`;
+const DRAFTS_STORE = 'drafts';
+const SYNC_TAG = 'eph-leave-drafts';
+
+self.addEventListener('install', (event) => {
+    event.waitUntil((async () => {
+        const cache = await caches.open(SHELL_CACHE);
+        await cache.add(OFFLINE_URL);
+        // The shell pages are a convenience: missing ones are cached on visit
+        await Promise.all(SHELL_URLS.map((url) => cache.add(url).catch(() => null)));
+        await self.skipWaiting();
+    })());
+});
+
+self.addEventListener('activate', (event) => {
+    event.waitUntil((async () => {
+        const names = await caches.keys();
+        await Promise.all(names
+            .filter((name) => name.startsWith('eph-') && !CACHES.includes(name))
+            .map((name) => caches.delete(name)));
+        await self.clients.claim();
+        await replayDrafts();
+    })());
+});
+
+self.addEventListener('fetch', (event) => {
+    const request = event.request;
+    const url = new URL(request.url);
+    if (url.origin !== self.location.origin) {
+        return;
+    }
+    if (request.method === 'POST' && url.pathname === LEAVE_FORM_URL) {
+        event.respondWith(postLeaveRequest(request));
+        return;
+    }
+    if (request.method !== 'GET') {
+        return;
+    }
+    if (url.pathname.startsWith('/web/assets/') && !url.pathname.startsWith('/web/assets/debug/')) {
+        event.respondWith(cacheFirst(request));
+    } else if (url.pathname.includes('/static/')) {
+        event.respondWith(staleWhileRevalidate(event, request, ASSETS_CACHE, MAX_CACHED_ASSETS));
+    } else if (STALE_WHILE_REVALIDATE.some((pattern) => pattern.test(url.pathname))) {
+        event.respondWith(staleWhileRevalidate(event, request, PAGES_CACHE, MAX_CACHED_PAGES));
+    } else if (request.mode === 'navigate' && url.pathname.startsWith('/my/')) {
+        event.respondWith(networkFirst(request));
+    }
+});
+
+self.addEventListener('sync', (event) => {
+    if (event.tag === SYNC_TAG) {
+        event.waitUntil(replayDrafts());
+    }
+});
+
+self.addEventListener('message', (event) => {
+    if (event.data && event.data.type === 'eph-replay-drafts') {
+        event.waitUntil(replayDrafts());
+    } else if (event.data && event.data.type === 'eph-logout') {
+        event.waitUntil(clearUserData().finally(() => event.ports[0]?.postMessage('done')));
+    }
+});
+
+// Logout
+
+async function clearUserData() {
+    const names = await caches.keys();
+    await Promise.all(names
+        .filter((name) => name.startsWith('eph-') && name !== ASSETS_CACHE)
+        .map((name) => caches.delete(name)));
+    await new Promise((resolve) => {
+        const request = indexedDB.deleteDatabase(DRAFTS_DB);
+        request.onsuccess = request.onerror = request.onblocked = resolve;
+    });
+    await self.registration.unregister();
+}
+
+function isLoginRedirect(response) {
+    return response.redirected && new URL(response.url).pathname.startsWith('/web/login');
+}
+
+// Caching strategies
+
+function isCacheable(response) {
+    // Redirected responses are login pages or error redirections
+    return response && response.ok && response.type === 'basic' && !response.redirected;
+}
+
+async function putInCache(cacheName, maxEntries, request, response) {
+    const cache = await caches.open(cacheName);
+    await cache.put(request, response);
+    const keys = await cache.keys();
+    await Promise.all(keys.slice(0, Math.max(keys.length - maxEntries, 0)).map((key) => cache.delete(key)));
+}
+
+async function checkSession(response) {
+    // The session ended elsewhere: nothing of this user may stay on the device
+    if (isLoginRedirect(response)) {
+        await clearUserData();
+    }
+    return response;
+}
+
+async function cacheFirst(request) {
+    const cached = await caches.match(request);
+    if (cached) {
+        return cached;
+    }
+    const response = await fetch(request);
+    if (isCacheable(response)) {
+        await putInCache(ASSETS_CACHE, MAX_CACHED_ASSETS, request, response.clone());
+    }
+    return response;
+}
+
+async function staleWhileRevalidate(event, request, cacheName, maxEntries) {
+    const cached = await caches.match(request);
+    const network = fetch(request).then(checkSession).then(async (response) => {
+        if (isCacheable(response)) {
+            await putInCache(cacheName, maxEntries, request, response.clone());
+        }
+        return response;
+    });
+    if (cached) {
+        event.waitUntil(network.catch(() => null));
+        return cached;
+    }
+    return network.catch(() => offlineFallback(request));
+}
+
+async function networkFirst(request) {
+    try {
+        const response = await checkSession(await fetch(request));
+        if (isCacheable(response)) {
+            await putInCache(PAGES_CACHE, MAX_CACHED_PAGES, request, response.clone());
+        }
+        return response;
+    } catch {
+        return offlineFallback(request);
+    }
+}
+
+async function offlineFallback(request) {
+    const cached = await caches.match(request);
+    if (cached) {
+        return cached;
+    }
+    if (request.mode !== 'navigate') {
+        return Response.error();
+    }
+    return (await caches.match(OFFLINE_URL, { ignoreSearch: true })) || Response.error();
+}
+
+// Offline leave requests
+
+function openDrafts() {
+    return new Promise((resolve, reject) => {
+        const open = indexedDB.open(DRAFTS_DB, 1);
+        open.onupgradeneeded = () => open.result.createObjectStore(DRAFTS_STORE, { autoIncrement: true });
+        open.onsuccess = () => resolve(open.result);
+        open.onerror = () => reject(open.error);
+    });
+}
+
+async function draftsTransaction(mode, operation) {
+    const db = await openDrafts();
+    return new Promise((resolve, reject) => {
+        const transaction = db.transaction(DRAFTS_STORE, mode);
+        const result = operation(transaction.objectStore(DRAFTS_STORE));
+        transaction.oncomplete = () => resolve(result);
+        transaction.onerror = () => reject(transaction.error);
+    });
+}
+
+function listDrafts() {
+    return draftsTransaction('readonly', (store) => {
+        const drafts = [];
+        store.openCursor().onsuccess = (event) => {
+            const cursor = event.target.result;
+            if (cursor) {
+                drafts.push({ key: cursor.key, entries: cursor.value.entries });
+                cursor.continue();
+            }
+        };
+        return drafts;
+    });
+}
+
+function addDraft(entries) {
+    return draftsTransaction('readwrite', (store) => store.add({ entries, queued: Date.now() }));
+}
+
+function deleteDraft(key) {
+    return draftsTransaction('readwrite', (store) => store.delete(key));
+}
+
+async function postLeaveRequest(request) {
+    const body = request.clone();
+    try {
+        return await fetch(request);
+    } catch {
+        // Offline: keep the posted form (files included) and send it later
+        const form = await body.formData();
+        await addDraft([...form.entries()]);
+        if (self.registration.sync) {
+            await self.registration.sync.register(SYNC_TAG).catch(() => null);
+        }
+        return Response.redirect(`${OFFLINE_URL}?queued=1`, 303);
+    }
+}
+
+async function fetchCsrfToken() {
+    // The token posted offline may have expired: take a fresh one from the form
+    try {
+        const response = await checkSession(await fetch(LEAVE_FORM_URL, { credentials: 'same-origin' }));
+        if (!response.ok || response.redirected) {
+            return null;
+        }
+        const match = (await response.text()).match(/name="csrf_token"[^>]*value="([^"]+)"/);
+        return match && match[1];
+    } catch {
+        return null;
+    }
+}
+
+let replaying = null;
+
+function replayDrafts() {
+    if (!replaying) {
+        replaying = sendDrafts().finally(() => {
+            replaying = null;
+        });
+    }
+    return replaying;
+}
+
+async function sendDrafts() {
+    const drafts = await listDrafts();
+    if (!drafts.length) {
+        return;
+    }
+    const token = await fetchCsrfToken();
+    if (!token) {
+        return;
+    }
+    let sent = 0;
+    let failed = 0;
+    for (const { key, entries } of drafts) {
+        const body = new FormData();
+        for (const [name, value] of entries) {
+            body.append(name, name === 'csrf_token' ? token : value);
+        }
+        let response;
+        try {
+            response = await fetch(LEAVE_FORM_URL, {
+                method: 'POST',
+                body,
+                credentials: 'same-origin',
+                redirect: 'manual',
+            });
+        } catch {
+            // Offline again: the remaining drafts wait for the next attempt
+            break;
+        }
+        // The form redirects once the leave is saved and renders its errors otherwise
+        if (response.type === 'opaqueredirect') {
+            sent++;
+        } else {
+            failed++;
+        }
+        await deleteDraft(key);
+    }
+    const clients = await self.clients.matchAll({ type: 'window' });
+    clients.forEach((client) => client.postMessage({ type: 'eph-drafts-replayed', sent, failed }));
+}
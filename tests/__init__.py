@@ -3,3 +3,8 @@
 from . import test_employee_portal_hub
 from . import test_portal_security
 from . import test_dashboard_integration
+from . import test_leave_portal_services
+from . import test_portal_access_services
+from . import test_employee_document
+from . import test_employee_announcement
+from . import test_portal_uploads
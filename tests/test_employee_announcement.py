@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+
+from datetime import timedelta
+
+from odoo import fields
+from odoo.tests import tagged, TransactionCase
+
+from odoo.addons.employee_portal_hub.models.employee_announcement import ANNOUNCEMENT_FEED_SIZE
+
+
+@tagged('employee_portal_hub', 'post_install', '-at_install')
+class TestEmployeeAnnouncement(TransactionCase):
+    """Test the cached announcements feed and the read marks"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.sales = cls.env['hr.department'].create({'name': 'Announcement Sales'})
+        cls.support = cls.env['hr.department'].create({'name': 'Announcement Support'})
+        cls.user = cls.env['res.users'].create({
+            'name': 'Announcement User',
+            'login': 'announcement_user',
+            'groups_id': [(6, 0, [cls.env.ref('base.group_portal').id])],
+        })
+        cls.employee = cls.env['hr.employee'].create({
+            'name': 'Announcement Employee',
+            'department_id': cls.sales.id,
+            'user_id': cls.user.id,
+        })
+        cls.Announcement = cls.env['employee.announcement']
+        cls.now = fields.Datetime.now()
+
+    def test_feed_targeting(self):
+        """The feed holds the company-wide and matching department announcements"""
+        everyone = self.Announcement.create({'name': 'Everyone', 'publish_date': self.now - timedelta(hours=2)})
+        sales = self.Announcement.create({
+            'name': 'Sales only',
+            'department_ids': [(6, 0, self.sales.ids)],
+            'publish_date': self.now - timedelta(hours=1),
+        })
+        self.Announcement.create({'name': 'Support only', 'department_ids': [(6, 0, self.support.ids)]})
+        self.Announcement.create({'name': 'Scheduled', 'publish_date': self.now + timedelta(days=1)})
+        self.Announcement.create({
+            'name': 'Expired',
+            'publish_date': self.now - timedelta(days=10),
+            'expiry_date': fields.Date.today() - timedelta(days=1),
+        })
+
+        feed = self.Announcement._get_portal_feed(self.employee)
+        self.assertEqual([announcement['id'] for announcement in feed], [sales.id, everyone.id])
+
+    def test_feed_reaches_sub_departments(self):
+        """Announcements for a department reach the employees of its sub-departments"""
+        division = self.env['hr.department'].create({'name': 'Announcement Division'})
+        announcement = self.Announcement.create({
+            'name': 'Division news',
+            'department_ids': [(6, 0, division.ids)],
+            'publish_date': self.now - timedelta(hours=1),
+        })
+        self.assertFalse(self.Announcement._get_portal_feed(self.employee))
+
+        self.sales.parent_id = division
+        feed = self.Announcement._get_portal_feed(self.employee)
+        self.assertEqual([a['id'] for a in feed], [announcement.id])
+
+    def test_feed_limit_skips_expired(self):
+        """Expired and scheduled announcements do not take room in the feed"""
+        self.Announcement.create([{
+            'name': 'Expired %s' % i,
+            'publish_date': self.now - timedelta(days=10),
+            'expiry_date': fields.Date.today() - timedelta(days=1),
+        } for i in range(ANNOUNCEMENT_FEED_SIZE)] + [{
+            'name': 'Scheduled %s' % i,
+            'publish_date': self.now + timedelta(days=1),
+        } for i in range(ANNOUNCEMENT_FEED_SIZE)])
+        live = self.Announcement.create({'name': 'Live', 'publish_date': self.now - timedelta(days=20)})
+
+        feed = self.Announcement._get_portal_feed(self.employee)
+        self.assertEqual([announcement['id'] for announcement in feed], [live.id])
+
+    def test_feed_cache_invalidation(self):
+        """Publishing an announcement refreshes the cached audience lists"""
+        self.assertFalse(self.Announcement._get_portal_feed(self.employee))
+        announcement = self.Announcement.create({'name': 'Fresh news', 'publish_date': self.now})
+        self.assertEqual([a['id'] for a in self.Announcement._get_portal_feed(self.employee)], [announcement.id])
+        announcement.active = False
+        self.assertFalse(self.Announcement._get_portal_feed(self.employee))
+
+    def test_read_mark(self):
+        """One row per user tracks what was seen, later announcements are unread"""
+        Seen = self.env['employee.announcement.seen']
+        first = self.Announcement.create({'name': 'First', 'publish_date': self.now - timedelta(hours=2)})
+        self.Announcement.create({'name': 'Second', 'publish_date': self.now - timedelta(hours=1)})
+        self.assertEqual(self.Announcement._get_portal_unread_count(self.employee, self.user), 2)
+
+        Seen._mark_seen(self.user, first.publish_date)
+        self.assertEqual(self.Announcement._get_portal_unread_count(self.employee, self.user), 1)
+
+        feed = self.Announcement._get_portal_feed(self.employee)
+        Seen._mark_seen(self.user, feed[0]['publish_date'])
+        # An older mark never moves the high-water mark back
+        Seen._mark_seen(self.user, first.publish_date)
+        self.assertEqual(self.Announcement._get_portal_unread_count(self.employee, self.user), 0)
+        self.assertEqual(Seen.search_count([('user_id', '=', self.user.id)]), 1)
@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 
 from odoo.tests.common import TransactionCase
-from odoo.exceptions import ValidationError
+from odoo.exceptions import AccessError, UserError, ValidationError
 from datetime import datetime, timedelta
 
 
@@ -83,7 +83,7 @@ class TestEmployeeDocument(TransactionCase):
         action = document.download_document()
         
         self.assertEqual(action['type'], 'ir.actions.act_url')
-        self.assertIn(str(self.test_attachment.id), action['url'])
+        self.assertEqual(action['url'], '/my/documents/%s/download' % document.id)
         self.assertEqual(action['target'], 'self')
 
     def test_document_download_no_attachment(self):
@@ -163,3 +163,172 @@ class TestEmployeeDocument(TransactionCase):
         
         self.assertTrue(document.message_ids)
         self.assertEqual(document.message_ids[0].body, "<p>Test message</p>")
+
+    def test_shared_attachment_dedup(self):
+        """Identical contents are stored in a single attachment"""
+        Document = self.env['employee.document']
+        first = Document._get_shared_attachment('Handbook.pdf', b'Company handbook')
+        second = Document._get_shared_attachment('Handbook copy.pdf', b'Company handbook')
+        other = Document._get_shared_attachment('Policy.pdf', b'Travel policy')
+
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, other)
+
+        # Companies never share a file
+        company = self.env['res.company'].create({'name': 'Dedup Company'})
+        self.assertNotEqual(
+            Document._get_shared_attachment('Handbook.pdf', b'Company handbook', company=company), first)
+
+    def test_publish_shares_attachment(self):
+        """Publishing a document to many employees references one file"""
+        employees = self.test_employee | self.env['hr.employee'].create([{
+            'name': 'Publish Employee %s' % index,
+        } for index in range(3)])
+
+        documents = self.env['employee.document']._publish(employees, {
+            'document_name': 'Employee Handbook',
+            'document_type': 'handbook',
+            'document_category': 'company',
+        }, raw=b'Company handbook')
+
+        self.assertEqual(documents.employee_id, employees)
+        self.assertEqual(len(documents.attachment_id), 1)
+        self.assertEqual(set(documents.mapped('checksum')), {documents.attachment_id.checksum})
+        self.assertFalse(documents.message_follower_ids)
+
+    def test_publish_requires_file(self):
+        """Publishing without content nor attachment is refused up front"""
+        with self.assertRaises(UserError):
+            self.env['employee.document']._publish(self.test_employee, {
+                'document_name': 'Empty Document',
+                'document_type': 'other',
+            })
+        self.assertFalse(self.env['employee.document'].search([('document_name', '=', 'Empty Document')]))
+
+    def test_full_text_search(self):
+        """Indexed documents are found by name and file content, best match first"""
+        Document = self.env['employee.document']
+        policy = Document.create({
+            'document_name': 'Travel Policy',
+            'employee_id': self.test_employee.id,
+            'document_type': 'policy',
+            'attachment_id': Document._get_shared_attachment(
+                'travel.txt', b'Expenses for business trips are reimbursed monthly', 'text/plain').id,
+        })
+        handbook = Document.create({
+            'document_name': 'Employee Handbook',
+            'employee_id': self.test_employee.id,
+            'document_type': 'handbook',
+            'description': 'Includes the travel rules',
+        })
+        self.assertFalse(policy.content_indexed)
+
+        Document._cron_index_documents()
+        self.assertTrue(policy.content_indexed)
+
+        total, documents = Document._search_portal_documents(self.test_employee, 'travel')
+        self.assertEqual(total, 2)
+        self.assertEqual(documents.ids, [policy.id, handbook.id])
+
+        total, documents = Document._search_portal_documents(self.test_employee, 'reimbursed trips')
+        self.assertEqual(documents, policy)
+
+        total, documents = Document._search_portal_documents(self.test_employee, 'travel', limit=1, offset=1)
+        self.assertEqual(total, 2)
+        self.assertEqual(documents, handbook)
+
+        policy.document_name = 'Mobility Policy'
+        self.assertFalse(policy.content_indexed)
+
+    def test_mark_all_read(self):
+        """All unread documents of the employee are marked in one go"""
+        documents = self.env['employee.document'].create([{
+            'document_name': 'Bulk Read %s' % index,
+            'employee_id': self.test_employee.id,
+            'attachment_id': self.test_attachment.id,
+        } for index in range(3)])
+        documents[0].mark_as_read()
+        first_read = documents[0].read_date
+
+        marked = self.env['employee.document']._mark_all_read(self.test_employee)
+
+        self.assertEqual(set(marked), set(documents[1:].ids))
+        self.assertTrue(all(documents.mapped('read_date')))
+        self.assertEqual(documents[0].read_date, first_read)
+
+    def test_acknowledgement_report(self):
+        """Acknowledgement rates are grouped per document and department"""
+        department = self.env['hr.department'].create({'name': 'Acknowledgement Department'})
+        employees = self.env['hr.employee'].create([{
+            'name': 'Acknowledgement Employee %s' % index,
+            'department_id': department.id,
+        } for index in range(4)])
+        documents = self.env['employee.document']._publish(employees, {
+            'document_name': 'Code of Conduct',
+            'document_type': 'policy',
+            'is_mandatory_read': True,
+        }, raw=b'Code of conduct')
+        optional = self.env['employee.document'].create({
+            'document_name': 'Optional Reading',
+            'employee_id': self.test_employee.id,
+        })
+
+        users = self.env['res.users'].create([{
+            'name': employee.name,
+            'login': 'acknowledgement_%s' % index,
+            'groups_id': [(6, 0, [self.env.ref('base.group_portal').id])],
+        } for index, employee in enumerate(employees)])
+        for employee, user in zip(employees, users):
+            employee.user_id = user
+
+        for document in documents[:3]:
+            document.with_user(document.employee_id.user_id).action_acknowledge()
+        optional.with_user(self.test_user).action_acknowledge()
+        self.assertTrue(all(documents[:3].mapped('read_date')))
+        self.assertFalse(optional.acknowledged_date)
+        # Nobody acknowledges on behalf of the employee
+        with self.assertRaises(AccessError):
+            documents[3].action_acknowledge()
+
+        self.env.flush_all()
+        groups = self.env['employee.document.compliance.report']._read_group(
+            [('document_name', '=', 'Code of Conduct')],
+            groupby=['department_id'],
+            aggregates=['acknowledgement_rate:avg', 'acknowledged_count:sum', '__count'],
+        )
+        self.assertEqual(groups, [(department, 75.0, 3, 4)])
+
+    def test_expiry_scanner_digest(self):
+        """Expiring documents are notified once, in one digest per employee"""
+        self.env['ir.config_parameter'].sudo().set_param('employee_portal_hub.document_expiry_horizons', '30,7,0')
+        today = datetime.now().date()
+        Document = self.env['employee.document']
+        soon, later, far, expired = Document.create([{
+            'document_name': 'Expiry %s' % days,
+            'employee_id': self.test_employee.id,
+            'document_type': 'permit',
+            'expiry_date': today + timedelta(days=days),
+        } for days in (5, 20, 60, -3)])
+        mails_before = self.env['mail.mail'].search_count([])
+
+        Document._cron_scan_expiring_documents(batch_size=2)
+
+        self.assertEqual((soon.expiry_reminder_level, later.expiry_reminder_level,
+                          far.expiry_reminder_level, expired.expiry_reminder_level), (2, 1, 0, 3))
+        self.assertFalse(any((soon | later | expired).mapped('expiry_notice_pending')))
+        employee_mails = self.env['mail.mail'].search([
+            ('recipient_ids', 'in', self.test_user.partner_id.ids)])
+        self.assertEqual(len(employee_mails), 1)
+        self.assertIn('Expiry 5', employee_mails.body_html)
+        self.assertNotIn('Expiry 60', employee_mails.body_html)
+        self.assertIn('%s/my/documents' % soon.get_base_url(), employee_mails.body_html)
+
+        # A second run has nothing new to notify
+        mails_after = self.env['mail.mail'].search_count([])
+        Document._cron_scan_expiring_documents(batch_size=2)
+        self.assertEqual(self.env['mail.mail'].search_count([]), mails_after)
+        self.assertGreater(mails_after, mails_before)
+
+        # Moving the expiry date restarts the reminders
+        soon.expiry_date = today + timedelta(days=25)
+        self.assertEqual(soon.expiry_reminder_level, 0)
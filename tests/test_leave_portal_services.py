@@ -0,0 +1,347 @@
+# -*- coding: utf-8 -*-
+
+from odoo.tests import tagged, TransactionCase
+from odoo import fields
+from odoo.exceptions import UserError
+from datetime import date, timedelta
+from unittest.mock import patch
+
+from odoo.addons.employee_portal_hub.models import leave_interval_index
+from odoo.addons.employee_portal_hub.models.leave_interval_index import LeaveIntervalIndex
+
+
+@tagged('employee_portal_hub', 'post_install', '-at_install')
+class TestLeavePortalServices(TransactionCase):
+    """Test the cached leave services backing the portal leave forms"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.portal_user = cls.env['res.users'].create({
+            'name': 'Leave Services User',
+            'login': 'leave_services_test',
+            'email': 'leave_services@test.com',
+            'groups_id': [(6, 0, [cls.env.ref('base.group_portal').id])]
+        })
+
+        cls.employee = cls.env['hr.employee'].create({
+            'name': 'Leave Services Employee',
+            'user_id': cls.portal_user.id,
+            'work_email': 'leave_services@test.com',
+        })
+
+        cls.free_type = cls.env['hr.leave.type'].create({
+            'name': 'Test Unpaid Leave',
+            'request_unit': 'day',
+            'requires_allocation': 'no',
+        })
+
+        cls.allocated_type = cls.env['hr.leave.type'].create({
+            'name': 'Test Paid Leave',
+            'request_unit': 'day',
+            'requires_allocation': 'yes',
+        })
+
+    def _portal_type_ids(self, include_type_ids=()):
+        leave_types = self.env['hr.leave.type']._get_portal_leave_types(self.employee, include_type_ids)
+        return {leave_type['id']: leave_type for leave_type in leave_types}
+
+    def test_leave_types_without_allocation_hidden(self):
+        """Types requiring an allocation are hidden until the employee has one"""
+        leave_types = self._portal_type_ids()
+        self.assertIn(self.free_type.id, leave_types)
+        self.assertNotIn(self.allocated_type.id, leave_types)
+
+        # The type of the leave being edited is always kept
+        self.assertIn(self.allocated_type.id, self._portal_type_ids([self.allocated_type.id]))
+
+    def test_leave_types_with_remaining_balance(self):
+        """Allocated types are listed with their remaining balance"""
+        allocation = self.env['hr.leave.allocation'].create({
+            'name': 'Test Allocation',
+            'employee_id': self.employee.id,
+            'holiday_status_id': self.allocated_type.id,
+            'number_of_days': 5,
+            'date_from': fields.Date.today().replace(month=1, day=1),
+        })
+        allocation.action_validate()
+
+        leave_types = self._portal_type_ids()
+        self.assertIn(self.allocated_type.id, leave_types)
+        self.assertEqual(leave_types[self.allocated_type.id]['remaining'], 5)
+
+    def test_remaining_balance_ignores_previous_periods(self):
+        """Leaves taken under an expired allocation do not consume the current one"""
+        last_year = fields.Date.today().replace(month=1, day=1) - timedelta(days=365)
+        allocations = self.env['hr.leave.allocation'].create([{
+            'name': 'Test Allocation %s' % date_from.year,
+            'employee_id': self.employee.id,
+            'holiday_status_id': self.allocated_type.id,
+            'number_of_days': 5,
+            'date_from': date_from,
+            'date_to': date_from.replace(month=12, day=31),
+        } for date_from in (last_year, fields.Date.today().replace(month=1, day=1))])
+        allocations.action_validate()
+        monday = last_year + timedelta(days=7 - last_year.weekday())
+        self.env['hr.leave'].with_context(leave_skip_date_check=True).create({
+            'employee_id': self.employee.id,
+            'holiday_status_id': self.allocated_type.id,
+            'request_date_from': monday,
+            'request_date_to': monday + timedelta(days=1),
+        })
+
+        balances = self.env['hr.leave.type']._get_portal_remaining_balances(self.employee)
+        self.assertEqual(balances[self.allocated_type.id], 5)
+
+    def test_leave_type_catalogue_invalidation(self):
+        """Writing a leave type refreshes the cached catalogue"""
+        catalogue = self.env['hr.leave.type']._get_portal_leave_type_catalogue(self.employee.company_id.id)
+        self.assertIn(self.free_type.id, [leave_type['id'] for leave_type in catalogue])
+
+        self.free_type.active = False
+        catalogue = self.env['hr.leave.type']._get_portal_leave_type_catalogue(self.employee.company_id.id)
+        self.assertNotIn(self.free_type.id, [leave_type['id'] for leave_type in catalogue])
+
+    def test_portal_cache_versions(self):
+        """Only the records the portal caches depend on bump their version"""
+        Cache = self.env['employee.portal.cache']
+        CalendarLeaves = self.env['resource.calendar.leaves']
+        values = {
+            'name': 'Test Cache Leave',
+            'calendar_id': self.employee.resource_calendar_id.id,
+            'date_from': fields.Datetime.now(),
+            'date_to': fields.Datetime.now() + timedelta(hours=8),
+        }
+        version = Cache._get_versions('resource.calendar.leaves')
+
+        CalendarLeaves.create(dict(values, resource_id=self.employee.resource_id.id))
+        self.assertEqual(Cache._get_versions('resource.calendar.leaves'), version)
+
+        CalendarLeaves.create(values)
+        self.assertNotEqual(Cache._get_versions('resource.calendar.leaves'), version)
+
+    def _next_monday(self, weeks=2):
+        today = fields.Date.today()
+        return today + timedelta(days=7 * weeks - today.weekday())
+
+    def test_batch_creation_reports_invalid_ranges(self):
+        """Valid ranges are created together, invalid ones are reported"""
+        monday = self._next_monday()
+        ranges = [
+            {'date_from': monday, 'date_to': monday + timedelta(days=1), 'holiday_status_id': self.free_type.id},
+            {'date_from': monday + timedelta(days=1), 'date_to': monday + timedelta(days=2),
+             'holiday_status_id': self.free_type.id},
+            {'date_from': monday + timedelta(days=7), 'date_to': monday + timedelta(days=7),
+             'holiday_status_id': self.free_type.id},
+        ]
+        leaves_by_index, errors = self.env['hr.leave']._portal_create_batch(self.employee, ranges)
+
+        self.assertEqual(sorted(leaves_by_index), [0, 2])
+        self.assertIn(1, errors)
+        self.assertEqual(leaves_by_index[0].request_date_from, monday)
+
+    def test_batch_creation_reports_malformed_ranges(self):
+        """Malformed entries are reported like any invalid range"""
+        created, malformed = self.env['hr.leave']._portal_create_batch(self.employee, ['2030-01-01', None])
+        self.assertFalse(created)
+        self.assertEqual(sorted(malformed), [0, 1])
+
+    def test_batch_creation_atomic(self):
+        """With atomic, one refused range prevents any creation"""
+        monday = self._next_monday()
+        ranges = [
+            {'date_from': monday, 'date_to': monday, 'holiday_status_id': self.free_type.id},
+            {'date_from': monday + timedelta(days=3), 'date_to': monday, 'holiday_status_id': self.free_type.id},
+        ]
+        leaves_by_index, errors = self.env['hr.leave']._portal_create_batch(self.employee, ranges, atomic=True)
+
+        self.assertFalse(leaves_by_index)
+        self.assertIn(1, errors)
+
+    def test_duration_preview_uses_working_time(self):
+        """The duration preview counts working days and excludes public holidays"""
+        monday = self._next_monday()
+        HrLeave = self.env['hr.leave']
+
+        duration = HrLeave._get_portal_range_duration(self.employee, monday, monday + timedelta(days=6))
+        self.assertEqual(duration['days'], 5)
+        self.assertEqual(duration['hours'], 40)
+
+        # A new public holiday invalidates the cached intervals
+        wednesday = monday + timedelta(days=2)
+        self.env['resource.calendar.leaves'].create({
+            'name': 'Test Public Holiday',
+            'calendar_id': self.employee.resource_calendar_id.id,
+            'date_from': fields.Datetime.to_datetime(wednesday) - timedelta(hours=6),
+            'date_to': fields.Datetime.to_datetime(wednesday) + timedelta(hours=30),
+        })
+        duration = HrLeave._get_portal_range_duration(self.employee, monday, monday + timedelta(days=6))
+        self.assertEqual(duration['days'], 4)
+
+    def test_interval_index_overlaps(self):
+        """The interval index returns exactly the intervals overlapping a range"""
+        index = LeaveIntervalIndex([
+            {'leave_id': 1, 'start': 10, 'end': 40},
+            {'leave_id': 2, 'start': 20, 'end': 22},
+            {'leave_id': 3, 'start': 50, 'end': 55},
+        ])
+
+        self.assertEqual({entry['leave_id'] for entry in index.overlapping(35, 50)}, {1, 3})
+        self.assertEqual({entry['leave_id'] for entry in index.overlapping(23, 30)}, {1})
+        self.assertFalse(index.overlapping(41, 49))
+
+        index.remove(1)
+        index.add({'leave_id': 4, 'start': 45, 'end': 46})
+        self.assertEqual({entry['leave_id'] for entry in index.overlapping(23, 49)}, {4})
+
+    def test_interval_index_update(self):
+        """Committed changes carry the worker's indexes over to the new version"""
+        dbname = 'test_interval_index_update'
+        leave_interval_index.clear(dbname)
+        year = fields.Date.today().year
+        day = date(year, 6, 1).toordinal()
+        index = leave_interval_index.get_index(dbname, 1, year, lambda: [
+            {'leave_id': 1, 'department_id': 1, 'start': day, 'end': day + 2},
+        ], 10)
+        other = leave_interval_index.get_index(dbname, 2, year, lambda: [], 10)
+
+        leave_interval_index.apply_update(dbname, 10, 11, {1, 2}, [
+            {'leave_id': 2, 'department_id': 1, 'start': day + 5, 'end': day + 6},
+        ])
+        updated = leave_interval_index.get_index(dbname, 1, year, lambda: self.fail("index rebuilt"), 11)
+        self.assertEqual({entry['leave_id'] for entry in updated.overlapping(day, day + 10)}, {2})
+        # The index in use by readers is never modified
+        self.assertEqual({entry['leave_id'] for entry in index.overlapping(day, day + 10)}, {1})
+        self.assertIs(leave_interval_index.get_index(dbname, 2, year, lambda: self.fail("index rebuilt"), 11), other)
+
+        # An index of another version is left to be rebuilt
+        leave_interval_index.apply_update(dbname, 10, 12, set(), [])
+        self.assertEqual(len(leave_interval_index.get_index(dbname, 1, year, lambda: [], 12)), 0)
+        leave_interval_index.clear(dbname)
+
+    def test_team_overlaps_in_department(self):
+        """Leaves of department colleagues are reported, not the employee's own"""
+        department = self.env['hr.department'].create({'name': 'Test Overlap Department'})
+        colleague = self.env['hr.employee'].create({
+            'name': 'Overlap Colleague',
+            'department_id': department.id,
+        })
+        self.employee.department_id = department
+        monday = self._next_monday()
+        self.env['hr.leave'].create({
+            'employee_id': colleague.id,
+            'holiday_status_id': self.free_type.id,
+            'request_date_from': monday,
+            'request_date_to': monday + timedelta(days=2),
+        })
+        leave_interval_index.clear(self.env.cr.dbname)
+
+        overlaps = self.env['hr.leave']._get_portal_team_overlaps(
+            self.employee, monday + timedelta(days=1), monday + timedelta(days=4))
+        self.assertEqual([overlap['employee_id'] for overlap in overlaps], [colleague.id])
+
+        overlaps = self.env['hr.leave']._get_portal_team_overlaps(
+            self.employee, monday + timedelta(days=3), monday + timedelta(days=4))
+        self.assertFalse(overlaps)
+
+        # Writes bump the leave cache version, so the index is not reused
+        leave = self.env['hr.leave'].search([('employee_id', '=', colleague.id)])
+        leave.with_context(leave_skip_state_check=True).write({'request_date_to': monday + timedelta(days=3)})
+        overlaps = self.env['hr.leave']._get_portal_team_overlaps(
+            self.employee, monday + timedelta(days=3), monday + timedelta(days=4))
+        self.assertEqual([overlap['employee_id'] for overlap in overlaps], [colleague.id])
+
+    def test_holiday_overlay(self):
+        """Public holidays are listed from the cached overlay and refreshed on change"""
+        monday = self._next_monday()
+        CalendarLeaves = self.env['resource.calendar.leaves']
+        self.assertFalse(CalendarLeaves._get_portal_holidays(self.employee, monday, monday + timedelta(days=6)))
+
+        tuesday = monday + timedelta(days=1)
+        CalendarLeaves.create({
+            'name': 'Test Company Closure',
+            'calendar_id': self.employee.resource_calendar_id.id,
+            'date_from': fields.Datetime.to_datetime(tuesday),
+            'date_to': fields.Datetime.to_datetime(tuesday) + timedelta(hours=23, minutes=59),
+        })
+        holidays = CalendarLeaves._get_portal_holidays(self.employee, monday, monday + timedelta(days=6))
+        self.assertEqual([holiday['name'] for holiday in holidays], ['Test Company Closure'])
+
+    def test_batch_review_team_leaves(self):
+        """A manager approves the pending leaves of their reports in one batch"""
+        report = self.env['hr.employee'].create({
+            'name': 'Review Report',
+            'parent_id': self.employee.id,
+        })
+        outsider = self.env['hr.employee'].create({'name': 'Review Outsider'})
+        manager_type, hr_type = self.env['hr.leave.type'].create([{
+            'name': 'Test Manager Validated Leave',
+            'requires_allocation': 'no',
+            'leave_validation_type': validation_type,
+        } for validation_type in ('manager', 'hr')])
+        monday = self._next_monday(weeks=4)
+        HrLeave = self.env['hr.leave']
+        report_leaves = HrLeave.create([{
+            'employee_id': report.id,
+            'holiday_status_id': manager_type.id,
+            'request_date_from': monday + timedelta(days=offset),
+            'request_date_to': monday + timedelta(days=offset),
+        } for offset in (0, 1)])
+        hr_leave = HrLeave.create({
+            'employee_id': report.id,
+            'holiday_status_id': hr_type.id,
+            'request_date_from': monday + timedelta(days=2),
+            'request_date_to': monday + timedelta(days=2),
+        })
+        outsider_leave = HrLeave.create({
+            'employee_id': outsider.id,
+            'holiday_status_id': manager_type.id,
+            'request_date_from': monday,
+            'request_date_to': monday,
+        })
+
+        reviewed, errors = HrLeave._portal_batch_review(
+            self.employee, (report_leaves | hr_leave | outsider_leave).ids, 'approve')
+
+        self.assertEqual(set(reviewed.ids), set(report_leaves.ids))
+        self.assertIn(outsider_leave.id, errors)
+        self.assertEqual(report_leaves.mapped('state'), ['validate', 'validate'])
+        # Types validated by HR are left to the time off officers
+        self.assertIn(hr_leave.id, errors)
+        self.assertEqual(hr_leave.state, 'confirm')
+        self.assertEqual(outsider_leave.state, 'confirm')
+        self.assertTrue(report_leaves[0].message_ids.tracking_value_ids)
+
+    def test_state_change_pushed_on_bus(self):
+        """State changes are sent to the employee's partner in one notification"""
+        monday = self._next_monday(weeks=6)
+        leaves = self.env['hr.leave'].create([{
+            'employee_id': self.employee.id,
+            'holiday_status_id': self.free_type.id,
+            'request_date_from': monday + timedelta(days=offset),
+            'request_date_to': monday + timedelta(days=offset),
+        } for offset in (0, 1)])
+        Partner = self.env.registry['res.partner']
+
+        with patch.object(Partner, '_bus_send', autospec=True) as bus_send:
+            leaves.write({'state': 'refuse'})
+
+        bus_send.assert_called_once()
+        partner, notification_type, payload = bus_send.call_args.args
+        self.assertEqual(partner, self.portal_user.partner_id)
+        self.assertEqual(notification_type, 'employee_portal_hub/leave_state')
+        self.assertEqual({leave['id'] for leave in payload['leaves']}, set(leaves.ids))
+        self.assertEqual({leave['state'] for leave in payload['leaves']}, {'refuse'})
+
+    def test_upload_in_progress_cap(self):
+        """The uploads a user has in progress are capped together"""
+        self.env['ir.config_parameter'].sudo().set_param('employee_portal_hub.upload_max_file_size', 2)
+        self.env['ir.config_parameter'].sudo().set_param('employee_portal_hub.upload_max_request_size', 3)
+        Upload = self.env['employee.portal.upload'].with_user(self.portal_user).sudo()
+        megabyte = 1024 * 1024
+
+        Upload._start_upload('first.pdf', 2 * megabyte)
+        with self.assertRaises(UserError):
+            Upload._start_upload('second.pdf', 2 * megabyte)
+        self.assertTrue(Upload._start_upload('third.pdf', megabyte))
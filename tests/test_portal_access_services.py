@@ -0,0 +1,245 @@
+# -*- coding: utf-8 -*-
+
+import time
+from datetime import timedelta
+from unittest.mock import patch
+
+from odoo.tests import tagged, TransactionCase
+from odoo import fields
+from odoo.addons.employee_portal_hub.models import employee_portal_activity
+
+
+@tagged('employee_portal_hub', 'post_install', '-at_install')
+class TestPortalAccessServices(TransactionCase):
+    """Test the set-based portal access lifecycle of employees"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.employees = cls.env['hr.employee'].create([{
+            'name': 'Onboarding Employee %s' % index,
+            'work_email': 'onboarding_%s@test.com' % index,
+        } for index in range(3)])
+        cls.portal_group = cls.env.ref('employee_portal_hub.group_employee_portal_user')
+
+    def test_bulk_onboarding(self):
+        """Users are created for the whole selection, invalid emails are skipped"""
+        invalid = self.env['hr.employee'].create({
+            'name': 'Onboarding Invalid Email',
+            'work_email': 'not an email',
+        })
+        duplicate = self.env['hr.employee'].create({
+            'name': 'Onboarding Duplicate Email',
+            'work_email': 'ONBOARDING_0@test.com',
+        })
+
+        errors = (self.employees | invalid | duplicate)._portal_onboard()
+
+        self.assertEqual(set(errors), {invalid.id, duplicate.id})
+        self.assertTrue(all(self.employees.mapped('portal_access_enabled')))
+        self.assertEqual(self.employees.user_id.mapped('login'),
+                         ['onboarding_%s@test.com' % index for index in range(3)])
+        for user in self.employees.user_id:
+            self.assertIn(self.portal_group, user.groups_id)
+        self.assertFalse(invalid.portal_access_enabled)
+
+    def test_onboarding_queue(self):
+        """The onboarding cron processes queued employees"""
+        self.employees.write({'portal_onboarding_queued': True})
+
+        self.env['hr.employee']._cron_portal_onboarding(batch_size=2)
+        self.assertEqual(len(self.employees.filtered('portal_access_enabled')), 2)
+
+        self.env['hr.employee']._cron_portal_onboarding(batch_size=2)
+        self.assertTrue(all(self.employees.mapped('portal_access_enabled')))
+        self.assertFalse(any(self.employees.mapped('portal_onboarding_queued')))
+
+    def test_mail_queue_dedup_and_rate(self):
+        """Invitations are deduplicated and sent within the per-minute rate"""
+        MailQueue = self.env['employee.portal.mail']
+        self.env['ir.config_parameter'].sudo().set_param('employee_portal_hub.mail_rate_per_minute', 2)
+
+        queued = MailQueue._enqueue(self.employees, 'invitation')
+        self.assertEqual(queued, self.employees)
+        self.assertFalse(MailQueue._enqueue(self.employees, 'invitation'))
+
+        MailQueue._cron_send_queued_mails()
+        entries = MailQueue.search([('employee_id', 'in', self.employees.ids)])
+        self.assertEqual(entries.mapped('state').count('sent'), 2)
+        self.assertTrue(all(entry.mail_id for entry in entries.filtered(lambda entry: entry.state == 'sent')))
+
+        # The rate for the current minute is spent
+        MailQueue._cron_send_queued_mails()
+        self.assertEqual(entries.mapped('state').count('sent'), 2)
+
+        # Sent invitations still block a new one during the dedup window
+        self.assertFalse(MailQueue._enqueue(self.employees, 'invitation'))
+
+    def test_mail_queue_templates(self):
+        """Each mail type is sent with its own template, missing ones leave no sent row"""
+        MailQueue = self.env['employee.portal.mail']
+        welcome, invitation = self.employees[0], self.employees[1]
+        MailQueue._enqueue(welcome, 'welcome')
+        MailQueue._enqueue(invitation, 'invitation')
+
+        MailQueue._cron_send_queued_mails()
+        entries = MailQueue.search([('employee_id', 'in', (welcome | invitation).ids)])
+        self.assertEqual(set(entries.mapped('state')), {'sent'})
+        subjects = {entry.employee_id: entry.mail_id.subject for entry in entries}
+        self.assertTrue(subjects[welcome].startswith('Welcome to Employee Portal'))
+        self.assertTrue(subjects[invitation].startswith('Your Employee Portal access'))
+
+        # Without its template the row fails and does not block a later invitation
+        self.env.ref('employee_portal_hub.employee_portal_invitation_template').unlink()
+        other = self.employees[2]
+        MailQueue._enqueue(other, 'invitation')
+        MailQueue._cron_send_queued_mails()
+        entry = MailQueue.search([('employee_id', '=', other.id)])
+        self.assertEqual(entry.state, 'failed')
+        self.assertFalse(entry.mail_id)
+        self.assertEqual(MailQueue._enqueue(other, 'welcome'), other)
+
+    def test_last_login_from_login_log(self):
+        """Logins are appended to the login log without writing the employee"""
+        self.employees[0]._portal_onboard()
+        employee = self.employees[0]
+        user = employee.user_id
+        write_date = employee.write_date
+        self.assertFalse(employee.last_portal_login)
+
+        self.env['hr.employee'].with_user(user).update_last_login()
+        user._update_last_login()
+        employee.invalidate_recordset(['last_portal_login'])
+
+        self.assertTrue(employee.last_portal_login)
+        self.assertEqual(self.env['employee.portal.login'].search_count([('user_id', '=', user.id)]), 2)
+        self.assertEqual(employee.write_date, write_date)
+
+    def test_activity_buffer_and_stats(self):
+        """Buffered activity is inserted in one batch and counted per department"""
+        department = self.env['hr.department'].create({'name': 'Test Activity Department'})
+        self.employees.write({'department_id': department.id})
+        self.employees._portal_onboard()
+        Activity = self.env['employee.portal.activity']
+        dbname = self.env.cr.dbname
+
+        # Keep the rows in the buffer, then flush them in the test transaction
+        employee_portal_activity._last_flush[dbname] = time.monotonic()
+        for user in self.employees.user_id:
+            Activity._log_activity(user, 'page', '/my/dashboard')
+        Activity._log_activity(self.employees[0].user_id, 'page', '/my/leave_requests')
+        self.assertFalse(Activity.search_count([('department_id', '=', department.id)]))
+        Activity._flush_activity_buffer(cr=self.env.cr)
+        self.assertEqual(Activity.search_count([('department_id', '=', department.id)]), 4)
+
+        now = fields.Datetime.now()
+        stats = Activity._get_active_user_stats(now - timedelta(days=1), now + timedelta(days=1))
+        department_stats = [stat for stat in stats if stat['department_id'] == department.id]
+        self.assertEqual(sum(stat['active_users'] for stat in department_stats), 3)
+
+    def test_activity_flushed_without_traffic(self):
+        """A timer flushes the buffer when no later request does"""
+        self.employees._portal_onboard()
+        Activity = self.env['employee.portal.activity']
+        user = self.employees[0].user_id
+        dbname = self.env.cr.dbname
+
+        employee_portal_activity._last_flush[dbname] = time.monotonic()
+        with patch.object(employee_portal_activity, 'threading') as threading_mock:
+            threading_mock.current_thread.return_value.testing = False
+            Activity._log_activity(user, 'page', '/my/dashboard')
+            Activity._log_activity(user, 'page', '/my/leave_requests')
+        # One timer per database, started with the first buffered row
+        threading_mock.Timer.assert_called_once()
+        interval, flush, args = threading_mock.Timer.call_args.args
+        self.assertEqual(interval, employee_portal_activity.ACTIVITY_FLUSH_INTERVAL)
+        self.assertFalse(Activity.search_count([('user_id', '=', user.id)]))
+
+        with patch.object(employee_portal_activity, '_flush_buffer') as flush_buffer:
+            flush(*args)
+        flush_buffer.assert_called_once_with(dbname)
+        self.assertNotIn(dbname, employee_portal_activity._timers)
+        Activity._flush_activity_buffer(cr=self.env.cr)
+        self.assertEqual(Activity.search_count([('user_id', '=', user.id)]), 2)
+
+    def test_bulk_revocation_and_scheduled_termination(self):
+        """Revocation removes both groups from all users and can archive them"""
+        self.employees._portal_onboard()
+        users = self.employees.user_id
+        self.employees[:2]._portal_revoke(archive_users=True)
+
+        for user in users[:2].with_context(active_test=False):
+            self.assertNotIn(self.portal_group, user.groups_id)
+            self.assertFalse(user.active)
+        self.assertFalse(any(self.employees[:2].mapped('portal_access_enabled')))
+        self.assertTrue(self.employees[2].portal_access_enabled)
+
+        # Access end dates are enforced by the cron
+        self.employees[2].portal_access_end_date = fields.Date.today()
+        self.env['hr.employee']._cron_revoke_expired_portal_access()
+        self.assertFalse(self.employees[2].portal_access_enabled)
+        self.assertNotIn(self.portal_group, self.employees[2].user_id.groups_id)
+
+    def test_notification_digest(self):
+        """Notifications of digest employees are queued and sent as one email"""
+        self.employees[:2]._portal_onboard()
+        daily, instant = self.employees[:2]
+        daily.portal_notification_frequency = 'daily'
+        Queue = self.env['employee.portal.notification']
+        leave_type = self.env['hr.leave.type'].create({'name': 'Digest Leave', 'requires_allocation': 'no'})
+        leave = self.env['hr.leave'].create({
+            'employee_id': daily.id,
+            'holiday_status_id': leave_type.id,
+            'request_date_from': fields.Date.today() + timedelta(days=30),
+            'request_date_to': fields.Date.today() + timedelta(days=30),
+        })
+
+        for index in range(3):
+            leave.message_notify(
+                partner_ids=(daily | instant).user_id.partner_id.ids,
+                subject='Digest event %s' % index,
+                body='Digest event %s' % index,
+            )
+
+        self.assertEqual(Queue.search_count([('employee_id', '=', daily.id)]), 3)
+        self.assertFalse(Queue.search_count([('employee_id', '=', instant.id)]))
+        daily_notifications = self.env['mail.notification'].search([
+            ('res_partner_id', '=', daily.user_id.partner_id.id), ('notification_type', '=', 'email')])
+        self.assertFalse(daily_notifications)
+
+        Queue._cron_send_digests('hourly')
+        self.assertEqual(Queue.search_count([('employee_id', '=', daily.id)]), 3)
+        Queue._cron_send_digests('daily')
+        self.assertFalse(Queue.search_count([('employee_id', '=', daily.id)]))
+        digest = self.env['mail.mail'].search([('recipient_ids', 'in', daily.user_id.partner_id.ids)])
+        self.assertEqual(len(digest), 1)
+        self.assertIn('Digest event 2', digest.body_html)
+        self.assertIn('%s/my/dashboard' % daily.get_base_url(), digest.body_html)
+
+    def test_notification_digest_internal_users(self):
+        """Internal users are notified right away whatever their employee settings"""
+        officer = self.env['res.users'].create({
+            'name': 'Digest Officer',
+            'login': 'digest_officer',
+            'email': 'digest_officer@test.com',
+            'groups_id': [(6, 0, [self.env.ref('base.group_user').id])],
+        })
+        self.employees[0].write({
+            'user_id': officer.id,
+            'portal_notification_frequency': 'daily',
+        })
+        recipients = [{'id': officer.partner_id.id, 'notif': 'email', 'ushare': False}]
+
+        remaining = self.env['employee.portal.notification']._queue_digest_recipients(
+            self.env['mail.message'], recipients)
+
+        self.assertEqual(remaining, recipients)
+        self.assertFalse(self.env['employee.portal.notification'].search_count([]))
+
+    def test_service_worker_url(self):
+        """The service worker is only advertised in offline mode, per user"""
+        IrHttp = self.env['ir.http']
+        self.assertEqual(IrHttp._get_portal_service_worker_url(), '')
+        self.env['ir.config_parameter'].sudo().set_param('employee_portal_hub.offline_mode', 'True')
+        self.assertEqual(IrHttp._get_portal_service_worker_url(), '/my/service-worker.js?uid=%s' % self.env.uid)
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+
+import hashlib
+import io
+import os
+import tempfile
+import time
+
+from werkzeug.datastructures import FileStorage
+
+from odoo.exceptions import UserError
+from odoo.tests import tagged, TransactionCase
+
+
+@tagged('employee_portal_hub', 'post_install', '-at_install')
+class TestPortalUploads(TransactionCase):
+    """Test the streamed and resumable uploads of supporting documents"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.env['ir.config_parameter'].sudo().set_param('ir_attachment.location', 'file')
+        cls.env['ir.config_parameter'].sudo().set_param('employee_portal_hub.upload_max_file_size', 1)
+        cls.env['ir.config_parameter'].sudo().set_param('employee_portal_hub.upload_max_request_size', 1)
+        cls.Attachment = cls.env['ir.attachment']
+        cls.megabyte = 1024 * 1024
+
+    def _file(self, content, filename):
+        return FileStorage(io.BytesIO(content), filename=filename)
+
+    def test_stream_upload_content(self):
+        """Streamed files are stored with their checksum, size and content"""
+        content = b'%PDF-1.4 medical certificate' + b'.' * 200000
+        [values] = self.Attachment._portal_store_uploads([self._file(content, 'certificate.pdf')])
+        self.assertNotIn('raw', values)
+        self.assertEqual(values['checksum'], hashlib.sha1(content).hexdigest())
+        self.assertEqual(values['file_size'], len(content))
+
+        attachment = self.Attachment.create(dict(values, res_model='hr.leave', res_id=0))
+        self.assertEqual(attachment.raw, content)
+        self.assertEqual(attachment.checksum, hashlib.sha1(content).hexdigest())
+        self.assertEqual(attachment.mimetype, 'application/pdf')
+
+    def test_stream_upload_size_caps(self):
+        """Files over the per file cap, or together over the per request cap, are refused"""
+        with self.assertRaises(UserError):
+            self.Attachment._portal_store_uploads([self._file(b'%PDF' + b'.' * self.megabyte, 'large.pdf')])
+
+        half = b'%PDF' + b'.' * (self.megabyte // 2)
+        with self.assertRaises(UserError):
+            self.Attachment._portal_store_uploads([self._file(half, 'first.pdf'), self._file(half, 'second.pdf')])
+
+    def test_stream_upload_mimetype(self):
+        """The content decides the mimetype, the file name only when the content is generic"""
+        [values] = self.Attachment._portal_store_uploads([self._file(b'%PDF-1.4 scan', 'scan.txt')])
+        self.assertEqual(values['mimetype'], 'application/pdf')
+
+        [values] = self.Attachment._portal_store_uploads([self._file(b'\x00\x01\x02\x03', 'hours.csv')])
+        self.assertEqual(values['mimetype'], 'text/csv')
+
+        with self.assertRaises(UserError):
+            self.Attachment._portal_store_uploads([self._file(b'<html><body>Hello</body></html>', 'note.html')])
+
+    def test_resumable_upload(self):
+        """Chunks must follow the acknowledged offset and an interrupted chunk can be resent"""
+        content = b'%PDF-1.4 ' + b'x' * 1000
+        upload = self.env['employee.portal.upload']._start_upload('certificate.pdf', len(content))
+        self.assertEqual(upload._append_chunk(0, io.BytesIO(content[:400])), 400)
+
+        with self.assertRaises(UserError):
+            upload._append_chunk(200, io.BytesIO(content[200:600]))
+
+        # An interrupted request left unacknowledged bytes behind the offset
+        with open(upload._get_part_path(), 'ab') as part_file:
+            part_file.write(b'garbage')
+        with self.assertRaises(UserError):
+            upload._finalize('hr.leave', 0)
+        self.assertEqual(upload._append_chunk(400, io.BytesIO(content[400:])), len(content))
+
+        attachment = upload._finalize('hr.leave', 0)
+        self.assertEqual(upload.state, 'done')
+        self.assertEqual(attachment.raw, content)
+        self.assertEqual(attachment.checksum, hashlib.sha1(content).hexdigest())
+        self.assertEqual(attachment.file_size, len(content))
+        self.assertEqual(upload._finalize('hr.leave', 0), attachment)
+
+    def test_resumable_upload_size(self):
+        """Content beyond the announced size is refused"""
+        upload = self.env['employee.portal.upload']._start_upload('certificate.pdf', 10)
+        with self.assertRaises(UserError):
+            upload._append_chunk(0, io.BytesIO(b'%PDF-1.4 too long'))
+        self.assertEqual(upload.received_size, 0)
+
+    def test_cleanup_abandoned_uploads(self):
+        """The cron removes abandoned uploads and stray temporary files only"""
+        Upload = self.env['employee.portal.upload']
+        abandoned = Upload._start_upload('abandoned.pdf', 100)
+        abandoned._append_chunk(0, io.BytesIO(b'%PDF-1.4 half'))
+        recent = Upload._start_upload('recent.pdf', 100)
+        recent._append_chunk(0, io.BytesIO(b'%PDF-1.4 half'))
+        abandoned_path, recent_path = abandoned._get_part_path(), recent._get_part_path()
+
+        self.env.flush_all()
+        self.env.cr.execute(
+            "UPDATE employee_portal_upload SET write_date = now() at time zone 'UTC' - interval '2 days' WHERE id = %s",
+            [abandoned.id])
+        stale_time = time.time() - 2 * 86400
+        stray_fd, stray_path = tempfile.mkstemp(dir=self.Attachment._get_portal_upload_dir(), prefix='stream-')
+        os.close(stray_fd)
+        os.utime(stray_path, (stale_time, stale_time))
+        # Old partial file of an upload still in progress
+        os.utime(recent_path, (stale_time, stale_time))
+
+        Upload._cron_cleanup_abandoned_uploads()
+        self.assertFalse(abandoned.exists())
+        self.assertFalse(os.path.exists(abandoned_path))
+        self.assertFalse(os.path.exists(stray_path))
+        self.assertTrue(recent.exists())
+        self.assertTrue(os.path.exists(recent_path))
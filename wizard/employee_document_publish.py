@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+
+import base64
+
+from odoo import fields, models, _
+
+
+class EmployeeDocumentPublish(models.TransientModel):
+    _name = 'employee.document.publish'
+    _description = 'Publish a Document to Employees'
+
+    document_name = fields.Char(string='Document Name', required=True)
+    file = fields.Binary(string='File', required=True)
+    file_name = fields.Char(string='File Name')
+    document_type = fields.Selection(
+        lambda self: self.env['employee.document']._fields['document_type'].selection,
+        string='Document Type', required=True, default='policy')
+    document_category = fields.Selection(
+        lambda self: self.env['employee.document']._fields['document_category'].selection,
+        string='Category', default='company')
+    description = fields.Text(string='Description')
+    is_mandatory_read = fields.Boolean(string='Mandatory Read')
+    expiry_date = fields.Date(string='Expiry Date')
+    department_ids = fields.Many2many('hr.department', string='Departments',
+                                      help="Leave empty to publish to every employee of the company")
+    company_id = fields.Many2one('res.company', required=True, default=lambda self: self.env.company)
+
+    def action_publish(self):
+        self.ensure_one()
+        domain = [('company_id', '=', self.company_id.id)]
+        if self.department_ids:
+            domain.append(('department_id', 'child_of', self.department_ids.ids))
+        employees = self.env['hr.employee'].search(domain)
+        Document = self.env['employee.document']
+        attachment = Document._get_shared_attachment(
+            self.file_name or self.document_name, base64.b64decode(self.file), company=self.company_id)
+        documents = Document._publish(employees, {
+            'document_name': self.document_name,
+            'document_type': self.document_type,
+            'document_category': self.document_category,
+            'description': self.description,
+            'is_mandatory_read': self.is_mandatory_read,
+            'expiry_date': self.expiry_date,
+        }, attachment=attachment)
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _('Document Published'),
+                'message': _('%s employees received the document.', len(documents)),
+                'type': 'success',
+                'next': {'type': 'ir.actions.act_window_close'},
+            }
+        }